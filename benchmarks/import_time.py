@@ -0,0 +1,72 @@
+"""
+author: Yichen Zhang
+"""
+import os
+import sys
+import json
+import subprocess
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# runs in a fresh interpreter: times importing the package, then the first 
+# access of a voting class, and lists the heavy modules imported by each
+SCRIPT = """
+import sys, time, json
+heavy = ("pandas", "numpy", "pyarrow", "openpyxl", "sklearn")
+start = time.perf_counter()
+import pyvoting
+package = time.perf_counter()-start
+eager = [m for m in heavy if m in sys.modules]
+start = time.perf_counter()
+pyvoting.ScoreVoting
+first_class = time.perf_counter()-start
+print(json.dumps({"package": package, "first_class": first_class, 
+                  "eager": eager}))
+"""
+
+def MeasureImport(repeat=5):
+    """
+    Measures how long importing the package takes, each time in a fresh 
+    interpreter so that nothing is already imported. 
+    
+    Parameters
+    repeat : int, default=5
+        number of interpreters to start
+    
+    Returns
+    dict
+        median seconds taken by "package" and "first_class", and the heavy 
+        modules imported by the package itself under "eager"
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [ROOT, os.path.join(ROOT, "pyvoting"), env.get("PYTHONPATH", "")])
+    runs = []
+    for i in range(repeat):
+        output = subprocess.run([sys.executable, "-c", SCRIPT], env=env, 
+                                capture_output=True, text=True, check=True)
+        runs.append(json.loads(output.stdout))
+    return {"package": statistics.median(r["package"] for r in runs), 
+            "first_class": statistics.median(r["first_class"] for r in runs), 
+            "eager": sorted(set(m for r in runs for m in r["eager"]))}
+
+if __name__=="__main__":
+    import argparse
+    parser = argparse.ArgumentParser(
+        description="Guard the import time of pyvoting against regressions.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-seconds", type=float, default=0.05, 
+                        help="largest acceptable time to import the package")
+    args = parser.parse_args()
+    result = MeasureImport(args.repeat)
+    print(f"import pyvoting: {result['package']*1000:.1f} ms")
+    print(f"first voting class: {result['first_class']*1000:.1f} ms")
+    failed = False
+    if result["eager"]:
+        print("heavy modules imported eagerly: "+", ".join(result["eager"]))
+        failed = True
+    if result["package"]>args.max_seconds:
+        print(f"importing the package takes longer than {args.max_seconds}s")
+        failed = True
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,396 @@
+"""
+author: Yichen Zhang
+"""
+import os
+import sys
+import json
+import time
+import platform
+import subprocess
+import importlib.metadata
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+HISTORY = os.path.join(ROOT, "history.jsonl")
+
+CLASSES = ["PluralityVoting", "ApprovalVoting", "ScoreVoting", "STARVoting",
+           "RankedChoiceVoting", "TierListVoting", "TieredPopularityVoting",
+           "NormalizedScoreVoting", "StandardizedScoreVoting",
+           "RoundRobinVoting", "SchulzeVoting"]
+OPERATIONS = ["AddBallot", "ImportBallots", "RunElection",
+              "RunMultiWinnerElection", "ExportBallots"]
+BALLOTS = [10**3, 10**4, 10**5]
+CANDIDATES = [3, 10, 100]
+FULL_BALLOTS = [10**3, 10**4, 10**5, 10**6, 10**7]
+FULL_CANDIDATES = [3, 10, 100, 1000]
+
+def MakeBallots(name, ballots, candidates, seed=0):
+    """
+    Generates the same random valid ballots for a voting system every time. 
+    
+    Parameters
+    name : str
+        name of the voting class
+    ballots : int
+        number of ballots
+    candidates : int
+        number of candidates
+    seed : int, default=0
+        seed of the random generator
+    
+    Returns
+    pandas.DataFrame
+        one ballot per row and one column per candidate, named c0, c1...
+    """
+    import numpy as np
+    import pandas as pd
+    rng = np.random.default_rng(seed)
+    # some candidates are more popular than others, so that the elections
+    # are not all ties
+    popularity = rng.normal(size=candidates)
+    noise = rng.normal(size=(ballots, candidates))+popularity
+    if name=="PluralityVoting":
+        values = np.zeros((ballots, candidates), dtype=int)
+        values[np.arange(ballots), noise.argmax(axis=1)] = 1
+    elif name=="ApprovalVoting":
+        values = (noise>0).astype(int)
+    elif name=="RankedChoiceVoting":
+        values = (-noise).argsort(axis=1).argsort(axis=1)+1
+    elif name in ("TierListVoting", "TieredPopularityVoting",
+                  "RoundRobinVoting", "SchulzeVoting"):
+        # the lower the tier, the more the candidate is liked
+        values = np.clip(3-np.round(noise).astype(int), 1,
+                         min(candidates, 5))
+    else:
+        values = np.clip(np.round(noise+2.5).astype(int), 0, 5)
+    return pd.DataFrame(values, columns=[f"c{i}" for i in range(candidates)])
+
+def RunCase(name, ballots, candidates, repeat=1, add_sample=200,
+            memory=True):
+    """
+    Times every operation of a voting system on one size of election, in
+    the current interpreter. 
+    
+    Parameters
+    name : str
+        name of the voting class
+    ballots : int
+        number of ballots
+    candidates : int
+        number of candidates
+    repeat : int, default=1
+        number of times every operation is timed, the fastest time is kept
+    add_sample : int, default=200
+        at most this many ballots are added one at a time with AddBallot
+    memory : bool, default=True
+        whether to also measure the peak memory allocated by every operation
+        with tracemalloc, in a separate pass as tracing slows it down
+    
+    Returns
+    dict
+        for every operation, its fastest "seconds" and its "peak_bytes"
+        (None if memory is False), with the number of ballots added under
+        "ballots" for AddBallot
+    """
+    import tempfile
+    import tracemalloc
+    import pyvoting
+    voting = getattr(pyvoting, name)
+    table = MakeBallots(name, ballots, candidates)
+    names = list(table.columns)
+    series = [row for i, row in table.head(add_sample).iterrows()]
+    results = {op: {"seconds": None, "peak_bytes": None}
+               for op in OPERATIONS}
+    results["AddBallot"]["ballots"] = len(series)
+    with tempfile.TemporaryDirectory() as folder:
+        source = os.path.join(folder, "ballots_in.csv")
+        table.to_csv(source)
+        del table
+        target = os.path.join(folder, "ballots_out.csv")
+        
+        def Workflow():
+            # every operation starts from the state the previous one left,
+            # as in a typical workflow
+            election = voting(names)
+            yield "AddBallot", lambda: [election.AddBallot(s) for s in series]
+            election = voting(names)
+            yield "ImportBallots", lambda: election.ImportBallots(source)
+            yield "RunElection", lambda: election.RunElection()
+            # but RunMultiWinnerElection starts from a fresh election, which 
+            # does not hold the results RunElection left in the cache
+            election = voting(names)
+            election.ImportBallots(source)
+            yield "RunMultiWinnerElection", (
+                lambda: election.RunMultiWinnerElection())
+            yield "ExportBallots", lambda: election.ExportBallots(target)
+        
+        for i in range(repeat):
+            for op, call in Workflow():
+                start = time.perf_counter()
+                call()
+                seconds = time.perf_counter()-start
+                if results[op]["seconds"] is None or (
+                        seconds<results[op]["seconds"]):
+                    results[op]["seconds"] = seconds
+        if memory:
+            tracemalloc.start()
+            for op, call in Workflow():
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+                call()
+                results[op]["peak_bytes"] = (
+                    tracemalloc.get_traced_memory()[1]-before)
+            tracemalloc.stop()
+    return results
+
+def RunGrid(classes, ballot_counts, candidate_counts, repeat=1,
+            add_sample=200, memory=True, max_cells=2*10**8, timeout=600):
+    """
+    Runs every case of a grid of voting systems, ballot counts and candidate
+    counts, each in a fresh interpreter. 
+    
+    Parameters
+    classes : list
+        names of the voting classes
+    ballot_counts : list
+        numbers of ballots
+    candidate_counts : list
+        numbers of candidates
+    repeat, add_sample, memory
+        the same as in RunCase
+    max_cells : int, default=2*10**8
+        cases with more ballots times candidates than this are skipped, as
+        their ballots would not fit in memory
+    timeout : float, default=600
+        number of seconds after which a case is stopped
+    
+    Returns
+    list
+        one dict per case with its "class", "ballots", "candidates",
+        "status" ("ok", "skipped", "timeout" or "error") and its "results"
+        as returned by RunCase
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [os.path.dirname(ROOT), os.path.join(os.path.dirname(ROOT),
+                                             "pyvoting"),
+         env.get("PYTHONPATH", "")])
+    cases = []
+    for name in classes:
+        for ballots in ballot_counts:
+            for candidates in candidate_counts:
+                case = {"class": name, "ballots": ballots,
+                        "candidates": candidates, "status": "ok",
+                        "results": None}
+                command = [sys.executable, os.path.abspath(__file__),
+                           "--case", name, str(ballots), str(candidates),
+                           "--repeat", str(repeat),
+                           "--add-sample", str(add_sample)]
+                if not memory:
+                    command.append("--no-memory")
+                if ballots*candidates>max_cells:
+                    case["status"] = "skipped"
+                else:
+                    try:
+                        output = subprocess.run(command, env=env,
+                                                capture_output=True,
+                                                text=True, timeout=timeout)
+                        if output.returncode==0:
+                            case["results"] = json.loads(output.stdout)
+                        else:
+                            case["status"] = "error"
+                            case["error"] = output.stderr.strip()[-500:]
+                    except subprocess.TimeoutExpired:
+                        case["status"] = "timeout"
+                cases.append(case)
+                print(f"{name} {ballots} ballots {candidates} candidates: "
+                      +case["status"], file=sys.stderr)
+    return cases
+
+def Environment():
+    """
+    Returns
+    dict
+        the versions and machine the benchmarks run on, and the git commit
+        of the code being benchmarked if there is one
+    """
+    environment = {"python": platform.python_version(),
+                   "machine": platform.machine(),
+                   "system": platform.system(), "cpus": os.cpu_count()}
+    for package in ("numpy", "pandas"):
+        try:
+            environment[package] = importlib.metadata.version(package)
+        except importlib.metadata.PackageNotFoundError:
+            environment[package] = None
+    try:
+        environment["commit"] = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True,
+            text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        environment["commit"] = None
+    return environment
+
+def LoadHistory(filename):
+    """
+    Parameters
+    filename : str
+        name of a history file, with one run per line
+    
+    Returns
+    list
+        the runs in the file from oldest to newest, empty if there is no file
+    """
+    if not os.path.exists(filename):
+        return []
+    with open(filename) as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+def FindRegressions(run, baseline, tolerance=0.25, memory_tolerance=0.25,
+                    min_seconds=0.01, min_bytes=2**20):
+    """
+    Compares a run with a baseline run, case by case and operation by
+    operation. 
+    
+    Parameters
+    run : dict
+        the run to check
+    baseline : dict
+        the run to compare with
+    tolerance : float, default=0.25
+        fraction by which an operation may get slower
+    memory_tolerance : float, default=0.25
+        fraction by which the peak memory of an operation may grow
+    min_seconds : float, default=0.01
+        slowdowns smaller than this many seconds are ignored as noise
+    min_bytes : int, default=2**20
+        memory growth smaller than this many bytes is ignored as noise
+    
+    Returns
+    list
+        one message per regression
+    """
+    before = {(c["class"], c["ballots"], c["candidates"]): c["results"]
+              for c in baseline["cases"] if c["status"]=="ok"}
+    regressions = []
+    for case in run["cases"]:
+        key = (case["class"], case["ballots"], case["candidates"])
+        if key not in before:
+            continue
+        label = f"{key[0]} {key[1]} ballots {key[2]} candidates"
+        if case["status"]!="ok":
+            regressions.append(f"{label}: {case['status']}")
+            continue
+        for op, result in case["results"].items():
+            old = before[key].get(op)
+            if old is None:
+                continue
+            if (result["seconds"]>old["seconds"]*(1+tolerance) and
+                    result["seconds"]-old["seconds"]>min_seconds):
+                regressions.append(
+                    f"{label} {op}: {old['seconds']:.4f}s -> "
+                    f"{result['seconds']:.4f}s")
+            if (result["peak_bytes"] is not None and
+                    old["peak_bytes"] is not None and
+                    result["peak_bytes"]>old["peak_bytes"]*(
+                        1+memory_tolerance) and
+                    result["peak_bytes"]-old["peak_bytes"]>min_bytes):
+                regressions.append(
+                    f"{label} {op}: {old['peak_bytes']/2**20:.1f} MiB -> "
+                    f"{result['peak_bytes']/2**20:.1f} MiB")
+    return regressions
+
+def Report(run):
+    """
+    Parameters
+    run : dict
+        a run of the benchmarks
+    
+    Returns
+    str
+        a table of the seconds and peak MiB of every operation in every case
+    """
+    lines = [f"{'class':<24}{'ballots':>9}{'cands':>6}  "
+             +"".join(f"{op[:14]:>16}" for op in OPERATIONS)]
+    for case in run["cases"]:
+        line = (f"{case['class']:<24}{case['ballots']:>9}"
+                f"{case['candidates']:>6}  ")
+        if case["status"]!="ok":
+            lines.append(line+case["status"])
+            continue
+        for op in OPERATIONS:
+            result = case["results"][op]
+            cell = f"{result['seconds']:.3f}s"
+            if result["peak_bytes"] is not None:
+                cell += f"/{result['peak_bytes']/2**20:.1f}M"
+            line += f"{cell:>16}"
+        lines.append(line)
+    return "\n".join(lines)
+
+if __name__=="__main__":
+    import argparse
+    parser = argparse.ArgumentParser(
+        description="Benchmark every voting method over a grid of ballot "
+        "and candidate counts, and flag regressions against a baseline.")
+    parser.add_argument("--case", nargs=3, metavar=("CLASS", "BALLOTS",
+                                                    "CANDIDATES"),
+                        help=argparse.SUPPRESS)
+    parser.add_argument("--classes", nargs="+", default=CLASSES)
+    parser.add_argument("--ballots", nargs="+", type=int, default=None)
+    parser.add_argument("--candidates", nargs="+", type=int, default=None)
+    parser.add_argument("--full", action="store_true",
+                        help="use the full grid of 1e3 to 1e7 ballots and "
+                        "3 to 1000 candidates")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--add-sample", type=int, default=200,
+                        help="number of ballots added with AddBallot")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="skip measuring peak memory")
+    parser.add_argument("--max-cells", type=int, default=2*10**8)
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--history", default=HISTORY,
+                        help="file the run is appended to")
+    parser.add_argument("--no-save", action="store_true",
+                        help="do not append the run to the history")
+    parser.add_argument("--baseline", default=None,
+                        help="history file holding the baseline, the "
+                        "history itself by default")
+    parser.add_argument("--baseline-commit", default=None,
+                        help="compare with the latest run of this commit "
+                        "instead of the latest run")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--memory-tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+    if args.case:
+        name, ballots, candidates = args.case
+        print(json.dumps(RunCase(name, int(ballots), int(candidates),
+                                 args.repeat, args.add_sample,
+                                 not args.no_memory)))
+        sys.exit(0)
+    ballot_counts = args.ballots or (FULL_BALLOTS if args.full else BALLOTS)
+    candidate_counts = args.candidates or (
+        FULL_CANDIDATES if args.full else CANDIDATES)
+    baselines = LoadHistory(args.baseline or args.history)
+    if args.baseline_commit:
+        baselines = [b for b in baselines if
+                     (b["environment"]["commit"] or "").startswith(
+                         args.baseline_commit)]
+    run = {"time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+           "environment": Environment(),
+           "cases": RunGrid(args.classes, ballot_counts, candidate_counts,
+                            args.repeat, args.add_sample,
+                            not args.no_memory, args.max_cells,
+                            args.timeout)}
+    print(Report(run))
+    if not args.no_save:
+        with open(args.history, "a") as file:
+            file.write(json.dumps(run)+"\n")
+    if not baselines:
+        print("no baseline to compare with")
+        sys.exit(0)
+    regressions = FindRegressions(run, baselines[-1], args.tolerance,
+                                  args.memory_tolerance)
+    commit = baselines[-1]["environment"]["commit"]
+    print(f"compared with the run of {baselines[-1]['time']}"
+          +(f" at commit {commit[:10]}" if commit else ""))
+    for regression in regressions:
+        print("regression: "+regression)
+    sys.exit(1 if regressions else 0)
@@ -3,7 +3,8 @@ author: Yichen Zhang
 """
 import pandas as pd
 import numpy as np
-from Voting import Voting
+from Voting import Voting, _ValidWeights
+from BitBallotStore import BitBallotStore
 
 class ApprovalVoting(Voting):
     
@@ -38,8 +39,12 @@ class ApprovalVoting(Voting):
     
     def __init__(self, candidates, try_handle_invalid=True):
         super().__init__(candidates, try_handle_invalid)
+        # every ballot votes 0 or 1 for each candidate, so it is stored as 
+        # bits
+        self.ballots = BitBallotStore(candidates, self.BallotView)
+        self.ballots.listeners.append(self._CountPreferences)
     
-    def AddBallot(self, new_ballot):
+    def AddBallot(self, new_ballot, weight=1):
         # support a string, a list of strings, or a Series to represent a vote
         if type(new_ballot)==str:
             ballot = self.ApprovalBallot(
@@ -63,24 +68,114 @@ class ApprovalVoting(Voting):
                     new_ballot[c] = default_score
             ballot = self.ApprovalBallot(new_ballot)
         try:
-            if ballot.isValid(self.try_handle_invalid):
-                self.ballots.append(ballot)
+            # the ballot must be cast by a positive number of voters
+            if not _ValidWeights(weight):
+                return False
+            with self._Phase("validation"):
+                valid = ballot.isValid(self.try_handle_invalid)
+            if valid:
+                self.ballots.Append(ballot.scores, weight)
                 return True
             return False
         except:
             return False
     
-    def ImportBallots(self, filename):
-        return super().ImportBallots(filename)
+    def AddBallots(self, new_ballots, weights=None):
+        return super().AddBallots(new_ballots, weights)
+    
+    def ValidateBallots(self, ballots, present):
+        reasons = np.full(len(ballots), "", dtype=object)
+        if self.try_handle_invalid:
+            # fill missing values with 0
+            ballots[np.isnan(ballots)] = 0
+        missing = np.isnan(ballots).any(axis=1)
+        # interpret the largest score as approval, if specified to
+        # all 0 (no approval) will not be parsed into all 1 (approve all)
+        if self.try_handle_invalid:
+            voted = ~(ballots==0).all(axis=1)
+            ballots[voted] = (ballots[voted]==
+                              ballots[voted].max(axis=1, keepdims=True))
+        # check whether the ballots only vote 0 or 1 for each candidate
+        reasons[~np.isin(ballots, [0, 1]).all(axis=1)] = "not_binary"
+        reasons[missing] = "missing"
+        return ballots, reasons
+    
+    def ImportBallots(self, filename, chunk_size=None, progress=None, 
+                      weight_column=None, resume=False):
+        return super().ImportBallots(filename, chunk_size, progress, 
+                                     weight_column, resume)
         
-    def ExportBallots(self, filename):
-        return super().ExportBallots(filename)
+    def ExportBallots(self, filename, chunk_size=None, weight_column=None):
+        return super().ExportBallots(filename, chunk_size, weight_column)
+    
+    def CompactBallots(self):
+        return super().CompactBallots()
+    
+    def OpenBallotStore(self, path):
+        return super().OpenBallotStore(path)
+    
+    def SparseBallots(self):
+        return super().SparseBallots()
+    
+    def BallotView(self, values):
+        return self.ApprovalBallot(pd.Series(values, index=self.candidates))
+    
+    def VoteMatrix(self, ballots, columns):
+        # vote 0 or 1 for candidates, can be all 0 or all 1
+        return ballots[:, columns].astype(int)
+    
+    def PreferenceScores(self, ballots):
+        return super().PreferenceScores(ballots)
     
-    def RunElection(self, candidates=None):
-        return super().RunElection(candidates)
+    def CloneBallots(self, ballots, weights, column, copies, rng):
+        return super().CloneBallots(ballots, weights, column, copies, rng)
+    
+    def Tally(self, candidates):
+        # a ballot votes the same for a candidate whoever else is running, 
+        # so the tally is read off the running totals of the ballot store
+        totals = self.ballots.totals[self.ballots.Columns(candidates)]
+        if self.ballots.integral_weights:
+            totals = totals.astype(int)
+        return pd.Series(totals, index=candidates)
+    
+    def RunElection(self, candidates=None, workers=None):
+        if candidates==None:
+            candidates=self.candidates
+        # the scores never change from round to round, so the result 
+        # follows from a single sort unless the brackets are split otherwise
+        if type(self).SplitSize is not ApprovalVoting.SplitSize:
+            return super().RunElection(candidates, workers)
+        # the tally is read off the running totals without going through the
+        # ballots, so there is nothing for workers to do
+        with self._Phase("tally"):
+            scores = self.Tally(candidates)
+        return self._RankByScores(candidates, scores)
+    
+    def _RanksByTotals(self):
+        return type(self).SplitSize is ApprovalVoting.SplitSize
     
     def SplitSize(self, num_candidates):
         return super().SplitSize(num_candidates)
     
-    def RunMultiWinnerElection(self, candidates=None):
-        return super().RunElection(candidates)
\ No newline at end of file
+    def RunMultiWinnerElection(self, candidates=None, workers=None):
+        return super().RunMultiWinnerElection(candidates, workers)
+    
+    def Bootstrap(self, replicates=1000, candidates=None, seed=None, 
+                  workers=None):
+        return super().Bootstrap(replicates, candidates, seed, workers)
+    
+    def SpoilerTest(self, clones=None, copies=1, candidates=None, seed=None, 
+                    workers=None):
+        return super().SpoilerTest(clones, copies, candidates, seed, workers)
+    
+    def PairwiseMatrix(self, candidates=None):
+        return super().PairwiseMatrix(candidates)
+    
+    def CondorcetWinner(self, candidates=None):
+        return super().CondorcetWinner(candidates)
+    
+    def CondorcetLoser(self, candidates=None):
+        return super().CondorcetLoser(candidates)
+    
+    def Profile(self, profiler=None):
+        return super().Profile(profiler)
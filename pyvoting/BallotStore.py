@@ -0,0 +1,415 @@
+"""
+author: Yichen Zhang
+"""
+import copy
+import contextlib
+import pandas as pd
+import numpy as np
+
+class BallotStore:
+    """
+    Ballot Store Class
+    Stores the valid ballots of an election as the rows of one dense
+    ballots-by-candidates array, where every candidate is interned to a
+    column id once. For backward compatibility it also behaves like the list
+    of Ballot objects it replaces: the Ballot objects are built on access as
+    lightweight views of the stored rows. The running total of every column
+    is kept up to date as ballots are stored, and so can any other summary of
+    the ballots through the listeners of the store. 
+    Every stored ballot has a weight, the number of voters casting it. In 
+    compact mode identical ballots are stored once, with their weights 
+    added up. 
+    """
+    
+    def __init__(self, candidates, ballot_view=None, chunk_size=65536):
+        """
+        Initializes an empty ballot store. 
+        
+        Parameters
+        candidates : list
+            an non-empty list of unique strings representing the candidates
+        ballot_view : callable, default=None
+            a function that turns a stored row into a Ballot object
+        chunk_size : int, default=65536
+            number of ballots in each chunk returned by Chunks
+        """
+        self.candidates = list(candidates)
+        self.candidate_ids = {c: i for i, c in enumerate(self.candidates)}
+        self.ballot_view = ballot_view
+        self.chunk_size = chunk_size
+        self.values = np.zeros((0, len(self.candidates)))
+        self.weights = np.zeros(0)
+        self.size = 0
+        # whether all weights are integers, in which case tallies are too
+        self.integral_weights = True
+        # in compact mode, maps the bytes of every stored row to its position
+        self.compact = False
+        self.patterns = {}
+        # running weighted sum of the stored values of each candidate
+        self.totals = np.zeros(len(self.candidates))
+        # counts the changes to the stored ballots
+        self.version = 0
+        # functions called with (rows, weights) of every batch of ballots
+        # before it is stored
+        self.listeners = []
+        # number of rows read from each imported ballot file
+        self.sources = {}
+    
+    def __len__(self):
+        return self.size
+    
+    def __iter__(self):
+        for i in range(self.size):
+            yield self[i]
+    
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self.size))]
+        if i<0:
+            i += self.size
+        if not 0<=i<self.size:
+            raise IndexError("ballot index out of range")
+        return self.ballot_view(self.DenseRows(self.Arrays(), i, i+1, 
+                                               len(self.candidates))[0])
+    
+    def append(self, ballot):
+        """
+        Stores a Ballot object that has passed isValid, so that code written
+        for the old list of ballots keeps working. 
+        
+        Parameters
+        ballot : Voting.Ballot
+            a valid ballot, its rank is stored if it has one and its scores 
+            otherwise
+        """
+        self.Append(getattr(ballot, "rank", ballot.scores))
+    
+    def Columns(self, candidates):
+        """
+        Looks up the column ids of the given candidates. 
+        
+        Parameters
+        candidates : list
+            a list of unique strings representing the candidates
+        
+        Returns
+        numpy.ndarray
+            an integer array of column ids in the same order as candidates
+        """
+        return np.array([self.candidate_ids[c] for c in candidates],
+                        dtype=np.intp)
+    
+    def Append(self, row, weight=1):
+        """
+        Stores one ballot. 
+        
+        Parameters
+        row : pandas.Series or array-like
+            numeric values of the ballot, a Series is aligned to the
+            candidates by its index and an array is taken in candidate order
+        weight : float, default=1
+            weight of the ballot
+        """
+        if isinstance(row, pd.Series):
+            row = row.reindex(self.candidates)
+        self.Extend(np.asarray(row, dtype=float).reshape(1, -1), [weight])
+    
+    def Extend(self, rows, weights=None):
+        """
+        Stores a batch of ballots. 
+        
+        Parameters
+        rows : numpy.ndarray
+            a 2D array with one ballot per row and one column per candidate
+        weights : array-like, default=None
+            weight of each ballot, all 1 if None
+        """
+        rows = np.asarray(rows, dtype=float).reshape(-1, len(self.candidates))
+        if weights is None:
+            weights = np.ones(len(rows))
+        weights = np.asarray(weights, dtype=float).reshape(-1)
+        self.integral_weights = (self.integral_weights and 
+                                 np.array_equal(weights, np.round(weights)))
+        self.totals += weights@rows
+        self.version += 1
+        for listener in self.listeners:
+            listener(rows, weights)
+        self._Insert(rows, weights)
+    
+    def _Insert(self, rows, weights):
+        # stores a batch of ballots without updating the summaries of the 
+        # ballots, which is also how Compact restores the ballots
+        if self.compact and len(rows)>0:
+            # identical rows have identical bytes (adding 0 turns -0.0 into 
+            # 0.0), so rows are compared as single opaque values
+            rows = np.ascontiguousarray(rows+0)
+            keys = rows.view(np.dtype((np.void, rows.itemsize*rows.shape[1])))
+            keys, first, inverse = np.unique(keys.reshape(-1), 
+                                             return_index=True, 
+                                             return_inverse=True)
+            # add up the weights of identical rows, then of the rows that 
+            # are stored already, and only store the remaining rows
+            rows = rows[first]
+            weights = np.bincount(inverse.reshape(-1), weights=weights, 
+                                  minlength=len(rows))
+            new = np.ones(len(rows), dtype=bool)
+            position = self.size
+            for i, key in enumerate(keys):
+                key = key.tobytes()
+                if key in self.patterns:
+                    self.weights[self.patterns[key]] += weights[i]
+                    new[i] = False
+                else:
+                    self.patterns[key] = position
+                    position += 1
+            rows, weights = rows[new], weights[new]
+        self._Store(rows, weights)
+    
+    def _Store(self, rows, weights):
+        """
+        Writes a batch of ballots after the stored ballots. 
+        
+        Parameters
+        rows : numpy.ndarray
+            a 2D array with one ballot per row and one column per candidate
+        weights : numpy.ndarray
+            weight of each ballot
+        """
+        new_size = self.size+rows.shape[0]
+        if new_size>self.values.shape[0]:
+            # grow geometrically so that appending one ballot at a time is
+            # amortized constant time
+            self._Reserve(max(new_size, 2*self.values.shape[0], 16))
+        self.values[self.size:new_size] = rows
+        self.weights[self.size:new_size] = weights
+        self.size = new_size
+    
+    def _Reserve(self, capacity):
+        """
+        Makes room for more ballots. 
+        
+        Parameters
+        capacity : int
+            number of ballots there must be room for
+        """
+        values = np.zeros((capacity, len(self.candidates)))
+        values[:self.size] = self.values[:self.size]
+        self.values = values
+        grown = np.zeros(capacity)
+        grown[:self.size] = self.weights[:self.size]
+        self.weights = grown
+    
+    @contextlib.contextmanager
+    def Batch(self):
+        """
+        Groups the ballots stored inside a with statement, together with the 
+        rows recorded in sources, so that a store that keeps them on disk 
+        commits them all at once. 
+        
+        Returns
+        context manager
+            ends the batch on exit
+        """
+        yield self
+    
+    def Reweighted(self, weights, totals=None):
+        """
+        Makes a copy of the store that shares its ballots but gives them 
+        other weights, such as a bootstrap replicate of the ballots. No 
+        ballots should be added to the copy. 
+        
+        Parameters
+        weights : numpy.ndarray
+            the new weight of every stored ballot, which may be 0
+        totals : numpy.ndarray, default=None
+            the running total of every column under the new weights, 
+            computed from the ballots if not given
+        
+        Returns
+        BallotStore
+            the reweighted copy
+        """
+        store = copy.copy(self)
+        store.weights = np.asarray(weights, dtype=float)
+        store.integral_weights = np.array_equal(store.weights, 
+                                                np.round(store.weights))
+        if totals is None:
+            totals = self.WeightedTotals(store.weights)
+        store.totals = np.asarray(totals, dtype=float)
+        store.listeners = []
+        return store
+    
+    def Compact(self):
+        """
+        Collapses identical stored ballots into one ballot whose weight is 
+        the sum of theirs, and keeps doing so for ballots stored later. 
+        
+        Returns
+        int
+            number of distinct ballots stored
+        """
+        if not self.compact:
+            rows = self.Rows().copy()
+            weights = self.weights[:self.size].copy()
+            self.size = 0
+            self.compact = True
+            # the ballots are unchanged, only the way they are stored is
+            self.version += 1
+            self._Insert(rows, weights)
+        return self.size
+    
+    def Bytes(self):
+        """
+        Returns
+        int
+            number of bytes allocated to store the ballots and their weights
+        """
+        return self.values.nbytes+self.weights.nbytes
+    
+    def Arrays(self):
+        """
+        Returns
+        tuple
+            the arrays holding the stored ballots, which worker processes 
+            share and read with DenseRows: a read-only view of all stored 
+            ballots, one ballot per row
+        """
+        return (self.Rows(),)
+    
+    def Rows(self):
+        """
+        Returns
+        numpy.ndarray
+            a read-only view of all stored ballots, one ballot per row
+        """
+        rows = self.values[:self.size]
+        rows.flags.writeable = False
+        return rows
+    
+    def Weights(self):
+        """
+        Returns
+        numpy.ndarray
+            a read-only array of the weight of every stored ballot, of an 
+            integer type if all weights are integers
+        """
+        if self.integral_weights:
+            return self.weights[:self.size].astype(int)
+        weights = self.weights[:self.size]
+        weights.flags.writeable = False
+        return weights
+    
+    def Chunks(self, chunk_size=None, weighted=False):
+        """
+        Iterates over the stored ballots in fixed-size chunks. 
+        
+        Parameters
+        chunk_size : int, default=None
+            number of ballots in each chunk, the chunk_size of this store is 
+            used if unspecified
+        weighted : bool, default=False
+            whether to also return the weights of the ballots in each chunk
+        
+        Returns
+        generator
+            read-only 2D array views of at most chunk_size ballots each, or 
+            (ballots, weights) tuples if weighted is True
+        """
+        if chunk_size is None:
+            chunk_size = self.chunk_size
+        arrays = self.Arrays()
+        for start in range(0, self.size, chunk_size):
+            stop = min(start+chunk_size, self.size)
+            rows = self.DenseRows(arrays, start, stop, len(self.candidates))
+            if weighted:
+                yield rows, self._ChunkWeights(start, stop)
+            else:
+                yield rows
+    
+    def WeightedTotals(self, weights):
+        """
+        Adds up the stored ballots column by column under other weights, 
+        such as those of bootstrap replicates, one chunk at a time. 
+        
+        Parameters
+        weights : numpy.ndarray
+            a weight for every stored ballot, or a 2D array with one row of 
+            such weights per set of totals
+        
+        Returns
+        numpy.ndarray
+            the total of every column, with one row per row of weights if 
+            weights is 2D
+        """
+        weights = np.asarray(weights)
+        totals = np.zeros(weights.shape[:-1]+(len(self.candidates),))
+        arrays = self.Arrays()
+        for start in range(0, self.size, self.chunk_size):
+            stop = min(start+self.chunk_size, self.size)
+            totals += self.ChunkTotals(arrays, start, stop, 
+                                       len(self.candidates), 
+                                       weights[..., start:stop])
+        return totals
+    
+    def _ChunkWeights(self, start, stop):
+        # the weights are converted one chunk at a time, so that streaming 
+        # over the ballots takes bounded memory
+        weights = self.weights[start:stop]
+        if self.integral_weights:
+            return weights.astype(int)
+        weights = weights.view()
+        weights.flags.writeable = False
+        return weights
+    
+    @staticmethod
+    def DenseRows(arrays, start, stop, width):
+        """
+        Reads some stored ballots from the arrays holding them, as one row 
+        per ballot, which is how Chunks and worker processes read them. 
+        
+        Parameters
+        arrays : tuple
+            the arrays returned by Arrays
+        start : int
+            position of the first ballot
+        stop : int
+            position after the last ballot
+        width : int
+            number of candidates
+        
+        Returns
+        numpy.ndarray
+            a read-only 2D array with one ballot per row
+        """
+        return arrays[0][start:stop]
+    
+    @classmethod
+    def ChunkTotals(cls, arrays, start, stop, width, weights):
+        """
+        Adds up some stored ballots column by column under the given 
+        weights, which stores that encode their ballots can do without 
+        decoding them into rows. 
+        
+        Parameters
+        arrays : tuple
+            the arrays returned by Arrays
+        start : int
+            position of the first ballot
+        stop : int
+            position after the last ballot
+        width : int
+            number of candidates
+        weights : numpy.ndarray
+            the same as in WeightedTotals, for these ballots only
+        
+        Returns
+        numpy.ndarray
+            the same as WeightedTotals
+        """
+        return weights@cls.DenseRows(arrays, start, stop, width)
+
+def _Grow(array, size, capacity):
+    # copies the first size items of an array into a larger one
+    grown = np.zeros((capacity,)+array.shape[1:], dtype=array.dtype)
+    grown[:size] = array[:size]
+    return grown
@@ -0,0 +1,76 @@
+"""
+author: Yichen Zhang
+"""
+import numpy as np
+from BallotStore import BallotStore, _Grow
+
+class BitBallotStore(BallotStore):
+    """
+    Bit Ballot Store Class
+    Stores ballots that vote 0 or 1 for every candidate, such as approval 
+    ballots, as bitsets packed 8 candidates to a byte, which takes 64 times 
+    less memory than a row of 8-byte values. Tallies come from the running 
+    totals, and anything else that adds up the ballots unpacks them one 
+    chunk at a time, which numpy does faster than it adds up bit planes. 
+    """
+    
+    def __init__(self, candidates, ballot_view=None, chunk_size=65536):
+        """
+        Initializes an empty ballot store. 
+        
+        Parameters
+        candidates : list
+            an non-empty list of unique strings representing the candidates
+        ballot_view : callable, default=None
+            the same as in BallotStore
+        chunk_size : int, default=65536
+            the same as in BallotStore
+        """
+        super().__init__(candidates, ballot_view, chunk_size)
+        self.values = None
+        # bit j of row i is whether ballot i votes 1 for candidate j
+        self.bits = np.zeros((0, (len(self.candidates)+7)//8), dtype=np.uint8)
+    
+    def _Store(self, rows, weights):
+        new_size = self.size+rows.shape[0]
+        if new_size>len(self.weights):
+            # grow geometrically so that appending one ballot at a time is
+            # amortized constant time
+            self._Reserve(max(new_size, 2*len(self.weights), 16))
+        self.bits[self.size:new_size] = np.packbits(rows!=0, axis=1)
+        self.weights[self.size:new_size] = weights
+        self.size = new_size
+    
+    def _Reserve(self, capacity):
+        self.bits = _Grow(self.bits, self.size, capacity)
+        self.weights = _Grow(self.weights, self.size, capacity)
+    
+    def Bytes(self):
+        return self.bits.nbytes+self.weights.nbytes
+    
+    def Arrays(self):
+        """
+        Returns
+        tuple
+            a read-only view of the bitsets of all stored ballots, one 
+            ballot per row
+        """
+        bits = self.bits[:self.size]
+        bits.flags.writeable = False
+        return (bits,)
+    
+    def Rows(self):
+        """
+        Returns
+        numpy.ndarray
+            a read-only dense copy of all stored ballots, one ballot per row
+        """
+        return self.DenseRows(self.Arrays(), 0, self.size, 
+                              len(self.candidates))
+    
+    @staticmethod
+    def DenseRows(arrays, start, stop, width):
+        rows = np.unpackbits(arrays[0][start:stop], axis=1, 
+                             count=width).astype(float)
+        rows.flags.writeable = False
+        return rows
@@ -0,0 +1,86 @@
+"""
+author: Yichen Zhang
+"""
+import numpy as np
+from BallotStore import BallotStore, _Grow
+
+class ChoiceBallotStore(BallotStore):
+    """
+    Choice Ballot Store Class
+    Stores ballots that each vote 1 for exactly one candidate and 0 for 
+    everyone else, such as plurality ballots, as the column id of that 
+    candidate alone, which takes 4 bytes per ballot instead of 8 bytes per 
+    candidate. 
+    """
+    
+    def __init__(self, candidates, ballot_view=None, chunk_size=65536):
+        """
+        Initializes an empty ballot store. 
+        
+        Parameters
+        candidates : list
+            an non-empty list of unique strings representing the candidates
+        ballot_view : callable, default=None
+            the same as in BallotStore
+        chunk_size : int, default=65536
+            the same as in BallotStore
+        """
+        super().__init__(candidates, ballot_view, chunk_size)
+        self.values = None
+        # the column id of the candidate every ballot votes for
+        self.choices = np.zeros(0, dtype=np.int32)
+    
+    def _Store(self, rows, weights):
+        new_size = self.size+rows.shape[0]
+        if new_size>len(self.weights):
+            # grow geometrically so that appending one ballot at a time is
+            # amortized constant time
+            self._Reserve(max(new_size, 2*len(self.weights), 16))
+        self.choices[self.size:new_size] = rows.argmax(axis=1)
+        self.weights[self.size:new_size] = weights
+        self.size = new_size
+    
+    def _Reserve(self, capacity):
+        self.choices = _Grow(self.choices, self.size, capacity)
+        self.weights = _Grow(self.weights, self.size, capacity)
+    
+    def Bytes(self):
+        return self.choices.nbytes+self.weights.nbytes
+    
+    def Arrays(self):
+        """
+        Returns
+        tuple
+            a read-only view of the column id voted for by every stored 
+            ballot
+        """
+        choices = self.choices[:self.size]
+        choices.flags.writeable = False
+        return (choices,)
+    
+    def Rows(self):
+        """
+        Returns
+        numpy.ndarray
+            a read-only dense copy of all stored ballots, one ballot per row
+        """
+        return self.DenseRows(self.Arrays(), 0, self.size, 
+                              len(self.candidates))
+    
+    @staticmethod
+    def DenseRows(arrays, start, stop, width):
+        rows = np.zeros((stop-start, width))
+        rows[np.arange(stop-start), arrays[0][start:stop]] = 1
+        rows.flags.writeable = False
+        return rows
+    
+    @staticmethod
+    def ChunkTotals(arrays, start, stop, width, weights):
+        # every ballot adds its weight to the candidate it votes for alone
+        choices = arrays[0][start:stop]
+        if weights.ndim==1:
+            return np.bincount(choices, weights, width)
+        totals = np.zeros((len(weights), width))
+        for i in range(len(weights)):
+            totals[i] = np.bincount(choices, weights[i], width)
+        return totals
@@ -0,0 +1,126 @@
+"""
+author: Yichen Zhang
+"""
+from collections import OrderedDict
+import threading
+
+class ElectionCache:
+    """
+    Election Cache Class
+    Remembers the results of RunElection for the subsets of candidates it
+    has been run on, so that the many sub-elections repeated by the brackets
+    of RunElection and the rounds of RunMultiWinnerElection are only run
+    once. The results are only valid for the ballots they were computed
+    from, so the whole cache is dropped as soon as the ballots change. When
+    the cache grows past its memory cap, the least recently used results are
+    evicted first. It can be used by several threads at once. 
+    """
+    
+    # rough number of bytes taken by a (candidate, rank, log) tuple and by
+    # each round in a log
+    RESULT_BYTES = 200
+    ROUND_BYTES = 120
+    
+    def __init__(self, max_bytes=64*2**20):
+        """
+        Initializes an empty cache. 
+        
+        Parameters
+        max_bytes : int, default=64*2**20
+            approximate memory cap of the cached results in bytes
+            if set to 0, nothing is cached
+        """
+        self.max_bytes = max_bytes
+        self.results = OrderedDict()
+        self.nbytes = 0
+        self.version = None
+        self.lock = threading.RLock()
+    
+    def __getstate__(self):
+        # a lock cannot be pickled, a new one is made when unpickled
+        state = self.__dict__.copy()
+        del state["lock"]
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.RLock()
+    
+    def __len__(self):
+        return len(self.results)
+    
+    def Clear(self):
+        """
+        Drops all cached results. 
+        """
+        with self.lock:
+            self.results.clear()
+            self.nbytes = 0
+    
+    def Get(self, candidates, version, ordered=False):
+        """
+        Looks up the result of an election. 
+        
+        Parameters
+        candidates : list
+            a list of unique strings representing the candidates
+        version : hashable
+            identifies the ballots the election is run on, all cached results
+            are dropped if it differs from the one they were computed from
+        ordered : bool, default=False
+            if False, a result cached for the same candidates in another
+            order is reused, with its candidates sorted by rank and then by
+            their position in candidates
+            if True, only a result cached for the same order is reused
+        
+        Returns
+        list
+            the cached result in RunElection's return format, or None if
+            there is none
+        """
+        with self.lock:
+            if version!=self.version:
+                self.Clear()
+                self.version = version
+            key = tuple(candidates) if ordered else frozenset(candidates)
+            if key not in self.results:
+                return None
+            self.results.move_to_end(key)
+            result, size = self.results[key]
+        if not ordered:
+            position = {c: i for i, c in enumerate(candidates)}
+            result = sorted(result, key=lambda x: (x[1], position[x[0]]))
+        # copy the logs so that the caller cannot alter the cached result
+        return [(c, r, list(l)) for (c, r, l) in result]
+    
+    def Put(self, candidates, version, result, ordered=False):
+        """
+        Caches the result of an election, evicting the least recently used
+        results if the memory cap is exceeded. 
+        
+        Parameters
+        candidates : list
+            a list of unique strings representing the candidates
+        version : hashable
+            identifies the ballots the election was run on
+        result : list
+            the result in RunElection's return format
+        ordered : bool, default=False
+            the same as in Get
+        """
+        key = tuple(candidates) if ordered else frozenset(candidates)
+        size = sum(self.RESULT_BYTES+self.ROUND_BYTES*len(l)
+                   for (c, r, l) in result)
+        if size>self.max_bytes:
+            return
+        result = [(c, r, list(l)) for (c, r, l) in result]
+        with self.lock:
+            if version!=self.version:
+                self.Clear()
+                self.version = version
+            if key in self.results:
+                self.nbytes -= self.results.pop(key)[1]
+            self.results[key] = (result, size)
+            self.nbytes += size
+            while self.nbytes>self.max_bytes:
+                self.nbytes -= self.results.popitem(last=False)[1][1]
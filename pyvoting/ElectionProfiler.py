@@ -0,0 +1,195 @@
+"""
+author: Yichen Zhang
+"""
+import time
+import threading
+
+class ElectionProfiler:
+    """
+    Election Profiler Class
+    Records where an election spends its time while it is profiled with
+    Voting.Profile: the wall time of each phase (validating ballots, storing
+    them, tallying, voting, counting pairwise preferences, sorting, and
+    waiting for worker processes, which are not profiled themselves), the
+    number of rounds and of ballots touched in each round, the deepest
+    recursion, and the peak memory taken by the stored ballots. The time of
+    a phase does not include the time of the phases nested in it, so the
+    phases add up to the time profiled. Every measurement is also passed on
+    as it is made to the hooks, so that it can be forwarded to a metrics
+    pipeline. It can be used by several threads at once. 
+    """
+    
+    PHASES = ["validation", "storage", "tally", "vote", "preferences",
+              "sort", "waiting"]
+    
+    def __init__(self, hooks=None):
+        """
+        Initializes an empty profile. 
+        
+        Parameters
+        hooks : list, default=None
+            functions called as hook(kind, name, value) for every measurement,
+            where kind is "timer" for seconds spent in a phase, "counter" for
+            a count to be added up, or "gauge" for a peak value
+        """
+        self.hooks = list(hooks) if hooks is not None else []
+        self.lock = threading.Lock()
+        # the phases being timed and the depth of recursion of each thread
+        self.local = threading.local()
+        # a function returning the bytes taken by the stored ballots
+        self.storage = None
+        self.Reset()
+    
+    def Reset(self):
+        """
+        Drops all measurements. 
+        """
+        with self.lock:
+            self.seconds = {phase: 0.0 for phase in self.PHASES}
+            self.calls = {phase: 0 for phase in self.PHASES}
+            self.ballots_touched = []
+            self.max_depth = 0
+            self.peak_storage_bytes = 0
+    
+    def _Emit(self, kind, name, value):
+        for hook in self.hooks:
+            hook(kind, name, value)
+    
+    def Phase(self, name):
+        """
+        Times a phase in a with statement. 
+        
+        Parameters
+        name : str
+            name of the phase
+        
+        Returns
+        context manager
+            ends the phase when the with statement exits
+        """
+        return _Phase(self, name)
+    
+    def _Enter(self, name):
+        stack = self.local.__dict__.setdefault("stack", [])
+        # name, start and time spent in nested phases
+        stack.append([name, time.perf_counter(), 0.0])
+    
+    def _Exit(self):
+        name, start, nested = self.local.stack.pop()
+        elapsed = time.perf_counter()-start
+        if self.local.stack:
+            self.local.stack[-1][2] += elapsed
+        seconds = elapsed-nested
+        with self.lock:
+            self.seconds[name] = self.seconds.get(name, 0.0)+seconds
+            self.calls[name] = self.calls.get(name, 0)+1
+        self._Emit("timer", "phase."+name, seconds)
+        if self.storage is not None:
+            self.Storage(self.storage())
+    
+    def Touch(self, ballots):
+        """
+        Records ballots touched in the current round. 
+        
+        Parameters
+        ballots : int
+            number of ballots touched
+        """
+        self.local.touched = getattr(self.local, "touched", 0)+int(ballots)
+    
+    def Round(self, count=1):
+        """
+        Ends rounds of an election, the first of which touched the ballots
+        recorded by Touch since the last round ended. 
+        
+        Parameters
+        count : int, default=1
+            number of rounds
+        """
+        touched = getattr(self.local, "touched", 0)
+        self.local.touched = 0
+        with self.lock:
+            self.ballots_touched.extend([touched]+[0]*(count-1))
+        self._Emit("counter", "rounds", count)
+        self._Emit("counter", "ballots_touched", touched)
+    
+    def Depth(self):
+        """
+        Counts a level of recursion in a with statement. 
+        
+        Returns
+        context manager
+            leaves the level when the with statement exits
+        """
+        return _Depth(self)
+    
+    def Storage(self, nbytes):
+        """
+        Records the memory taken by the stored ballots. 
+        
+        Parameters
+        nbytes : int
+            number of bytes taken by the stored ballots
+        """
+        if nbytes>self.peak_storage_bytes:
+            with self.lock:
+                self.peak_storage_bytes = max(self.peak_storage_bytes,
+                                              nbytes)
+            self._Emit("gauge", "storage.peak_bytes", nbytes)
+    
+    def Report(self):
+        """
+        Sums up the measurements. 
+        
+        Returns
+        dict
+            a flat mapping of metric names to numbers: "phase.<name>.seconds"
+            and "phase.<name>.calls" for every phase, "rounds",
+            "ballots_touched.total", "ballots_touched.max",
+            "recursion_depth.max" and "storage.peak_bytes"
+        """
+        with self.lock:
+            report = {}
+            for phase in self.seconds:
+                report[f"phase.{phase}.seconds"] = self.seconds[phase]
+                report[f"phase.{phase}.calls"] = self.calls[phase]
+            report["rounds"] = len(self.ballots_touched)
+            report["ballots_touched.total"] = sum(self.ballots_touched)
+            report["ballots_touched.max"] = max(self.ballots_touched,
+                                                default=0)
+            report["recursion_depth.max"] = self.max_depth
+            report["storage.peak_bytes"] = self.peak_storage_bytes
+        return report
+
+class _Phase:
+    # ends a phase of a profiler on exit
+    
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+    
+    def __enter__(self):
+        self.profiler._Enter(self.name)
+    
+    def __exit__(self, *exc):
+        self.profiler._Exit()
+        return False
+
+class _Depth:
+    # leaves a level of recursion of a profiler on exit
+    
+    def __init__(self, profiler):
+        self.profiler = profiler
+    
+    def __enter__(self):
+        local = self.profiler.local
+        local.depth = getattr(local, "depth", 0)+1
+        if local.depth>self.profiler.max_depth:
+            with self.profiler.lock:
+                self.profiler.max_depth = max(self.profiler.max_depth,
+                                              local.depth)
+            self.profiler._Emit("gauge", "recursion_depth.max", local.depth)
+    
+    def __exit__(self, *exc):
+        self.profiler.local.depth -= 1
+        return False
@@ -0,0 +1,220 @@
+"""
+author: Yichen Zhang
+"""
+import asyncio
+import pandas as pd
+
+class LiveElection:
+    """
+    Live Election Class
+    Runs an election while its ballots are still coming in. Any number of
+    asynchronous producers hand over ballots, which are queued and added in
+    batches on a fixed cadence, after which the updated result is published
+    to every subscriber. Only the ballots that came in since the last
+    publish are validated and added, in the order they came in, the running 
+    totals and pairwise counts of the election are updated with them 
+    instead of counted again, and the election is not run again at all if 
+    its ballots did not change. 
+    """
+    
+    def __init__(self, election, interval=1.0, candidates=None,
+                 max_pending=0):
+        """
+        Wraps an election to run live. 
+        
+        Parameters
+        election : Voting
+            the election to run, which may already have ballots
+        interval : float, default=1.0
+            number of seconds between two publishes
+        candidates : list, default=None
+            a list of unique strings representing the candidates
+            if None, all candidates specified in the election's constructor
+            will be included
+        max_pending : int, default=0
+            number of queued ballots beyond which AddBallot waits for the
+            next publish
+            if set to 0, there is no limit on it
+        """
+        self.election = election
+        self.interval = interval
+        self.candidates = candidates
+        self.pending = asyncio.Queue(max_pending)
+        self.subscribers = []
+        # the latest published result, and the ballots it was run on
+        self.result = None
+        self.version = None
+        # number of ballots added and rejected so far
+        self.accepted = 0
+        self.rejected = 0
+        self.lock = asyncio.Lock()
+        self.closing = asyncio.Event()
+        self.closed = False
+    
+    async def AddBallot(self, new_ballot, weight=1):
+        """
+        Queues a ballot to be added at the next publish. It waits only if
+        max_pending ballots are queued already. 
+        
+        Parameters
+        new_ballot : object
+            a ballot in any form accepted by the election's AddBallot
+        weight : float, default=1
+            number of voters casting this ballot, must be positive
+        """
+        await self.pending.put((new_ballot, weight))
+    
+    async def Publish(self):
+        """
+        Adds the ballots queued since the last publish and publishes the
+        updated result, unless the ballots of the election did not change. 
+        
+        Returns
+        list
+            the latest result in RunElection's return format
+        """
+        async with self.lock:
+            ballots = []
+            while not self.pending.empty():
+                ballots.append(self.pending.get_nowait())
+            # validating and running the election take a while, so they run
+            # in another thread to keep producers and subscribers going
+            accepted = await asyncio.to_thread(self._AddBatch, ballots)
+            self.accepted += accepted
+            self.rejected += len(ballots)-accepted
+            # the same ballots as the election's result cache identifies 
+            # them give the same result, whoever added them
+            version = (id(self.election.ballots), 
+                       self.election.ballots.version)
+            if version!=self.version:
+                self.result = await asyncio.to_thread(
+                    self.election.RunElection, self.candidates)
+                self.version = version
+                self._Notify(self.result)
+            return self.result
+    
+    def _AddBatch(self, ballots):
+        """
+        Adds queued ballots to the election. 
+        
+        Parameters
+        ballots : list
+            a list of (ballot, weight) tuples
+        
+        Returns
+        int
+            number of valid ballots added
+        """
+        accepted = 0
+        rows, weights = [], []
+        for ballot, weight in ballots:
+            # ballots given as Series with a value for every candidate are 
+            # validated all at once, other ballots one by one, as a 
+            # candidate missing from a ballot is not the same as a missing 
+            # value in a batch of ballots
+            if (isinstance(ballot, pd.Series) and 
+                    not ballot.isna().any() and 
+                    set(self.election.candidates)<=set(ballot.index)):
+                rows.append(ballot)
+                weights.append(weight)
+                continue
+            # the ballots batched so far go first, so that ballots are stored 
+            # in the order they came in
+            accepted += self._AddRows(rows, weights)
+            rows, weights = [], []
+            if self.election.AddBallot(ballot, weight):
+                accepted += 1
+        return accepted+self._AddRows(rows, weights)
+    
+    def _AddRows(self, rows, weights):
+        """
+        Adds a batch of ballots with a value for every candidate to the 
+        election. 
+        
+        Parameters
+        rows : list
+            a list of pandas.Series
+        weights : list
+            weight of each ballot
+        
+        Returns
+        int
+            number of valid ballots added
+        """
+        if len(rows)==0:
+            return 0
+        valid, reasons = self.election.AddBallots(
+            pd.DataFrame(rows).reset_index(drop=True), weights)
+        return int(valid.sum())
+    
+    def _Notify(self, result):
+        """
+        Hands a result to every subscriber, replacing any result it has not
+        taken yet. 
+        
+        Parameters
+        result : list
+            a result in RunElection's return format, or None to end the
+            subscriptions after the results they have not taken yet
+        """
+        for queue in self.subscribers:
+            if result is not None:
+                while not queue.empty():
+                    queue.get_nowait()
+            queue.put_nowait(result)
+    
+    async def Subscribe(self):
+        """
+        Follows the published results. A subscriber that is slower than the
+        publishes skips to the latest result. 
+        
+        Returns
+        async generator
+            yields the latest result in RunElection's return format, first
+            the current one if any, then every newly published one until the
+            live election is closed
+        """
+        if self.closed:
+            if self.result is not None:
+                yield self.result
+            return
+        queue = asyncio.Queue()
+        if self.result is not None:
+            queue.put_nowait(self.result)
+        self.subscribers.append(queue)
+        try:
+            while True:
+                result = await queue.get()
+                if result is None:
+                    return
+                yield result
+        finally:
+            if queue in self.subscribers:
+                self.subscribers.remove(queue)
+    
+    async def Run(self):
+        """
+        Publishes every interval seconds until Close is called, then adds
+        the remaining ballots, publishes the final result, and ends every
+        subscription. 
+        
+        Returns
+        list
+            the final result in RunElection's return format
+        """
+        while not self.closing.is_set():
+            try:
+                await asyncio.wait_for(self.closing.wait(), self.interval)
+            except asyncio.TimeoutError:
+                await self.Publish()
+        # add the ballots queued until Close was called
+        await self.Publish()
+        self.closed = True
+        self._Notify(None)
+        return self.result
+    
+    def Close(self):
+        """
+        Asks Run to publish the final result and stop. 
+        """
+        self.closing.set()
@@ -0,0 +1,194 @@
+"""
+author: Yichen Zhang
+"""
+import os
+import json
+import contextlib
+import numpy as np
+from BallotStore import BallotStore
+
+class MemmapBallotStore(BallotStore):
+    """
+    Memory-Mapped Ballot Store Class
+    Stores the valid ballots of an election on disk instead of in memory,
+    so that elections with more ballots than fit in memory can run: the
+    ballots and their weights are kept as raw binary rows in memory-mapped
+    files in a folder, and streamed over chunk by chunk. A small metadata
+    file records how many ballots are stored, the running total of every
+    column, and how many rows of each imported file were read. It is
+    rewritten atomically after the ballots are written, so the store can be
+    reopened at once without validating the ballots again, and an import
+    that was interrupted can resume from the last batch it stored. 
+    Compact mode keeps every distinct ballot in memory, so it is not
+    available. 
+    """
+    
+    VALUES_FILE = "ballots.bin"
+    WEIGHTS_FILE = "weights.bin"
+    META_FILE = "meta.json"
+    
+    def __init__(self, candidates, path, ballot_view=None, chunk_size=65536,
+                 kind=None):
+        """
+        Opens the store in a folder, or creates it if there is none. 
+        
+        Parameters
+        candidates : list
+            an non-empty list of unique strings representing the candidates
+        path : str
+            the folder holding the store, created if it does not exist
+        ballot_view : callable, default=None
+            the same as in BallotStore
+        chunk_size : int, default=65536
+            the same as in BallotStore
+        kind : str, default=None
+            identifies how the ballots were validated, such as the name of
+            the voting system, so that a store is not reopened by another
+            one
+        """
+        super().__init__(candidates, ballot_view, chunk_size)
+        self.path = str(path)
+        self.kind = kind
+        # while a batch is open, the metadata file is only rewritten when it
+        # ends
+        self.batching = False
+        os.makedirs(self.path, exist_ok=True)
+        meta = self._File(self.META_FILE)
+        if os.path.exists(meta):
+            with open(meta) as file:
+                state = json.load(file)
+            if state["candidates"]!=self.candidates:
+                raise ValueError(f"the ballot store in {self.path} has "
+                                 "different candidates")
+            if kind is not None and state["kind"]!=kind:
+                raise ValueError(f"the ballot store in {self.path} holds "
+                                 f"ballots of {state['kind']}")
+            self.kind = state["kind"]
+            self.size = state["size"]
+            self.totals = np.array(state["totals"], dtype=float)
+            self.integral_weights = state["integral_weights"]
+            self.version = state["version"]
+            self.sources = state["sources"]
+            # rows past size were written by a batch that never committed
+            self._Map(self._Capacity())
+        else:
+            self._Commit()
+    
+    def __getstate__(self):
+        # the mapped files are opened again rather than copied when the
+        # store is unpickled
+        state = self.__dict__.copy()
+        del state["values"]
+        del state["weights"]
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.values = np.zeros((0, len(self.candidates)))
+        self.weights = np.zeros(0)
+        self._Map(self._Capacity(), "r")
+    
+    def _File(self, name):
+        return os.path.join(self.path, name)
+    
+    def _Capacity(self):
+        # number of ballots the files have room for
+        weights = self._File(self.WEIGHTS_FILE)
+        if not os.path.exists(weights):
+            return 0
+        return os.path.getsize(weights)//8
+    
+    def _Map(self, capacity, mode="r+"):
+        """
+        Maps the files of the store, growing them to a given capacity. 
+        
+        Parameters
+        capacity : int
+            number of ballots the files must have room for
+        mode : str, default="r+"
+            "r+" to map the files for writing, "r" for reading only
+        """
+        if capacity==0:
+            # an empty file cannot be mapped
+            return
+        for name, shape in ((self.VALUES_FILE,
+                             (capacity, len(self.candidates))),
+                            (self.WEIGHTS_FILE, (capacity,))):
+            filename = self._File(name)
+            nbytes = 8*int(np.prod(shape))
+            if mode=="r+":
+                # growing a file this way writes nothing to the new space
+                with open(filename, "ab") as file:
+                    if file.tell()<nbytes:
+                        file.truncate(nbytes)
+            array = np.memmap(filename, dtype=float, mode=mode, shape=shape)
+            if name==self.VALUES_FILE:
+                self.values = array
+            else:
+                self.weights = array
+    
+    def _Reserve(self, capacity):
+        for array in (self.values, self.weights):
+            if isinstance(array, np.memmap):
+                array.flush()
+        self._Map(capacity)
+    
+    def Extend(self, rows, weights=None):
+        super().Extend(rows, weights)
+        if not self.batching:
+            self._Commit()
+    
+    def _Commit(self):
+        """
+        Makes the stored ballots durable: the mapped files are flushed
+        first, then the metadata file is replaced in one step, so that it
+        never counts ballots that are not on disk. 
+        """
+        for array in (self.values, self.weights):
+            if isinstance(array, np.memmap):
+                array.flush()
+        state = {"candidates": self.candidates, "kind": self.kind,
+                 "size": self.size, "totals": self.totals.tolist(),
+                 "integral_weights": bool(self.integral_weights),
+                 "version": self.version, "sources": self.sources}
+        meta = self._File(self.META_FILE)
+        with open(meta+".tmp", "w") as file:
+            json.dump(state, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(meta+".tmp", meta)
+    
+    @contextlib.contextmanager
+    def Batch(self):
+        # if the batch fails, forget the ballots it stored, as they are not
+        # committed
+        state = (self.size, self.totals.copy(), self.integral_weights,
+                 dict(self.sources))
+        # a batch inside another batch is committed with the outer one
+        outer, self.batching = self.batching, True
+        try:
+            yield self
+        except BaseException:
+            if self.size>state[0]:
+                # the listeners have counted the ballots already, so they 
+                # are given them again with negative weights to take them 
+                # back out
+                rows = self.Rows()[state[0]:]
+                weights = -self.weights[state[0]:self.size]
+                for listener in self.listeners:
+                    listener(rows, weights)
+            (self.size, self.totals, self.integral_weights, 
+             self.sources) = state
+            # going back to the ballots before the batch is a change too, so 
+            # results cached during the batch are not taken for theirs
+            self.version += 1
+            raise
+        finally:
+            self.batching = outer
+        if not outer:
+            self._Commit()
+    
+    def Compact(self):
+        raise ValueError("compact mode keeps every distinct ballot in "
+                         "memory, so it is not available for a ballot store "
+                         "on disk")
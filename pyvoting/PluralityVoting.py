@@ -3,7 +3,8 @@ author: Yichen Zhang
 """
 import pandas as pd
 import numpy as np
-from Voting import Voting
+from Voting import Voting, _IsArrow, _ValidWeights, _SplitVoters
+from ChoiceBallotStore import ChoiceBallotStore
 
 class PluralityVoting(Voting):
     
@@ -31,8 +32,9 @@ class PluralityVoting(Voting):
         
         def Vote(self, candidates):
             # vote 1 for one candidate and 0 for everyone else
-            return pd.Series([1 if c==self.scores.idxmax() else 0 
-                              for c in candidates], index = candidates)
+            choice = self.scores.idxmax()
+            return pd.Series([1 if c==choice else 0 for c in candidates], 
+                             index = candidates)
         
         def Export(self, candidates, simple=False):
             # if simple is set to True, will use sparse representation and
@@ -44,8 +46,11 @@ class PluralityVoting(Voting):
     
     def __init__(self, candidates, try_handle_invalid=True):
         super().__init__(candidates, try_handle_invalid)
+        # every ballot votes for one candidate, so only its id is stored
+        self.ballots = ChoiceBallotStore(candidates, self.BallotView)
+        self.ballots.listeners.append(self._CountPreferences)
     
-    def AddBallot(self, new_ballot):
+    def AddBallot(self, new_ballot, weight=1):
         # support both a string or a Series to represent a vote
         if type(new_ballot)==str:
             ballot = self.PluralityBallot(
@@ -70,33 +75,175 @@ class PluralityVoting(Voting):
                     new_ballot[c] = default_score
             ballot = self.PluralityBallot(new_ballot)
         try:
-            if ballot.isValid(self.try_handle_invalid):
-                self.ballots.append(ballot)
+            # the ballot must be cast by a positive number of voters
+            if not _ValidWeights(weight):
+                return False
+            with self._Phase("validation"):
+                valid = ballot.isValid(self.try_handle_invalid)
+            if valid:
+                self.ballots.Append(ballot.scores, weight)
                 return True
             return False
         except:
             return False
     
-    def ImportBallots(self, filename):
-        return super().ImportBallots(filename)
+    def AddBallots(self, new_ballots, weights=None):
+        new_ballots, weights = self._SplitWeights(new_ballots, weights)
+        # support the simple format as well: a single column of strings 
+        # representing the candidate to vote for
+        choice = None
+        if _IsArrow(new_ballots) and new_ballots.num_columns==1:
+            import pyarrow as pa
+            import pyarrow.compute as pc
+            column = new_ballots.column(0)
+            if (pa.types.is_string(column.type) or 
+                pa.types.is_large_string(column.type)):
+                # look the strings up in Arrow without creating python 
+                # objects for them
+                choice = pc.fill_null(pc.index_in(
+                    column, value_set=pa.array(self.candidates)), -1
+                    ).to_numpy()
+                index = pd.RangeIndex(len(choice))
+        elif (isinstance(new_ballots, pd.DataFrame) and 
+              new_ballots.shape[1]==1 and 
+              not pd.api.types.is_numeric_dtype(new_ballots.iloc[:, 0])):
+            choice = pd.Categorical(new_ballots.iloc[:, 0], 
+                                    categories=self.candidates).codes
+            index = new_ballots.index
+        if choice is not None:
+            ballots = np.zeros((len(choice), len(self.candidates)))
+            ballots[np.flatnonzero(choice>=0), choice[choice>=0]] = 1
+            new_ballots = pd.DataFrame(ballots, index=index, 
+                                       columns=self.candidates)
+        return super().AddBallots(new_ballots, weights)
+    
+    def ValidateBallots(self, ballots, present):
+        reasons = np.full(len(ballots), "", dtype=object)
+        if self.try_handle_invalid:
+            # fill missing values with 0
+            ballots[np.isnan(ballots)] = 0
+        missing = np.isnan(ballots).any(axis=1)
+        # interpret the largest score as the one to vote, if specified to
+        if self.try_handle_invalid:
+            ballots = (ballots==ballots.max(axis=1, keepdims=True)).astype(
+                float)
+        # check whether each ballot votes for exactly one candidate
+        reasons[((ballots==1).sum(axis=1)!=1) | 
+                ((ballots==0).sum(axis=1)!=ballots.shape[1]-1)
+                ] = "not_single_vote"
+        reasons[missing] = "missing"
+        return ballots, reasons
+    
+    def ImportBallots(self, filename, chunk_size=None, progress=None, 
+                      weight_column=None, resume=False):
+        return super().ImportBallots(filename, chunk_size, progress, 
+                                     weight_column, resume)
+    
+    def OpenBallotStore(self, path):
+        return super().OpenBallotStore(path)
+    
+    def SparseBallots(self):
+        return super().SparseBallots()
         
-    def ExportBallots(self, filename, simple=False):
+    def ExportBallots(self, filename, simple=False, chunk_size=None, 
+                      weight_column=None):
         # if simple is set to True, will use sparse representation and
         # only record which candidate to vote for
         if simple:
-            df = pd.DataFrame(columns=["candidate"])
-            for b in self.ballots:
-                df.loc[len(df)] = b.Export(self.candidates, True)
-            df.to_excel(filename)
-            return df.shape[0]
+            return self._WriteBallots(
+                self._SimpleExportChunks(chunk_size, weight_column), 
+                filename, chunk_size)
         else:
-            return super().ExportBallots(filename)
+            return super().ExportBallots(filename, chunk_size, weight_column)
+    
+    def _SimpleExportChunks(self, chunk_size, weight_column=None):
+        # the candidate voted for is the column holding the 1 of each row
+        candidates = np.array(self.candidates, dtype=object)
+        start = 0
+        for rows, weights in self._ExportRows(chunk_size, weight_column):
+            df = pd.DataFrame({"candidate": candidates[rows.argmax(axis=1)]}, 
+                              index=pd.RangeIndex(start, start+len(rows)))
+            if weight_column is not None:
+                df[weight_column] = weights
+            yield df
+            start += len(rows)
+        if start==0:
+            df = pd.DataFrame(columns=["candidate"], dtype=object)
+            if weight_column is not None:
+                df[weight_column] = np.zeros(0, dtype=int)
+            yield df
+    
+    def BallotView(self, values):
+        return self.PluralityBallot(pd.Series(values, index=self.candidates))
+    
+    def VoteMatrix(self, ballots, columns):
+        # vote 1 for one candidate and 0 for everyone else
+        return ballots[:, columns].astype(int)
+    
+    def PreferenceScores(self, ballots):
+        return super().PreferenceScores(ballots)
     
-    def RunElection(self, candidates=None):
-        return super().RunElection(candidates)
+    def CloneBallots(self, ballots, weights, column, copies, rng):
+        ballots, weights = super().CloneBallots(ballots, weights, column, 
+                                                copies, rng)
+        # a ballot votes for only one candidate, so the voters of a candidate
+        # pick one of it and its duplicates by coin toss, splitting its votes
+        group = np.append(column, np.arange(ballots.shape[1]-copies, 
+                                            ballots.shape[1]))
+        voted = ballots[:, column]==1
+        shares = _SplitVoters(weights[voted], copies+1, rng).reshape(-1)
+        split = np.repeat(ballots[voted], copies+1, axis=0)
+        split[:, group] = 0
+        split[np.arange(len(split)), np.tile(group, voted.sum())] = 1
+        return (np.vstack([ballots[~voted], split[shares>0]]), 
+                np.concatenate([weights[~voted], shares[shares>0]]))
+    
+    def Tally(self, candidates):
+        # a ballot votes the same for a candidate whoever else is running, 
+        # so the tally is read off the running totals of the ballot store
+        totals = self.ballots.totals[self.ballots.Columns(candidates)]
+        if self.ballots.integral_weights:
+            totals = totals.astype(int)
+        return pd.Series(totals, index=candidates)
+    
+    def RunElection(self, candidates=None, workers=None):
+        if candidates==None:
+            candidates=self.candidates
+        # the scores never change from round to round, so the result 
+        # follows from a single sort unless the brackets are split otherwise
+        if type(self).SplitSize is not PluralityVoting.SplitSize:
+            return super().RunElection(candidates, workers)
+        # the tally is read off the running totals without going through the
+        # ballots, so there is nothing for workers to do
+        with self._Phase("tally"):
+            scores = self.Tally(candidates)
+        return self._RankByScores(candidates, scores)
+    
+    def _RanksByTotals(self):
+        return type(self).SplitSize is PluralityVoting.SplitSize
     
     def SplitSize(self, num_candidates):
         return super().SplitSize(num_candidates)
     
-    def RunMultiWinnerElection(self, candidates=None):
-        return super().RunElection(candidates)
\ No newline at end of file
+    def RunMultiWinnerElection(self, candidates=None, workers=None):
+        return super().RunMultiWinnerElection(candidates, workers)
+    
+    def Bootstrap(self, replicates=1000, candidates=None, seed=None, 
+                  workers=None):
+        return super().Bootstrap(replicates, candidates, seed, workers)
+    
+    def SpoilerTest(self, clones=None, copies=1, candidates=None, seed=None, 
+                    workers=None):
+        return super().SpoilerTest(clones, copies, candidates, seed, workers)
+    
+    def PairwiseMatrix(self, candidates=None):
+        return super().PairwiseMatrix(candidates)
+    
+    def CondorcetWinner(self, candidates=None):
+        return super().CondorcetWinner(candidates)
+    
+    def CondorcetLoser(self, candidates=None):
+        return super().CondorcetLoser(candidates)
+    
+    def Profile(self, profiler=None):
+        return super().Profile(profiler)
@@ -3,7 +3,9 @@ author: Yichen Zhang
 """
 import pandas as pd
 import numpy as np
-from Voting import Voting
+from Voting import (Voting, _IsArrow, _ValidWeights, _Ranks, _ValidRanks, 
+                    _SplitVoters, _TieScores)
+from SparseBallotStore import SparseBallotStore
 
 class RankedChoiceVoting(Voting):
     
@@ -32,19 +34,21 @@ class RankedChoiceVoting(Voting):
                 self.scores = self.scores.max()+self.scores.min()-self.scores
             # converts scores to ranks, smaller rank is always preferred
             if try_handle_invalid:
-                self.rank = pd.Series([(self.scores<self.scores[c]).sum()+1 
-                                       for c in self.scores.index],
+                rank, sorted_rank = _Ranks(
+                    self.scores.to_numpy(dtype=float)[np.newaxis], 
+                    bottom=allowed_rank+1)
+                self.rank = pd.Series(rank[0].astype(int), 
                                       index=self.scores.index)
-                self.rank.loc[self.rank>allowed_rank] = allowed_rank+1
             else:
                 self.rank = self.scores
-            # only ties at the lowest rank is allowed (ignored ranks)
-            bottom_rank = self.rank.max()
-            # check whether the ballot satisfy the constraints
-            for i in range(1, bottom_rank):
-                if self.rank.value_counts()[i] != 1:
+                # ranks given as they are must be integers
+                if not np.issubdtype(self.rank.dtype, np.integer):
                     return False
-            return (self.rank>=1).all() and bottom_rank <= allowed_rank+1
+                sorted_rank = np.sort(self.rank.to_numpy(dtype=float)
+                                      )[np.newaxis]
+            # only ties at the lowest rank is allowed (ignored ranks)
+            return bool(_ValidRanks(sorted_rank)[0] and 
+                        sorted_rank[0, -1]<=allowed_rank+1)
         
         def Vote(self, candidates):
             # if all candidates tied for the last place, vote 0 for everyone
@@ -73,7 +77,7 @@ class RankedChoiceVoting(Voting):
             allowed_rank = len(candidates)
         self.allowed_rank = allowed_rank
     
-    def AddBallot(self, new_ballot):
+    def AddBallot(self, new_ballot, weight=1):
         # support a string, a list of strings, or a Series to represent a vote
         if type(new_ballot)==str:
             new_ballot = pd.Series({new_ballot:1})
@@ -96,24 +100,376 @@ class RankedChoiceVoting(Voting):
                 new_ballot[c] = default_score
         ballot = self.RankedChoiceBallot(new_ballot, self.reverse)
         try:
-            if ballot.isValid(self.try_handle_invalid, self.allowed_rank):
-                self.ballots.append(ballot)
+            # the ballot must be cast by a positive number of voters
+            if not _ValidWeights(weight):
+                return False
+            with self._Phase("validation"):
+                valid = ballot.isValid(self.try_handle_invalid, 
+                                       self.allowed_rank)
+            if valid:
+                self.ballots.Append(ballot.rank, weight)
                 return True
             return False
         except:
             return False
     
-    def ImportBallots(self, filename):
-        return super().ImportBallots(filename)
+    def AddBallots(self, new_ballots, weights=None):
+        new_ballots, weights = self._SplitWeights(new_ballots, weights)
+        # support list-style rankings as well: a single column holding, for 
+        # each ballot, a list of candidates from the most preferred
+        rankings = None
+        if _IsArrow(new_ballots) and new_ballots.num_columns==1:
+            import pyarrow as pa
+            import pyarrow.compute as pc
+            column = new_ballots.column(0)
+            if isinstance(column, pa.ChunkedArray):
+                column = column.combine_chunks()
+            if pa.types.is_list(column.type):
+                ballot_id = pc.list_parent_indices(column).to_numpy()
+                candidate = pc.fill_null(pc.index_in(
+                    column.flatten(), value_set=pa.array(self.candidates)), 
+                    -1).to_numpy()
+                offsets = column.offsets.to_numpy()
+                position = (np.arange(len(ballot_id))+offsets[0]-
+                            offsets[ballot_id])
+                rankings = (ballot_id, candidate, position)
+                index = pd.RangeIndex(len(column))
+        elif (isinstance(new_ballots, pd.DataFrame) and 
+              new_ballots.shape[1]==1 and 
+              new_ballots.iloc[:, 0].map(lambda x: isinstance(x, list)).any()):
+            flat = pd.Series(new_ballots.iloc[:, 0].to_numpy()).explode()
+            flat = flat[flat.notna()]
+            candidate = pd.Categorical(flat, categories=self.candidates).codes
+            rankings = (flat.index.to_numpy(), candidate, 
+                        flat.groupby(level=0).cumcount().to_numpy())
+            index = new_ballots.index
+        if rankings is not None:
+            ballot_id, candidate, position = rankings
+            ranked = candidate>=0
+            ballots = np.full((len(index), len(self.candidates)), np.nan)
+            ballots[ballot_id[ranked], candidate[ranked]] = position[ranked]+1
+            new_ballots = pd.DataFrame(ballots, index=index, 
+                                       columns=self.candidates)
+        return super().AddBallots(new_ballots, weights)
+    
+    def ValidateBallots(self, ballots, present):
+        reasons = np.full(len(ballots), "", dtype=object)
+        if self.try_handle_invalid:
+            # treat candidates missing from the ballots as most disliked, 
+            # then treat missing values as even more disliked
+            sign = -1 if self.reverse else 1
+            ballots[:, ~present] = sign*(np.fmax.reduce(
+                sign*ballots, axis=1, keepdims=True)+1)
+            ballots = np.where(np.isnan(ballots), sign*(np.fmax.reduce(
+                sign*ballots, axis=1, keepdims=True)+1), ballots)
+        missing = np.isnan(ballots).any(axis=1)
+        # flip the scores if the score is reversed
+        if self.reverse:
+            ballots = (ballots.max(axis=1, keepdims=True)+
+                       ballots.min(axis=1, keepdims=True)-ballots)
+        # converts scores to ranks, smaller rank is always preferred
+        if self.try_handle_invalid:
+            rank, sorted_rank = _Ranks(ballots, bottom=self.allowed_rank+1)
+        else:
+            rank = ballots
+            sorted_rank = np.sort(rank, axis=1)
+        # only ties at the lowest rank is allowed (ignored ranks)
+        reasons[~_ValidRanks(sorted_rank)] = "invalid_rank"
+        reasons[sorted_rank[:, -1]>self.allowed_rank+1] = "too_many_ranks"
+        reasons[(rank!=np.round(rank)).any(axis=1)] = "non_integer"
+        reasons[missing] = "missing"
+        return rank, reasons
+    
+    def ImportBallots(self, filename, chunk_size=None, progress=None, 
+                      weight_column=None, resume=False):
+        return super().ImportBallots(filename, chunk_size, progress, 
+                                     weight_column, resume)
         
-    def ExportBallots(self, filename):
-        return super().ExportBallots(filename)
+    def ExportBallots(self, filename, chunk_size=None, weight_column=None):
+        return super().ExportBallots(filename, chunk_size, weight_column)
+    
+    def CompactBallots(self):
+        return super().CompactBallots()
+    
+    def OpenBallotStore(self, path):
+        return super().OpenBallotStore(path)
     
-    def RunElection(self, candidates=None):
-        return super().RunElection(candidates)
+    def SparseBallots(self):
+        return super().SparseBallots()
+    
+    def BallotView(self, values):
+        # the stored values are the ranks, already flipped and discretized
+        ballot = self.RankedChoiceBallot(
+            pd.Series(values, index=self.candidates))
+        ballot.rank = ballot.scores
+        return ballot
+    
+    def VoteMatrix(self, ballots, columns):
+        rank = ballots[:, columns]
+        best_rank = rank.min(axis=1, keepdims=True)
+        # vote 1 for most preferred candidate and 0 for everyone else, or 0 
+        # for everyone if all candidates tied for the last place
+        return ((rank==best_rank) & 
+                (best_rank!=ballots.max(axis=1, keepdims=True))).astype(int)
+    
+    def PreferenceScores(self, ballots):
+        # smaller ranks are preferred
+        return -ballots
+    
+    def CloneBallots(self, ballots, weights, column, copies, rng):
+        rank = ballots[:, column]
+        ranked = rank<ballots.max(axis=1)
+        ballots, weights = super().CloneBallots(ballots, weights, column, 
+                                                copies, rng)
+        # only ties at the lowest rank is allowed, so the voters of a ranked 
+        # candidate rank it and its duplicates one after another instead: 
+        # they pick the first one by coin toss and the order of the others 
+        # by another one, and rank every candidate below them lower
+        group = np.append(column, np.arange(ballots.shape[1]-copies, 
+                                            ballots.shape[1]))
+        shares = _SplitVoters(weights[ranked], copies+1, rng).reshape(-1)
+        split = np.repeat(ballots[ranked], copies+1, axis=0)
+        first = np.repeat(rank[ranked], copies+1)
+        split[split>first[:, np.newaxis]] += copies
+        keys = rng.random((len(split), copies+1))
+        keys[np.arange(len(split)), np.tile(np.arange(copies+1), 
+                                            ranked.sum())] = -1
+        split[:, group] = (first[:, np.newaxis]+
+                           np.argsort(np.argsort(keys, axis=1), axis=1))
+        return (np.vstack([ballots[~ranked], split[shares>0]]), 
+                np.concatenate([weights[~ranked], shares[shares>0]]))
+    
+    def Tally(self, candidates):
+        return super().Tally(candidates)
+    
+    def RunElection(self, candidates=None, workers=None):
+        if candidates==None:
+            candidates=self.candidates
+        if workers is not None and self.pool is None:
+            return self._RunWithWorkers(self.RunElection, workers, candidates)
+        # the bucketed engine assumes that every round eliminates the tied 
+        # candidates with the fewest votes, as the default SplitSize does
+        if type(self).SplitSize is not RankedChoiceVoting.SplitSize:
+            return super().RunElection(candidates)
+        result = self._CachedResult(candidates)
+        if result is None:
+            with self._Phase("tally"):
+                result = self._BucketElection(list(candidates))
+            result = self._CacheResult(candidates, result)
+        return result
+    
+    def _BucketElection(self, candidates, bottom_ranks=None):
+        """
+        Runs the election the same way as the generic RunElection, but keeps 
+        a pointer from every ballot to its most preferred candidate still in 
+        the race and buckets the ballots by that candidate, so that each 
+        round only touches the ballots of the eliminated candidates. 
+        
+        Parameters
+        candidates : list
+            a list of unique strings representing the candidates
+        bottom_ranks : list, default=None
+            the bottom rank of every ballot, one array per chunk of ballots, 
+            computed if not given
+        
+        Returns
+        list
+            the same as RunElection
+        """
+        if candidates==[]:
+            return []
+        columns = self.ballots.Columns(candidates)
+        if self.pool is not None:
+            with self._Phase("waiting"):
+                chunks = self.pool.Map("_RankedChunk", columns)
+        elif isinstance(self.ballots, SparseBallotStore):
+            # only the candidates each ballot ranks are gone through
+            chunks = (self._SparseRankedChunk(*chunk, columns) 
+                      for chunk in self.ballots.SparseChunks())
+        else:
+            if bottom_ranks is None:
+                bottom_ranks = [rows.max(axis=1, keepdims=True) 
+                                for rows in self.ballots.Chunks()]
+            chunks = (self._RankedChunk(rows, weight, columns, bottom_rank) 
+                      for (rows, weight), bottom_rank in 
+                      zip(self.ballots.Chunks(weighted=True), bottom_ranks))
+        # every ballot's preferences among the candidates are stored back to 
+        # back in prefs, from the most preferred down to the last candidate 
+        # ranked above the ignored bottom rank
+        prefs, lengths, weights = [], [], []
+        # votes are counted in the type of the weights
+        dtype = int if self.ballots.integral_weights else float
+        ranked_cnt = np.zeros(len(candidates), dtype=dtype)
+        for pref, length, weight, ranked in chunks:
+            prefs.append(pref)
+            lengths.append(length)
+            weights.append(weight)
+            ranked_cnt += ranked
+        prefs = np.concatenate(prefs+[np.zeros(0, dtype=np.intp)])
+        end = np.cumsum(np.concatenate(lengths+[np.zeros(0, dtype=int)]))
+        pointer = end-np.concatenate(lengths+[np.zeros(0, dtype=int)])
+        weights = np.concatenate(weights+[np.zeros(0, dtype=dtype)])
+        self._Touch(len(self.ballots))
+        # bucket the ballots by the candidate they currently vote for
+        votes = prefs[pointer]
+        counts = np.bincount(votes, weights, len(candidates)).astype(dtype)
+        order = np.argsort(votes, kind="stable")
+        bounds = np.searchsorted(votes[order], np.arange(len(candidates)+1))
+        buckets = [[order[bounds[i]:bounds[i+1]]] 
+                   for i in range(len(candidates))]
+        running = np.ones(len(candidates), dtype=bool)
+        history = [[] for c in candidates]
+        eliminated = []
+        while True:
+            remaining = np.flatnonzero(running)
+            for i in remaining:
+                history[i].append(counts[i])
+            scores = counts[remaining]
+            self._Round()
+            # scores that only differ by rounding errors tie
+            scores = _TieScores(scores)
+            # if everyone ties for the first place, stop eliminating
+            if scores.max()==scores.min():
+                break
+            # eliminate the candidates with the fewest votes, then move 
+            # their ballots to the next preference still in the race
+            lowest = remaining[scores==scores.min()]
+            running[lowest] = False
+            counts[lowest] = 0
+            moved = np.concatenate([b for i in lowest for b in buckets[i]])
+            for i in lowest:
+                buckets[i] = []
+            self._Touch(len(moved))
+            position = pointer[moved]+1
+            while True:
+                valid = position<end[moved]
+                stale = np.zeros(len(moved), dtype=bool)
+                stale[valid] = ~running[prefs[position[valid]]]
+                if not stale.any():
+                    break
+                position[stale] += 1
+            pointer[moved] = position
+            moved, votes = moved[valid], prefs[position[valid]]
+            counts += np.bincount(votes, weights[moved], 
+                                  len(candidates)).astype(counts.dtype)
+            order = np.argsort(votes, kind="stable")
+            bounds = np.searchsorted(votes[order], 
+                                     np.arange(len(candidates)+1))
+            for i in np.flatnonzero(np.diff(bounds)):
+                buckets[i].append(moved[order[bounds[i]:bounds[i+1]]])
+            eliminated.append((lowest, int(running.sum())))
+        # the candidates still running tie for the first place, the others 
+        # follow from the last eliminated to the first
+        result = [(candidates[i], 1, 
+                   [(s, "u") for s in history[i][:-1]]+
+                   [(history[i][-1], "t")]) for i in remaining]
+        for lowest, upper_cnt in reversed(eliminated):
+            # break the ties among the eliminated candidates with an election 
+            # of their own, where a lone candidate gets a vote from every 
+            # ballot that ranks it
+            if len(lowest)==1:
+                lower_result = [(candidates[lowest[0]], 1, 
+                                 [(ranked_cnt[lowest[0]], "t")])]
+            else:
+                with self._Depth():
+                    lower_result = self._BucketElection(
+                        [candidates[i] for i in lowest], bottom_ranks)
+            ids = {candidates[i]: i for i in lowest}
+            for (c, r, l) in lower_result:
+                i = ids[c]
+                result.append((c, r+upper_cnt, 
+                               [(s, "u") for s in history[i][:-1]]+
+                               [(history[i][-1], "l")]+l))
+        return result
+    
+    def _RankedChunk(self, rows, weight, columns, bottom_rank=None):
+        """
+        Lists the preferences of a chunk of ballots among some candidates. 
+        
+        Parameters
+        rows : numpy.ndarray
+            a 2D array with one stored ballot per row and one column per 
+            candidate specified in constructor
+        weight : numpy.ndarray
+            weight of each ballot
+        columns : numpy.ndarray
+            column ids of the candidates
+        bottom_rank : numpy.ndarray, default=None
+            the bottom rank of every ballot as a column, computed if not given
+        
+        Returns
+        tuple
+            the preferred candidates of every ballot from the most preferred, 
+            back to back, then the number of them and the weight of every 
+            ballot that prefers any, and the weighted number of ballots that 
+            rank each candidate above the bottom rank
+        """
+        if bottom_rank is None:
+            bottom_rank = rows.max(axis=1, keepdims=True)
+        rank = rows[:, columns]
+        ranked = rank<bottom_rank
+        order = np.argsort(np.where(ranked, rank, np.inf), axis=1, 
+                           kind="stable")
+        length = ranked.sum(axis=1)
+        return (order[np.arange(len(columns))<length[:, None]], 
+                length[length>0], weight[length>0], weight@ranked)
+    
+    def _SparseRankedChunk(self, indptr, indices, data, defaults, weight, 
+                           columns):
+        """
+        Lists the preferences of a chunk of sparse ballots among some 
+        candidates, the same way as _RankedChunk. The candidates that share 
+        the default value of a valid ballot are the ones tied at its bottom 
+        rank, so its entries are exactly the candidates it ranks. 
+        
+        Parameters
+        indptr, indices, data, defaults : numpy.ndarray
+            the entries of a chunk of ballots, as returned by 
+            SparseBallotStore.SparseChunks
+        weight : numpy.ndarray
+            weight of each ballot
+        columns : numpy.ndarray
+            column ids of the candidates
+        
+        Returns
+        tuple
+            the same as _RankedChunk
+        """
+        # position of every candidate in columns, or -1 if it is not there
+        position = np.full(len(self.candidates), -1)
+        position[columns] = np.arange(len(columns))
+        ballot = np.repeat(np.arange(len(weight)), np.diff(indptr))
+        running = position[indices]>=0
+        ballot, rank = ballot[running], data[running]
+        candidate = position[indices[running]]
+        order = np.lexsort((rank, ballot))
+        length = np.bincount(ballot, minlength=len(weight))
+        ranked = np.bincount(candidate, weight[ballot], len(columns))
+        return (candidate[order], length[length>0], weight[length>0], 
+                ranked.astype(weight.dtype))
     
     def SplitSize(self, num_candidates):
         return super().SplitSize(num_candidates)
     
-    def RunMultiWinnerElection(self, candidates=None):
-        return super().RunElection(candidates)
\ No newline at end of file
+    def RunMultiWinnerElection(self, candidates=None, workers=None):
+        return super().RunMultiWinnerElection(candidates, workers)
+    
+    def Bootstrap(self, replicates=1000, candidates=None, seed=None, 
+                  workers=None):
+        return super().Bootstrap(replicates, candidates, seed, workers)
+    
+    def SpoilerTest(self, clones=None, copies=1, candidates=None, seed=None, 
+                    workers=None):
+        return super().SpoilerTest(clones, copies, candidates, seed, workers)
+    
+    def PairwiseMatrix(self, candidates=None):
+        return super().PairwiseMatrix(candidates)
+    
+    def CondorcetWinner(self, candidates=None):
+        return super().CondorcetWinner(candidates)
+    
+    def CondorcetLoser(self, candidates=None):
+        return super().CondorcetLoser(candidates)
+    
+    def Profile(self, profiler=None):
+        return super().Profile(profiler)
@@ -0,0 +1,113 @@
+"""
+author: Yichen Zhang
+"""
+import pandas as pd
+import numpy as np
+from Voting import _TieScores
+from TierListVoting import TierListVoting
+
+class RoundRobinVoting(TierListVoting):
+    
+    def Tally(self, candidates):
+        return pd.Series(self._Points(candidates).sum(axis=1), 
+                         index=candidates)
+    
+    def _Points(self, candidates):
+        """
+        Plays every candidate against every other candidate: a candidate 
+        wins a match if more voters prefer it to its opponent than the other 
+        way around. 
+        
+        Parameters
+        candidates : list
+            a list of unique strings representing the candidates
+        
+        Returns
+        numpy.ndarray
+            a candidates-by-candidates array whose entry (i, j) is the points 
+            candidate i gets from its match against candidate j: 1 for a win, 
+            0.5 for a tie, and 0 for a loss or for i equal to j
+        """
+        columns = self.ballots.Columns(candidates)
+        preferences = self._Preferences()[np.ix_(columns, columns)]
+        points = (preferences>preferences.T)+0.5*(preferences==preferences.T)
+        np.fill_diagonal(points, 0)
+        return points
+    
+    def RunElection(self, candidates=None, workers=None):
+        if candidates==None:
+            candidates=self.candidates
+        if workers is not None and self.pool is None:
+            return self._RunWithWorkers(self.RunElection, workers, candidates)
+        # the engine assumes that every round eliminates the tied candidates 
+        # with the fewest points, as the default SplitSize does
+        if type(self).SplitSize is not RoundRobinVoting.SplitSize:
+            return super().RunElection(candidates)
+        result = self._CachedResult(candidates)
+        if result is None:
+            with self._Phase("tally"):
+                result = self._RoundRobinElection(list(candidates))
+            result = self._CacheResult(candidates, result)
+        return result
+    
+    def _RoundRobinElection(self, candidates):
+        """
+        Runs the election the same way as the generic RunElection, but plays 
+        the matches only once and takes the points won against eliminated 
+        candidates away from the others, instead of tallying every round 
+        again. 
+        
+        Parameters
+        candidates : list
+            a list of unique strings representing the candidates
+        
+        Returns
+        list
+            the same as RunElection
+        """
+        if candidates==[]:
+            return []
+        points = self._Points(candidates)
+        totals = points.sum(axis=1)
+        running = np.ones(len(candidates), dtype=bool)
+        history = [[] for c in candidates]
+        eliminated = []
+        while True:
+            remaining = np.flatnonzero(running)
+            for i in remaining:
+                history[i].append(totals[i])
+            scores = totals[remaining]
+            self._Round()
+            # scores that only differ by rounding errors tie
+            scores = _TieScores(scores)
+            # if everyone ties for the first place, stop eliminating
+            if scores.max()==scores.min():
+                break
+            # eliminate the candidates with the fewest points, then cancel 
+            # the matches against them
+            lowest = remaining[scores==scores.min()]
+            running[lowest] = False
+            totals = totals-points[:, lowest].sum(axis=1)
+            eliminated.append((lowest, int(running.sum())))
+        # the candidates still running tie for the first place, the others 
+        # follow from the last eliminated to the first
+        result = [(candidates[i], 1, 
+                   [(s, "u") for s in history[i][:-1]]+
+                   [(history[i][-1], "t")]) for i in remaining]
+        for lowest, upper_cnt in reversed(eliminated):
+            # break the ties among the eliminated candidates with an election 
+            # of their own, where a lone candidate has no match to win
+            if len(lowest)==1:
+                lower_result = [(candidates[lowest[0]], 1, 
+                                 [(np.float64(0), "t")])]
+            else:
+                with self._Depth():
+                    lower_result = self._RoundRobinElection(
+                        [candidates[i] for i in lowest])
+            ids = {candidates[i]: i for i in lowest}
+            for (c, r, l) in lower_result:
+                i = ids[c]
+                result.append((c, r+upper_cnt, 
+                               [(s, "u") for s in history[i][:-1]]+
+                               [(history[i][-1], "l")]+l))
+        return result
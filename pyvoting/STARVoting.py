@@ -3,7 +3,7 @@ author: Yichen Zhang
 """
 import pandas as pd
 import numpy as np
-from Voting import Voting
+from Voting import Voting, _ValidWeights, _ValidScores
 
 class STARVoting(Voting):
     
@@ -23,17 +23,15 @@ class STARVoting(Voting):
             # check if self.scores is numeric
             if not np.issubdtype(self.scores.dtype, np.number):
                 return False
-            # put out-of-bound scores into the valid range, if specified to
+            # put out-of-bound scores into the valid range and round them, 
+            # if specified to, then check whether the ballot satisfy the 
+            # constraints
+            scores, reasons = _ValidScores(
+                np.array(self.scores, dtype=float)[np.newaxis], 
+                try_handle_invalid, score_range, only_int)
             if try_handle_invalid:
-                self.scores.loc[self.scores>score_range[1]] = score_range[1]
-                self.scores.loc[self.scores<score_range[0]] = score_range[0]
-                # round non-integers, if necessary
-                if only_int:
-                    self.scores = self.scores.round(0)
-            # check whether the ballot satisfy the constraints
-            return (self.scores.between(score_range[0], score_range[1]).all() 
-                    and (not only_int or self.scores.astype("float").apply(
-                    lambda x: x.is_integer()).all()))
+                self.scores = pd.Series(scores[0], index=self.scores.index)
+            return reasons[0]==""
         
         def Vote(self, candidates, runoff=False):
             # if runoff is set to True, will vote 1 for most prefered 
@@ -65,7 +63,7 @@ class STARVoting(Voting):
         self.score_range = score_range
         self.only_int = only_int
     
-    def AddBallot(self, new_ballot):
+    def AddBallot(self, new_ballot, weight=1):
         new_ballot = new_ballot.copy()
         if self.try_handle_invalid:
             # if some candidates have no score, fill the scores with 0
@@ -78,21 +76,88 @@ class STARVoting(Voting):
                 new_ballot[c] = default_score
         ballot = self.STARBallot(new_ballot)
         try:
-            if ballot.isValid(self.try_handle_invalid, self.score_range, 
-                              self.only_int):
-                self.ballots.append(ballot)
+            # the ballot must be cast by a positive number of voters
+            if not _ValidWeights(weight):
+                return False
+            with self._Phase("validation"):
+                valid = ballot.isValid(self.try_handle_invalid, 
+                                       self.score_range, self.only_int)
+            if valid:
+                self.ballots.Append(ballot.scores, weight)
                 return True
             return False
         except:
             return False
     
-    def ImportBallots(self, filename):
-        return super().ImportBallots(filename)
+    def AddBallots(self, new_ballots, weights=None):
+        return super().AddBallots(new_ballots, weights)
+    
+    def ValidateBallots(self, ballots, present):
+        return _ValidScores(ballots, self.try_handle_invalid, 
+                            self.score_range, self.only_int)
+    
+    def ImportBallots(self, filename, chunk_size=None, progress=None, 
+                      weight_column=None, resume=False):
+        return super().ImportBallots(filename, chunk_size, progress, 
+                                     weight_column, resume)
         
-    def ExportBallots(self, filename):
-        return super().ExportBallots(filename)
+    def ExportBallots(self, filename, chunk_size=None, weight_column=None):
+        return super().ExportBallots(filename, chunk_size, weight_column)
+    
+    def CompactBallots(self):
+        return super().CompactBallots()
+    
+    def OpenBallotStore(self, path):
+        return super().OpenBallotStore(path)
+    
+    def SparseBallots(self):
+        return super().SparseBallots()
+    
+    def BallotView(self, values):
+        return self.STARBallot(pd.Series(values, index=self.candidates))
+    
+    def VoteMatrix(self, ballots, columns, runoff=False):
+        scores = ballots[:, columns]
+        # if runoff is set to True, will vote 1 for most prefered 
+        # candidate(s) and 0 for everyone else
+        if runoff:
+            votes = np.zeros(scores.shape, dtype=int)
+            votes[np.arange(len(scores)), scores.argmax(axis=1)] = 1
+            # if all candidates tied, vote all 0
+            votes[scores.min(axis=1)==scores.max(axis=1)] = 0
+            return votes
+        # otherwise vote the score corresponding to each candidate
+        return scores
+    
+    def PreferenceScores(self, ballots):
+        return super().PreferenceScores(ballots)
     
-    def RunElection(self, candidates=None):
+    def CloneBallots(self, ballots, weights, column, copies, rng):
+        return super().CloneBallots(ballots, weights, column, copies, rng)
+    
+    def Tally(self, candidates, runoff=False):
+        # a runoff between two candidates is read off the pairwise preference 
+        # counts: a ballot votes for whichever of them it scores higher
+        if runoff and len(candidates)==2:
+            a, b = self.ballots.Columns(candidates)
+            scores = self._Preferences()[[a, b], [b, a]]
+            if self.ballots.integral_weights:
+                scores = scores.astype(int)
+            return pd.Series(scores, index=candidates)
+        # with more than 2 candidates tied into the runoff, a ballot votes for
+        # the first of its most preferred ones, which depends on more than 
+        # the pairwise counts
+        if runoff:
+            return super().Tally(candidates, runoff=runoff)
+        # a ballot scores a candidate the same whoever else is running, so 
+        # the scoring round is read off the running totals of the ballot 
+        # store
+        totals = self.ballots.totals[self.ballots.Columns(candidates)]
+        if self.only_int and self.ballots.integral_weights:
+            totals = totals.astype(int)
+        return pd.Series(totals, index=candidates)
+    
+    def RunElection(self, candidates=None, workers=None):
         """
         This STAR voting implementation uses a different tie-breaking protocal 
         that makes more sense and is easier to implement than the typical STAR 
@@ -104,21 +169,24 @@ class STARVoting(Voting):
         """
         if candidates==None:
             candidates=self.candidates
+        if workers is not None and self.pool is None:
+            return self._RunWithWorkers(self.RunElection, workers, candidates)
         if candidates==[]:
             return []
         # add up scores from all ballots
-        scores = pd.Series(data=0, index=candidates)
-        for b in self.ballots:
-            scores += b.Vote(candidates, runoff=False)
+        with self._Phase("tally"):
+            scores = self.Tally(candidates, runoff=False)
+        self._Round()
         # candidates with top 2 greatest scores (possibly tied) enters runoff
         upper_bracket = [c for c in candidates if (scores>scores[c]).sum()<2]
         lower_bracket = [c for c in candidates if c not in upper_bracket]
-        # do runoff on upper_bracket
-        scores_rf = pd.Series(data=0, index=candidates)
-        for b in self.ballots:
-            scores_rf += b.Vote(upper_bracket, runoff=True)
-        # treat those who did not enter runoff as having 0 runoff score
-        scores_rf.loc[lower_bracket] = 0
+        # do runoff on upper_bracket, treat those who did not enter runoff as 
+        # having 0 runoff score
+        with self._Phase("tally"):
+            runoff = self.Tally(upper_bracket, runoff=True)
+        self._Round()
+        scores_rf = pd.Series(data=0, index=candidates, dtype=runoff.dtype)
+        scores_rf.loc[upper_bracket] = runoff
         # combine scores from two rounds and sort them
         scores_final = pd.Series([(scores_rf[c], scores[c]) for c in
                                   candidates], index=candidates)
@@ -130,5 +198,25 @@ class STARVoting(Voting):
     def SplitSize(self, num_candidates):
         return super().SplitSize(num_candidates)
     
-    def RunMultiWinnerElection(self, candidates=None):
-        return super().RunElection(candidates)
\ No newline at end of file
+    def RunMultiWinnerElection(self, candidates=None, workers=None):
+        return super().RunMultiWinnerElection(candidates, workers)
+    
+    def Bootstrap(self, replicates=1000, candidates=None, seed=None, 
+                  workers=None):
+        return super().Bootstrap(replicates, candidates, seed, workers)
+    
+    def SpoilerTest(self, clones=None, copies=1, candidates=None, seed=None, 
+                    workers=None):
+        return super().SpoilerTest(clones, copies, candidates, seed, workers)
+    
+    def PairwiseMatrix(self, candidates=None):
+        return super().PairwiseMatrix(candidates)
+    
+    def CondorcetWinner(self, candidates=None):
+        return super().CondorcetWinner(candidates)
+    
+    def CondorcetLoser(self, candidates=None):
+        return super().CondorcetLoser(candidates)
+    
+    def Profile(self, profiler=None):
+        return super().Profile(profiler)
@@ -0,0 +1,64 @@
+"""
+author: Yichen Zhang
+"""
+import pandas as pd
+import numpy as np
+from TierListVoting import TierListVoting
+
+class SchulzeVoting(TierListVoting):
+    
+    def Tally(self, candidates):
+        # score each candidate by the number of candidates it beats
+        strength = self._StrongestPaths(candidates)
+        return pd.Series((strength>strength.T).sum(axis=1), index=candidates)
+    
+    def _StrongestPaths(self, candidates):
+        """
+        Finds the strength of the strongest path between every pair of 
+        candidates. A candidate has a direct path to each candidate that 
+        fewer voters prefer to it than the other way around, as strong as the 
+        number of voters preferring it, and a path is as strong as its 
+        weakest link. Candidate i beats candidate j if the strongest path 
+        from i to j is stronger than the one from j to i. 
+        
+        Parameters
+        candidates : list
+            a list of unique strings representing the candidates
+        
+        Returns
+        numpy.ndarray
+            a candidates-by-candidates array whose entry (i, j) is the 
+            strength of the strongest path from candidate i to candidate j
+        """
+        columns = self.ballots.Columns(candidates)
+        preferences = self._Preferences()[np.ix_(columns, columns)]
+        strength = np.where(preferences>preferences.T, preferences, 0)
+        # only the order of the strengths matters to the paths, so they are 
+        # replaced by their position among the distinct strengths, in the 
+        # smallest integer type that fits to save memory bandwidth
+        levels, strength = np.unique(strength, return_inverse=True)
+        strength = strength.reshape(len(candidates), len(candidates)).astype(
+            np.min_scalar_type(len(levels)))
+        paths = np.empty_like(strength)
+        # one pass per candidate k over all pairs, letting the paths through 
+        # k replace weaker ones
+        for k in range(len(candidates)):
+            np.minimum(strength[:, k:k+1], strength[k:k+1, :], out=paths)
+            np.maximum(strength, paths, out=strength)
+        return levels[strength]
+    
+    def RunElection(self, candidates=None, workers=None):
+        if candidates==None:
+            candidates=self.candidates
+        if workers is not None and self.pool is None:
+            return self._RunWithWorkers(self.RunElection, workers, candidates)
+        # the Schulze method ranks all candidates at once by the strongest 
+        # paths among them instead of eliminating candidates round by round: 
+        # a candidate beats every candidate beaten by those it beats, so it 
+        # beats more candidates than any of them and a single sort orders 
+        # them, unless the brackets are split otherwise
+        if type(self).SplitSize is not SchulzeVoting.SplitSize:
+            return super().RunElection(candidates)
+        with self._Phase("tally"):
+            scores = self.Tally(candidates)
+        return self._RankByScores(candidates, scores)
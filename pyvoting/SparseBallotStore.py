@@ -0,0 +1,195 @@
+"""
+author: Yichen Zhang
+"""
+import numpy as np
+from BallotStore import BallotStore, _Grow
+
+class SparseBallotStore(BallotStore):
+    """
+    Sparse Ballot Store Class
+    Stores the valid ballots of an election in compressed sparse rows: every
+    ballot keeps a default value, the value shared by most of its
+    candidates, such as the bottom rank of a ranked ballot or the score 0 of
+    a score ballot, and only the candidates whose values differ from it are
+    stored as entries. When ballots only fill in a few of many candidates,
+    as in polls with lots of write-in candidates, memory then grows with
+    the entries filled in rather than with ballots times candidates. 
+    Chunks are still returned as dense arrays for the voting systems that
+    need them, but only a few ballots at a time, while SparseChunks returns
+    the entries themselves for kernels that work on them directly. 
+    Compact mode compares whole rows, so it is not available. 
+    """
+    
+    def __init__(self, candidates, ballot_view=None, chunk_size=None):
+        """
+        Initializes an empty ballot store. 
+        
+        Parameters
+        candidates : list
+            an non-empty list of unique strings representing the candidates
+        ballot_view : callable, default=None
+            the same as in BallotStore
+        chunk_size : int, default=None
+            number of ballots in each chunk returned by Chunks
+            if None, as many ballots as take about 32MB as a dense array
+        """
+        if chunk_size is None:
+            chunk_size = max(1, min(65536, 2**22//len(candidates)))
+        super().__init__(candidates, ballot_view, chunk_size)
+        self.values = None
+        # entries of ballot i are indices and data[indptr[i]:indptr[i+1]]
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int32)
+        self.data = np.zeros(0)
+        self.defaults = np.zeros(0)
+        self.entry_cnt = 0
+    
+    def _Store(self, rows, weights):
+        defaults = _Defaults(rows)
+        ballot, column = np.nonzero(rows!=defaults[:, None])
+        new_size = self.size+rows.shape[0]
+        if new_size>len(self.weights):
+            # grow geometrically so that appending one ballot at a time is
+            # amortized constant time
+            self._Reserve(max(new_size, 2*len(self.weights), 16))
+        new_cnt = self.entry_cnt+len(column)
+        if new_cnt>len(self.data):
+            capacity = max(new_cnt, 2*len(self.data), 16)
+            self.indices = _Grow(self.indices, self.entry_cnt, capacity)
+            self.data = _Grow(self.data, self.entry_cnt, capacity)
+        self.indices[self.entry_cnt:new_cnt] = column
+        self.data[self.entry_cnt:new_cnt] = rows[ballot, column]
+        self.indptr[self.size+1:new_size+1] = (
+            self.entry_cnt+np.cumsum(np.bincount(ballot,
+                                                 minlength=len(rows))))
+        self.defaults[self.size:new_size] = defaults
+        self.weights[self.size:new_size] = weights
+        self.size = new_size
+        self.entry_cnt = new_cnt
+    
+    def _Reserve(self, capacity):
+        self.indptr = _Grow(self.indptr, self.size+1, capacity+1)
+        self.defaults = _Grow(self.defaults, self.size, capacity)
+        self.weights = _Grow(self.weights, self.size, capacity)
+    
+    def Compact(self):
+        raise ValueError("compact mode compares whole ballots, so it is not "
+                         "available for sparse ballots")
+    
+    def Bytes(self):
+        return sum(array.nbytes for array in (self.indptr, self.indices,
+                                              self.data, self.defaults,
+                                              self.weights))
+    
+    def Arrays(self):
+        """
+        Returns
+        tuple
+            read-only views of the indptr, indices, data and defaults of
+            all stored ballots
+        """
+        arrays = (self.indptr[:self.size+1], self.indices[:self.entry_cnt],
+                  self.data[:self.entry_cnt], self.defaults[:self.size])
+        for array in arrays:
+            array.flags.writeable = False
+        return arrays
+    
+    def Rows(self):
+        """
+        Returns
+        numpy.ndarray
+            a read-only dense copy of all stored ballots, one ballot per
+            row, which takes as much memory as a dense ballot store
+        """
+        return self.DenseRows(self.Arrays(), 0, self.size, 
+                              len(self.candidates))
+    
+    @staticmethod
+    def DenseRows(arrays, start, stop, width):
+        indptr, indices, data, defaults = arrays
+        rows = np.empty((stop-start, width))
+        rows[:] = defaults[start:stop, None]
+        first, last = indptr[start], indptr[stop]
+        ballot = np.repeat(np.arange(stop-start), 
+                           np.diff(indptr[start:stop+1]))
+        rows[ballot, indices[first:last]] = data[first:last]
+        rows.flags.writeable = False
+        return rows
+    
+    def SparseChunks(self, chunk_size=None):
+        """
+        Iterates over the entries of the stored ballots in fixed-size
+        chunks, without making them dense. 
+        
+        Parameters
+        chunk_size : int, default=None
+            number of ballots in each chunk, the chunk_size of this store is
+            used if unspecified
+        
+        Returns
+        generator
+            (indptr, indices, data, defaults, weights) tuples of at most
+            chunk_size ballots each, where the entries of ballot i of the
+            chunk are indices and data[indptr[i]:indptr[i+1]], and every
+            other candidate has the value defaults[i]
+        """
+        if chunk_size is None:
+            chunk_size = self.chunk_size
+        indptr, indices, data, defaults = self.Arrays()
+        for start in range(0, self.size, chunk_size):
+            stop = min(start+chunk_size, self.size)
+            first, last = indptr[start], indptr[stop]
+            yield (indptr[start:stop+1]-first, indices[first:last],
+                   data[first:last], defaults[start:stop],
+                   self._ChunkWeights(start, stop))
+
+def _Defaults(rows):
+    """
+    Finds the value shared by most candidates of every ballot, the largest
+    of them if several values are shared by as many candidates. 
+    
+    Parameters
+    rows : numpy.ndarray
+        a 2D array with one ballot per row
+    
+    Returns
+    numpy.ndarray
+        the value of every ballot
+    """
+    n, width = rows.shape
+    if n==0:
+        return np.zeros(0)
+    low = rows.min()
+    span = int(rows.max()-low)+1
+    # values other than integers in a range no wider than a ballot, such as 
+    # ranks or scores, are sorted ballot by ballot
+    if span>width or not (rows==np.round(rows)).all():
+        return _SortedDefaults(rows)
+    # otherwise every value of every ballot is counted by a single bincount
+    if 2*np.count_nonzero(rows)<rows.size:
+        # most values are 0, so only the others are counted one by one
+        ballot, column = np.nonzero(rows)
+        keys = ballot*span+(rows[ballot, column]-low).astype(np.int64)
+        counts = np.bincount(keys, minlength=n*span).reshape(n, span)
+        counts[:, int(-low)] = width-np.bincount(ballot, minlength=n)
+    else:
+        keys = (rows-low).astype(np.int64)+np.arange(n)[:, None]*span
+        counts = np.bincount(keys.ravel(), minlength=n*span).reshape(n, span)
+    # the largest of the most common values
+    return span-1-np.argmax(counts[:, ::-1], axis=1)+low
+
+def _SortedDefaults(rows):
+    """
+    The same as _Defaults, but sorts every ballot, which works for any 
+    values. 
+    """
+    n, width = rows.shape
+    values = np.sort(rows, axis=1)
+    new = np.ones(values.shape, dtype=bool)
+    new[:, 1:] = values[:, 1:]!=values[:, :-1]
+    # the length of the run of equal values ending at every position
+    position = np.arange(width)
+    run = position+1-np.maximum.accumulate(np.where(new, position, 0),
+                                           axis=1)
+    last = width-1-np.argmax(run[:, ::-1], axis=1)
+    return values[np.arange(n), last]
@@ -3,8 +3,7 @@ author: Yichen Zhang
 """
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import StandardScaler
-from Voting import Voting
+from Voting import Voting, _ValidWeights, _ValidScores
 
 class StandardizedScoreVoting(Voting):
     
@@ -24,26 +23,23 @@ class StandardizedScoreVoting(Voting):
             # check if self.scores is numeric
             if not np.issubdtype(self.scores.dtype, np.number):
                 return False
-            # put out-of-bound scores into the valid range, if specified to
+            # put out-of-bound scores into the valid range and round them, 
+            # if specified to, then check whether the ballot satisfy the 
+            # constraints
+            scores, reasons = _ValidScores(
+                np.array(self.scores, dtype=float)[np.newaxis], 
+                try_handle_invalid, score_range, only_int)
             if try_handle_invalid:
-                self.scores.loc[self.scores>score_range[1]] = score_range[1]
-                self.scores.loc[self.scores<score_range[0]] = score_range[0]
-                # round non-integers, if necessary
-                if only_int:
-                    self.scores = self.scores.round(0)
-            # check whether the ballot satisfy the constraints
-            return (self.scores.between(score_range[0], score_range[1]).all() 
-                    and (not only_int or self.scores.astype("float").apply(
-                    lambda x: x.is_integer()).all()))
+                self.scores = pd.Series(scores[0], index=self.scores.index)
+            return reasons[0]==""
         
         def Vote(self, candidates):
             # if the score is the same for all candidates, vote 0 for all
             if self.scores.loc[candidates].nunique() == 1:
                 return pd.Series(0, index=candidates)
             # normalize the scores for the candidates between -1 and 1
-            return pd.Series(StandardScaler().fit_transform(self.scores.
-                   loc[candidates].values.reshape(-1, 1)).flatten(), 
-                   index=candidates)
+            scores = self.scores.loc[candidates].astype(float)
+            return (scores-scores.mean())/scores.std(ddof=0)
         
         def Export(self, candidates):
             return self.Vote(candidates)
@@ -62,7 +58,7 @@ class StandardizedScoreVoting(Voting):
         self.score_range = score_range
         self.only_int = only_int
     
-    def AddBallot(self, new_ballot):
+    def AddBallot(self, new_ballot, weight=1):
         new_ballot = new_ballot.copy()
         if self.try_handle_invalid:
             # if some candidates have no score, fill the scores with 0
@@ -75,25 +71,92 @@ class StandardizedScoreVoting(Voting):
                 new_ballot[c] = default_score
         ballot = self.StandardizedScoreBallot(new_ballot)
         try:
-            if ballot.isValid(self.try_handle_invalid, self.score_range, 
-                              self.only_int):
-                self.ballots.append(ballot)
+            # the ballot must be cast by a positive number of voters
+            if not _ValidWeights(weight):
+                return False
+            with self._Phase("validation"):
+                valid = ballot.isValid(self.try_handle_invalid, 
+                                       self.score_range, self.only_int)
+            if valid:
+                self.ballots.Append(ballot.scores, weight)
                 return True
             return False
         except:
             return False
     
-    def ImportBallots(self, filename):
-        return super().ImportBallots(filename)
+    def AddBallots(self, new_ballots, weights=None):
+        return super().AddBallots(new_ballots, weights)
+    
+    def ValidateBallots(self, ballots, present):
+        return _ValidScores(ballots, self.try_handle_invalid, 
+                            self.score_range, self.only_int)
+    
+    def ImportBallots(self, filename, chunk_size=None, progress=None, 
+                      weight_column=None, resume=False):
+        return super().ImportBallots(filename, chunk_size, progress, 
+                                     weight_column, resume)
         
-    def ExportBallots(self, filename):
-        return super().ExportBallots(filename)
+    def ExportBallots(self, filename, chunk_size=None, weight_column=None):
+        return super().ExportBallots(filename, chunk_size, weight_column)
+    
+    def CompactBallots(self):
+        return super().CompactBallots()
+    
+    def OpenBallotStore(self, path):
+        return super().OpenBallotStore(path)
+    
+    def SparseBallots(self):
+        return super().SparseBallots()
+    
+    def BallotView(self, values):
+        return self.StandardizedScoreBallot(
+            pd.Series(values, index=self.candidates))
+    
+    def VoteMatrix(self, ballots, columns):
+        scores = ballots[:, columns]
+        # if the score is the same for all candidates, vote 0 for all
+        tied = (scores.max(axis=1, keepdims=True)==
+                scores.min(axis=1, keepdims=True))
+        # standardize the scores for the candidates to a mean of 0 and a 
+        # (population) standard deviation of 1
+        std = scores.std(axis=1, keepdims=True)
+        return np.where(tied, 0, (scores-scores.mean(axis=1, keepdims=True))/
+                        np.where(tied, 1, std))
+    
+    def PreferenceScores(self, ballots):
+        return super().PreferenceScores(ballots)
     
-    def RunElection(self, candidates=None):
-        return super().RunElection(candidates)
+    def CloneBallots(self, ballots, weights, column, copies, rng):
+        return super().CloneBallots(ballots, weights, column, copies, rng)
+    
+    def Tally(self, candidates):
+        return super().Tally(candidates)
+    
+    def RunElection(self, candidates=None, workers=None):
+        return super().RunElection(candidates, workers)
     
     def SplitSize(self, num_candidates):
         return super().SplitSize(num_candidates)
     
-    def RunMultiWinnerElection(self, candidates=None):
-        return super().RunElection(candidates)
\ No newline at end of file
+    def RunMultiWinnerElection(self, candidates=None, workers=None):
+        return super().RunMultiWinnerElection(candidates, workers)
+    
+    def Bootstrap(self, replicates=1000, candidates=None, seed=None, 
+                  workers=None):
+        return super().Bootstrap(replicates, candidates, seed, workers)
+    
+    def SpoilerTest(self, clones=None, copies=1, candidates=None, seed=None, 
+                    workers=None):
+        return super().SpoilerTest(clones, copies, candidates, seed, workers)
+    
+    def PairwiseMatrix(self, candidates=None):
+        return super().PairwiseMatrix(candidates)
+    
+    def CondorcetWinner(self, candidates=None):
+        return super().CondorcetWinner(candidates)
+    
+    def CondorcetLoser(self, candidates=None):
+        return super().CondorcetLoser(candidates)
+    
+    def Profile(self, profiler=None):
+        return super().Profile(profiler)
@@ -3,7 +3,7 @@ author: Yichen Zhang
 """
 import pandas as pd
 import numpy as np
-from Voting import Voting
+from Voting import Voting, _ValidWeights, _Ranks, _ValidRanks, _ValidScores
 
 class TierListVoting(Voting):
     
@@ -33,21 +33,20 @@ class TierListVoting(Voting):
             # converts scores to tiers, smaller numbered tier is always 
             # preferred
             if try_handle_invalid:
-                self.rank = pd.Series([(self.scores.unique()<self.scores[c])
-                                       .sum()+1 for c in self.scores.index], 
+                rank, sorted_rank = _Ranks(
+                    self.scores.to_numpy(dtype=float)[np.newaxis], 
+                    dense=True, bottom=allowed_tier+1)
+                self.rank = pd.Series(rank[0].astype(int), 
                                       index=self.scores.index)
-                self.rank.loc[self.rank>allowed_tier] = allowed_tier+1
             else:
                 self.rank = self.scores
-            # only ties at the lowest rank is allowed (ignored ranks)
-            bottom_rank = self.rank.max()
-            # check whether the ballot satisfy the constraints
-            for i in range(1, bottom_rank+1):
-                if self.rank.value_counts()[i] == 0:
+                # tiers given as they are must be integers
+                if not np.issubdtype(self.rank.dtype, np.integer):
                     return False
-            return (self.rank.between(1, bottom_rank).all() and 
-                    self.rank.astype("float").apply(
-                    lambda x: x.is_integer()).all())
+                sorted_rank = np.sort(self.rank.to_numpy(dtype=float)
+                                      )[np.newaxis]
+            # check whether every tier down to the bottom one is used
+            return bool(_ValidRanks(sorted_rank, dense=True)[0])
         
         def Vote(self, candidates):
             # if all candidates are in the last tier, vote 0 for everyone
@@ -77,7 +76,7 @@ class TierListVoting(Voting):
             allowed_tier = len(candidates)
         self.allowed_tier = allowed_tier
     
-    def AddBallot(self, new_ballot):
+    def AddBallot(self, new_ballot, weight=1):
         # support a string, a list of lists/strings, or a Series 
         # to represent a vote
         if type(new_ballot)==str:
@@ -110,24 +109,118 @@ class TierListVoting(Voting):
                 new_ballot[c] = default_score
         ballot = self.TierListBallot(new_ballot, self.reverse)
         try:
-            if ballot.isValid(self.try_handle_invalid, self.allowed_tier):
-                self.ballots.append(ballot)
+            # the ballot must be cast by a positive number of voters
+            if not _ValidWeights(weight):
+                return False
+            with self._Phase("validation"):
+                valid = ballot.isValid(self.try_handle_invalid, 
+                                       self.allowed_tier)
+            if valid:
+                self.ballots.Append(ballot.rank, weight)
                 return True
             return False
         except:
             return False
     
-    def ImportBallots(self, filename):
-        return super().ImportBallots(filename)
+    def AddBallots(self, new_ballots, weights=None):
+        return super().AddBallots(new_ballots, weights)
+    
+    def ValidateBallots(self, ballots, present):
+        if self.try_handle_invalid:
+            # treat candidates missing from the ballots as most disliked, 
+            # then treat missing values as even more disliked
+            sign = -1 if self.reverse else 1
+            ballots[:, ~present] = sign*(np.fmax.reduce(
+                sign*ballots, axis=1, keepdims=True)+1)
+            ballots = np.where(np.isnan(ballots), sign*(np.fmax.reduce(
+                sign*ballots, axis=1, keepdims=True)+1), ballots)
+        missing = np.isnan(ballots).any(axis=1)
+        # flip the scores if the score is reversed
+        if self.reverse:
+            ballots = (ballots.max(axis=1, keepdims=True)+
+                       ballots.min(axis=1, keepdims=True)-ballots)
+        # converts scores to tiers, smaller numbered tier is always 
+        # preferred
+        if self.try_handle_invalid:
+            rank, sorted_rank = _Ranks(ballots, dense=True, 
+                                       bottom=self.allowed_tier+1)
+        else:
+            rank = ballots
+            sorted_rank = np.sort(rank, axis=1)
+        # check whether the tiers are integers, then whether every tier 
+        # down to the bottom one is used
+        rank, reasons = _ValidScores(rank, False, (-np.inf, np.inf))
+        reasons[(reasons=="") & 
+                ~_ValidRanks(sorted_rank, dense=True)] = "invalid_tier"
+        reasons[missing] = "missing"
+        return rank, reasons
+    
+    def ImportBallots(self, filename, chunk_size=None, progress=None, 
+                      weight_column=None, resume=False):
+        return super().ImportBallots(filename, chunk_size, progress, 
+                                     weight_column, resume)
         
-    def ExportBallots(self, filename):
-        return super().ExportBallots(filename)
+    def ExportBallots(self, filename, chunk_size=None, weight_column=None):
+        return super().ExportBallots(filename, chunk_size, weight_column)
+    
+    def CompactBallots(self):
+        return super().CompactBallots()
+    
+    def OpenBallotStore(self, path):
+        return super().OpenBallotStore(path)
+    
+    def SparseBallots(self):
+        return super().SparseBallots()
+    
+    def BallotView(self, values):
+        # the stored values are the ranks, already flipped and discretized
+        ballot = self.TierListBallot(pd.Series(values, index=self.candidates))
+        ballot.rank = ballot.scores
+        return ballot
     
-    def RunElection(self, candidates=None):
-        return super().RunElection(candidates)
+    def VoteMatrix(self, ballots, columns):
+        rank = ballots[:, columns]
+        best_rank = rank.min(axis=1, keepdims=True)
+        # vote 1 for candidates in the top tier and 0 for everyone else, or 0 
+        # for everyone if all candidates are in the last tier
+        return ((rank==best_rank) & 
+                (best_rank!=ballots.max(axis=1, keepdims=True))).astype(int)
+    
+    def PreferenceScores(self, ballots):
+        # smaller ranks are preferred
+        return -ballots
+    
+    def CloneBallots(self, ballots, weights, column, copies, rng):
+        return super().CloneBallots(ballots, weights, column, copies, rng)
+    
+    def Tally(self, candidates):
+        return super().Tally(candidates)
+    
+    def RunElection(self, candidates=None, workers=None):
+        return super().RunElection(candidates, workers)
     
     def SplitSize(self, num_candidates):
         return super().SplitSize(num_candidates)
     
-    def RunMultiWinnerElection(self, candidates=None):
-        return super().RunElection(candidates)
\ No newline at end of file
+    def RunMultiWinnerElection(self, candidates=None, workers=None):
+        return super().RunMultiWinnerElection(candidates, workers)
+    
+    def Bootstrap(self, replicates=1000, candidates=None, seed=None, 
+                  workers=None):
+        return super().Bootstrap(replicates, candidates, seed, workers)
+    
+    def SpoilerTest(self, clones=None, copies=1, candidates=None, seed=None, 
+                    workers=None):
+        return super().SpoilerTest(clones, copies, candidates, seed, workers)
+    
+    def PairwiseMatrix(self, candidates=None):
+        return super().PairwiseMatrix(candidates)
+    
+    def CondorcetWinner(self, candidates=None):
+        return super().CondorcetWinner(candidates)
+    
+    def CondorcetLoser(self, candidates=None):
+        return super().CondorcetLoser(candidates)
+    
+    def Profile(self, profiler=None):
+        return super().Profile(profiler)
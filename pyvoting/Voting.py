@@ -2,7 +2,18 @@
 author: Yichen Zhang
 """
 from abc import ABC
+import os
+import copy
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
+import numpy as np
+from BallotStore import BallotStore
+from MemmapBallotStore import MemmapBallotStore
+from SparseBallotStore import SparseBallotStore
+from ElectionCache import ElectionCache
+from WorkerPool import WorkerPool
+from ElectionProfiler import ElectionProfiler
 
 class Voting(ABC):
     """
@@ -84,15 +95,47 @@ class Voting(ABC):
         """
         self.candidates = candidates
         self.try_handle_invalid = try_handle_invalid
-        self.ballots = []
+        # valid ballots are kept as rows of one ballots-by-candidates matrix
+        # and only turned into Ballot objects when they are accessed
+        self.ballots = BallotStore(candidates, self.BallotView)
+        # results of RunElection on subsets of candidates, reused until the 
+        # ballots change
+        self.cache = ElectionCache()
+        # weighted number of ballots preferring each candidate to each other
+        # candidate, only counted once it is needed and then kept up to date
+        # as ballots are added
+        self.preferences = None
+        self.ballots.listeners.append(self._CountPreferences)
+        # worker processes sharing the ballots while an election runs with 
+        # workers
+        self.pool = None
+        # a thread pool from concurrent.futures that runs the upper bracket 
+        # of RunElection while this thread runs the lower bracket, if both 
+        # have at least bracket_min_size candidates
+        self.bracket_executor = None
+        self.bracket_min_size = 16
+        # the ElectionProfiler recording where the time goes while the 
+        # election is profiled
+        self.profiler = None
     
-    def AddBallot(self, new_ballot):
+    def __getstate__(self):
+        # executors, worker processes and profilers belong to the process 
+        # running them, so they are left out when the election is pickled
+        state = self.__dict__.copy()
+        state["bracket_executor"] = None
+        state["pool"] = None
+        state["profiler"] = None
+        return state
+    
+    def AddBallot(self, new_ballot, weight=1):
         """
         Adds a ballot to the election if it is valid. 
         
         Parameters
         new_ballot
             a representation of the ballot interpretable by this voting system
+        weight : float, default=1
+            number of voters casting this ballot, must be positive
         
         Returns
         bool
@@ -100,44 +143,782 @@ class Voting(ABC):
         """
         pass
     
-    def ImportBallots(self, filename):
+    def AddBallots(self, new_ballots, weights=None):
+        """
+        Adds a batch of ballots to the election, keeping the valid ones. 
+        The whole batch is validated at once with array operations, which is 
+        much faster than calling AddBallot on every ballot. 
+        
+        Parameters
+        new_ballots : pandas.DataFrame or numpy.ndarray
+            one ballot per row; the columns of a DataFrame are matched with 
+            the candidates by name and columns that are not candidates are 
+            ignored, the columns of an array are the candidates in the order 
+            specified in constructor
+        weights : str, float or array-like, default=None
+            number of voters casting each ballot, must be positive
+            if a string, the column of new_ballots holding the weights
+            if None, every ballot has weight 1
+        
+        Returns
+        (pandas.Series, pandas.Series)
+            a boolean Series indicating whether each ballot is valid and added 
+            successfully, and a Series of reason codes (such as "missing" or 
+            "out_of_range") for every rejected ballot, both indexed like the 
+            rows of new_ballots
+        """
+        new_ballots, weights = self._SplitWeights(new_ballots, weights)
+        ballots, present, non_numeric, index = self._BallotMatrix(new_ballots)
+        weights = np.broadcast_to(1.0 if weights is None else weights, 
+                                  len(ballots))
+        if type(self).ValidateBallots is Voting.ValidateBallots:
+            # voting systems without a vectorized validation fall back to 
+            # adding ballots one by one
+            reasons = np.full(len(ballots), "", dtype=object)
+            candidates = np.array(self.candidates, dtype=object)[present]
+            for i, row in enumerate(ballots):
+                if not _ValidWeights(weights[i]):
+                    reasons[i] = "invalid_weight"
+                elif (non_numeric[i] or 
+                      not self.AddBallot(pd.Series(row[present], 
+                                                   index=candidates), 
+                                         weights[i])):
+                    reasons[i] = "invalid"
+            accepted = reasons==""
+        else:
+            with self._Phase("validation"):
+                ballots, reasons = self.ValidateBallots(ballots, present)
+                reasons[~_ValidWeights(weights)] = "invalid_weight"
+                reasons[non_numeric] = "non_numeric"
+                accepted = reasons==""
+            with self._Phase("storage"):
+                self.ballots.Extend(ballots[accepted], weights[accepted])
+        return (pd.Series(accepted, index=index), 
+                pd.Series(reasons[~accepted], index=index[~accepted], 
+                          dtype=object))
+    
+    def ValidateBallots(self, ballots, present):
+        """
+        Checks a batch of ballots at once, the vectorized counterpart of 
+        Ballot.isValid. Ballots that seem invalid are fixed if 
+        try_handle_invalid is True. 
+        Voting systems that do not override this are validated one ballot at 
+        a time by AddBallot. 
+        
+        Parameters
+        ballots : numpy.ndarray
+            a 2D float array with one ballot per row and one column per 
+            candidate specified in constructor, NaN for missing values
+        present : numpy.ndarray
+            a boolean array indicating for each candidate whether the ballots 
+            had a value for it at all, as opposed to a missing value
+        
+        Returns
+        (numpy.ndarray, numpy.ndarray)
+            the ballots in the form to be stored, and a reason code for every 
+            ballot that is an empty string if the ballot is valid
+        """
+        pass
+    
+    def _SplitWeights(self, new_ballots, weights):
+        """
+        Separates the weights of a batch of ballots from the ballots. 
+        
+        Parameters
+        new_ballots : pandas.DataFrame, pyarrow.Table or numpy.ndarray
+            one ballot per row, as accepted by AddBallots
+        weights : str, float or array-like
+            the weights as accepted by AddBallots
+        
+        Returns
+        (pandas.DataFrame, pyarrow.Table or numpy.ndarray, numpy.ndarray)
+            the ballots without the weight column, and the weights as a float 
+            array or scalar, or None if not given
+        """
+        if weights is None:
+            return new_ballots, None
+        if isinstance(weights, str):
+            if _IsArrow(new_ballots):
+                column = new_ballots.column(weights).to_pandas()
+                new_ballots = new_ballots.select(
+                    [c for c in new_ballots.column_names if c!=weights])
+            else:
+                column = new_ballots[weights]
+                new_ballots = new_ballots.drop(columns=weights)
+            weights = pd.to_numeric(column, errors="coerce")
+        return new_ballots, np.asarray(weights, dtype=float)
+    
+    def _BallotMatrix(self, new_ballots):
+        """
+        Converts a batch of ballots into a float matrix aligned with the 
+        candidates. 
+        
+        Parameters
+        new_ballots : pandas.DataFrame, pyarrow.Table or numpy.ndarray
+            one ballot per row, as accepted by AddBallots
+        
+        Returns
+        (numpy.ndarray, numpy.ndarray, numpy.ndarray, pandas.Index)
+            the ballots with NaN for missing values, whether each candidate 
+            had a column, whether each ballot had non-numeric values, and the 
+            labels of the ballots
+        """
+        if (isinstance(new_ballots, np.ndarray) and 
+            np.issubdtype(new_ballots.dtype, np.number)):
+            ballots = np.array(new_ballots, dtype=float).reshape(
+                -1, len(self.candidates))
+            return (ballots, np.ones(len(self.candidates), dtype=bool), 
+                    np.zeros(len(ballots), dtype=bool), 
+                    pd.RangeIndex(len(ballots)))
+        if _IsArrow(new_ballots):
+            columns = new_ballots.column_names
+            index = pd.RangeIndex(new_ballots.num_rows)
+        else:
+            if not isinstance(new_ballots, pd.DataFrame):
+                new_ballots = pd.DataFrame(new_ballots, 
+                                           columns=self.candidates)
+            columns = new_ballots.columns
+            index = new_ballots.index
+        ballots = np.full((len(index), len(self.candidates)), np.nan)
+        present = np.zeros(len(self.candidates), dtype=bool)
+        non_numeric = np.zeros(len(index), dtype=bool)
+        for i, c in enumerate(self.candidates):
+            if c not in columns:
+                continue
+            present[i] = True
+            column = new_ballots[c]
+            if _IsArrow(column):
+                import pyarrow as pa
+                if (pa.types.is_integer(column.type) or 
+                    pa.types.is_floating(column.type)):
+                    # numeric Arrow columns are read from their buffers 
+                    # without going through pandas
+                    ballots[:, i] = column.to_numpy(zero_copy_only=False)
+                    continue
+                column = column.to_pandas()
+            values = pd.to_numeric(column, errors="coerce")
+            # values that exist but cannot be parsed as numbers
+            non_numeric |= (values.isna() & column.notna()).to_numpy()
+            ballots[:, i] = values.to_numpy(dtype=float, na_value=np.nan)
+        return ballots, present, non_numeric, index
+    
+    def ImportBallots(self, filename, chunk_size=None, progress=None, 
+                      weight_column=None, resume=False):
         """
-        Imports ballots from an excel spreadsheet to the election. 
+        Imports ballots from a file to the election. 
+        The format is determined by the file extension: .csv, .parquet, 
+        .arrow/.feather (Arrow IPC), and excel spreadsheets otherwise. 
         
         Parameters
         filename : str
             name of the ballot file to be imported, possibly the full path
+        chunk_size : int, default=None
+            if specified, the file is streamed and validated chunk_size rows 
+            at a time, so that memory usage stays bounded no matter how large 
+            the file is
+            if None, the whole file is read at once
+        progress : callable, default=None
+            called as progress(rows_read, ballots_added) after every chunk
+        weight_column : str, default=None
+            name of the column holding the weight of each ballot, every 
+            ballot has weight 1 if None
+        resume : bool, default=False
+            whether to skip the rows of the file read by an earlier import 
+            of it, such as one that was interrupted while adding ballots to 
+            a ballot store opened with OpenBallotStore
         
         Returns
         int
             number of valid ballots successfully added
         """
-        df = pd.read_excel(filename, index_col=0)
-        old_ballot_cnt = len(self.ballots)
-        for i in df.index:
-            self.AddBallot(df.loc[i])
-        return len(self.ballots)-old_ballot_cnt
+        source = os.path.abspath(filename)
+        skip = self.ballots.sources.get(source, 0) if resume else 0
+        rows_read = skip
+        ballots_added = 0
+        for chunk in self._ReadBallotChunks(filename, chunk_size):
+            if skip>0:
+                skipped = min(skip, len(chunk))
+                skip -= skipped
+                if skipped==len(chunk):
+                    continue
+                chunk = (chunk.slice(skipped) if _IsArrow(chunk) else 
+                         chunk.iloc[skipped:])
+            # the ballots of a chunk are stored together with the number of 
+            # rows read so far
+            with self.ballots.Batch():
+                accepted, reasons = self.AddBallots(chunk, weight_column)
+                rows_read += len(accepted)
+                self.ballots.sources[source] = rows_read
+            ballots_added += int(accepted.sum())
+            if progress is not None:
+                progress(rows_read, ballots_added)
+        return ballots_added
+    
+    def _ReadBallotChunks(self, filename, chunk_size):
+        """
+        Reads a ballot file in any supported format. 
+        
+        Parameters
+        filename : str
+            name of the ballot file to be read, possibly the full path
+        chunk_size : int
+            maximum number of rows in each chunk, or None to read the whole 
+            file as one chunk
+        
+        Returns
+        generator
+            chunks of ballots in a form accepted by AddBallots, either 
+            pandas.DataFrame or pyarrow tables, which are passed on without 
+            copying their numeric columns
+        """
+        file_format = _FileFormat(filename)
+        if file_format=="csv":
+            if chunk_size is None:
+                yield pd.read_csv(filename, index_col=0)
+            else:
+                yield from pd.read_csv(filename, index_col=0, 
+                                       chunksize=chunk_size)
+        elif file_format=="parquet":
+            import pyarrow.parquet as pq
+            parquet_file = pq.ParquetFile(filename)
+            if chunk_size is None:
+                yield parquet_file.read()
+            else:
+                yield from parquet_file.iter_batches(batch_size=chunk_size)
+        elif file_format=="arrow":
+            import pyarrow as pa
+            # memory-map the file so that record batches point directly 
+            # into the mapped pages
+            with pa.memory_map(str(filename)) as source:
+                reader = pa.ipc.open_file(source)
+                if chunk_size is None:
+                    yield reader.read_all()
+                    return
+                for i in range(reader.num_record_batches):
+                    batch = reader.get_batch(i)
+                    for start in range(0, batch.num_rows, chunk_size):
+                        yield batch.slice(start, chunk_size)
+        elif chunk_size is None:
+            yield pd.read_excel(filename, index_col=0)
+        else:
+            yield from self._ReadExcelChunks(filename, chunk_size)
+    
+    def _ReadExcelChunks(self, filename, chunk_size):
+        """
+        Streams an excel spreadsheet in the format written by ExportBallots. 
+        
+        Parameters
+        filename : str
+            name of the ballot file to be read, possibly the full path
+        chunk_size : int
+            maximum number of rows in each chunk
+        
+        Returns
+        generator
+            pandas.DataFrame chunks of at most chunk_size ballots, indexed by 
+            the first column of the spreadsheet
+        """
+        from openpyxl import load_workbook
+        workbook = load_workbook(filename, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            # the first column holds the index, just like index_col=0
+            columns = list(header[1:])
+            chunk = []
+            for row in rows:
+                chunk.append(row)
+                if len(chunk)==chunk_size:
+                    yield self._ExcelChunk(chunk, columns)
+                    chunk = []
+            if chunk:
+                yield self._ExcelChunk(chunk, columns)
+        finally:
+            workbook.close()
+    
+    def _ExcelChunk(self, rows, columns):
+        """
+        Turns rows streamed from a spreadsheet into a DataFrame. 
+        
+        Parameters
+        rows : list
+            tuples of cell values, the first one being the index
+        columns : list
+            names of the columns after the index column
+        
+        Returns
+        pandas.DataFrame
+            the rows, indexed by their first cell
+        """
+        df = pd.DataFrame([row[1:] for row in rows], columns=columns)
+        df.index = [row[0] for row in rows]
+        return df.infer_objects()
     
-    def ExportBallots(self, filename):
+    def ExportBallots(self, filename, chunk_size=None, weight_column=None):
         """
-        Exports all valid ballots in this election to an excel spreadsheet. 
+        Exports all valid ballots in this election to a file, in the format 
+        given by its extension just like ImportBallots. 
         
         Parameters
         filename : str
             name of the ballot file to be exported to, possibly the full path
+        chunk_size : int, default=None
+            if specified, ballots are converted and written to the file 
+            chunk_size at a time instead of all at once
+        weight_column : str, default=None
+            if specified, every stored ballot is written once with its weight 
+            in a column of this name, otherwise it is written as many times 
+            as its weight, which must then be an integer
         
         Returns
         int
             number of valid ballots successfully exported
         """
-        df = pd.DataFrame(columns=self.candidates)
-        for b in self.ballots:
-            df = pd.concat([df, b.Export(self.candidates).to_frame().T], 
-                           ignore_index=True)
-        df.to_excel(filename)
-        return df.shape[0]
+        return self._WriteBallots(
+            self._ExportChunks(chunk_size, weight_column), filename, 
+            chunk_size)
+    
+    def _ExportChunks(self, chunk_size, weight_column=None):
+        """
+        Converts the stored ballots to DataFrames to be exported. 
+        
+        Parameters
+        chunk_size : int
+            number of stored ballots in each DataFrame, all ballots are 
+            converted at once if None
+        weight_column : str, default=None
+            the same as in ExportBallots
+        
+        Returns
+        generator
+            DataFrames of consecutive ballots, one ballot per row and one 
+            column per candidate, indexed by the position of the ballot
+        """
+        # ballots are written as integers unless some value is fractional,
+        # decided once so that every chunk has the same column types
+        integral = all(np.array_equal(rows, np.round(rows)) 
+                       for rows in self.ballots.Chunks())
+        start = 0
+        for rows, weights in self._ExportRows(chunk_size, weight_column):
+            df = pd.DataFrame(rows.astype(int) if integral else rows, 
+                              index=pd.RangeIndex(start, start+len(rows)), 
+                              columns=self.candidates)
+            if weight_column is not None:
+                df[weight_column] = weights
+            yield df
+            start += len(rows)
+        if start==0:
+            # still write the header of an election without ballots
+            df = pd.DataFrame(np.zeros((0, len(self.candidates)), dtype=int), 
+                              columns=self.candidates)
+            if weight_column is not None:
+                df[weight_column] = np.zeros(0, dtype=int)
+            yield df
+    
+    def _ExportRows(self, chunk_size, weight_column):
+        """
+        Iterates over the stored ballots to be exported. 
+        
+        Parameters
+        chunk_size : int
+            number of stored ballots in each chunk, all ballots are in one 
+            chunk if None
+        weight_column : str
+            the same as in ExportBallots
+        
+        Returns
+        generator
+            (ballots, weights) tuples of consecutive ballots, where weights 
+            is None and every ballot is repeated as many times as its weight 
+            if weight_column is None
+        """
+        if weight_column is None and not self.ballots.integral_weights:
+            raise ValueError("ballots with fractional weights can only be "
+                             "exported with a weight_column")
+        chunk_size = chunk_size or max(len(self.ballots), 1)
+        for rows, weights in self.ballots.Chunks(chunk_size, weighted=True):
+            if weight_column is not None:
+                yield rows, weights
+            elif (weights==1).all():
+                yield rows, None
+            else:
+                yield np.repeat(rows, weights, axis=0), None
+    
+    def _WriteBallots(self, chunks, filename, chunk_size=None):
+        """
+        Writes ballots to a file in the format given by its extension, the 
+        same formats ImportBallots reads. The DataFrames are written one 
+        after another, so only one of them is in memory at a time. 
+        
+        Parameters
+        chunks : iterable
+            DataFrames of ballots to be written, one ballot per row, all with 
+            the same columns
+        filename : str
+            name of the ballot file to be written to, possibly the full path
+        chunk_size : int, default=None
+            if None, chunks holds a single DataFrame and excel spreadsheets 
+            are written by pandas, otherwise excel spreadsheets are streamed 
+            row by row in write-only mode
+        
+        Returns
+        int
+            number of ballots written
+        """
+        file_format = _FileFormat(filename)
+        ballot_cnt = 0
+        if file_format=="csv":
+            for i, df in enumerate(chunks):
+                df.to_csv(filename, mode="a" if i else "w", header=not i)
+                ballot_cnt += df.shape[0]
+        elif file_format in ("parquet", "arrow"):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            writer = None
+            try:
+                for df in chunks:
+                    table = pa.Table.from_pandas(df, preserve_index=False)
+                    if writer is None:
+                        if file_format=="parquet":
+                            writer = pq.ParquetWriter(filename, table.schema)
+                        else:
+                            writer = pa.ipc.new_file(filename, table.schema)
+                    writer.write_table(table)
+                    ballot_cnt += df.shape[0]
+            finally:
+                if writer is not None:
+                    writer.close()
+        elif chunk_size is None:
+            for df in chunks:
+                df.to_excel(filename)
+                ballot_cnt += df.shape[0]
+        else:
+            from openpyxl import Workbook
+            workbook = Workbook(write_only=True)
+            sheet = workbook.create_sheet()
+            header = False
+            for df in chunks:
+                if not header:
+                    sheet.append([None]+list(df.columns))
+                    header = True
+                for row in df.itertuples(name=None):
+                    sheet.append(row)
+                ballot_cnt += df.shape[0]
+            workbook.save(filename)
+        return ballot_cnt
+    
+    def CompactBallots(self):
+        """
+        Collapses identical ballots into a single weighted ballot, and keeps 
+        collapsing ballots added afterwards. This does not change any result, 
+        but when many voters cast the same ballots, it saves memory and makes 
+        every round of RunElection take time proportional to the number of 
+        distinct ballots rather than the number of voters. 
+        
+        Returns
+        int
+            number of distinct ballots
+        """
+        return self.ballots.Compact()
+    
+    def OpenBallotStore(self, path):
+        """
+        Keeps the ballots of the election on disk in a folder, where they are 
+        memory-mapped and streamed over chunk by chunk, so that the election 
+        can have more ballots than fit in memory. If the folder holds a 
+        ballot store already, its ballots are reopened at once without 
+        validating them again, which requires the same voting system and 
+        candidates. Ballots already added to the election are moved to the 
+        store. 
+        
+        Parameters
+        path : str
+            the folder holding the ballot store, created if it does not exist
+        
+        Returns
+        int
+            number of ballots stored
+        """
+        store = MemmapBallotStore(self.candidates, path, self.BallotView, 
+                                  self.ballots.chunk_size, 
+                                  type(self).__name__)
+        with store.Batch():
+            for rows, weights in self.ballots.Chunks(weighted=True):
+                store.Extend(rows, weights)
+        store.listeners = [self._CountPreferences]
+        self.ballots = store
+        # the pairwise preferences are counted again once they are needed
+        self.preferences = None
+        return len(store)
+    
+    def SparseBallots(self):
+        """
+        Stores every ballot as only the values that differ from the value 
+        shared by most of its candidates, such as the bottom rank or the 
+        score 0 given to candidates left off the ballot. This does not 
+        change any result, but when ballots only fill in a few of many 
+        candidates, it saves memory, and the rounds of RankedChoiceVoting 
+        take time proportional to the values filled in rather than to the 
+        ballots times the candidates. Ballots added afterwards are stored the 
+        same way. 
+        
+        Returns
+        int
+            number of values stored
+        """
+        if not isinstance(self.ballots, SparseBallotStore):
+            store = SparseBallotStore(self.candidates, self.BallotView)
+            for rows, weights in self.ballots.Chunks(weighted=True):
+                store.Extend(rows, weights)
+            store.listeners = [self._CountPreferences]
+            store.sources = dict(self.ballots.sources)
+            self.ballots = store
+        return self.ballots.entry_cnt
+    
+    def BallotView(self, values):
+        """
+        Presents a stored ballot as a Ballot object of this voting system. 
+        
+        Parameters
+        values : numpy.ndarray
+            a row of the ballot store, one value per candidate specified in 
+            constructor
+        
+        Returns
+        Voting.Ballot
+            a valid ballot that votes the same way as the stored row
+        """
+        return self.Ballot(pd.Series(values, index=self.candidates))
+    
+    def VoteMatrix(self, ballots, columns):
+        """
+        Expresses the opinions of a batch of stored ballots on the candidates, 
+        the vectorized counterpart of Ballot.Vote. 
+        The default implementation calls Vote on a view of every ballot, so 
+        voting systems should override it with an array operation. 
+        
+        Parameters
+        ballots : numpy.ndarray
+            a 2D array with one stored ballot per row and one column per 
+            candidate specified in constructor
+        columns : numpy.ndarray
+            column ids of an non-empty list of unique candidates
+        
+        Returns
+        numpy.ndarray
+            a 2D array with one row per ballot and one column per id in 
+            columns, row i being what Vote returns for ballot i
+        """
+        candidates = [self.candidates[i] for i in columns]
+        return np.array([self.BallotView(row).Vote(candidates)
+                         .loc[candidates].to_numpy() for row in ballots]
+                        ).reshape(len(ballots), len(columns))
+    
+    def PreferenceScores(self, ballots):
+        """
+        Expresses a batch of stored ballots as numbers that are greater for 
+        more preferred candidates, which is all that pairwise comparisons of 
+        the candidates need to know. 
+        The default implementation returns the stored values unchanged, so 
+        voting systems that store ranks should override it. 
+        
+        Parameters
+        ballots : numpy.ndarray
+            a 2D array with one stored ballot per row and one column per 
+            candidate specified in constructor
+        
+        Returns
+        numpy.ndarray
+            an array of the same shape as ballots
+        """
+        return ballots
+    
+    def CloneBallots(self, ballots, weights, column, copies, rng):
+        """
+        Adds duplicates of a candidate to a batch of stored ballots, which 
+        every voter prefers exactly as much as the candidate. 
+        The default implementation gives every duplicate the stored value of 
+        the candidate, so voting systems whose ballots cannot tie the 
+        duplicates should override it and break the tie by coin toss. 
+        
+        Parameters
+        ballots : numpy.ndarray
+            a 2D array with one stored ballot per row and one column per 
+            candidate specified in constructor
+        weights : numpy.ndarray
+            weight of each ballot
+        column : int
+            column id of the candidate to duplicate
+        copies : int
+            number of duplicates
+        rng : numpy.random.Generator
+            the coin tosses between the candidate and its duplicates
+        
+        Returns
+        (numpy.ndarray, numpy.ndarray)
+            the ballots with one more column for every duplicate, and their 
+            weights, where a ballot may be split into several ballots each 
+            cast by some of its voters
+        """
+        return (np.hstack([ballots, np.repeat(ballots[:, [column]], copies, 
+                                              axis=1)]), weights)
+    
+    def _PreferenceCounts(self, ballots, weights):
+        """
+        Counts the pairwise preferences of a batch of stored ballots. 
+        
+        Parameters
+        ballots : numpy.ndarray
+            a 2D array with one stored ballot per row and one column per 
+            candidate specified in constructor
+        weights : numpy.ndarray
+            weight of each ballot
+        
+        Returns
+        numpy.ndarray
+            a candidates-by-candidates float array whose entry (i, j) is the 
+            weighted number of ballots preferring candidate i to candidate j
+        """
+        scores = self.PreferenceScores(ballots)
+        n = len(self.candidates)
+        counts = np.zeros((n, n))
+        # both ways of counting are done in blocks of ballots to bound the 
+        # memory they take
+        block = max(1, 2**22//n)
+        pair_block = min(255, max(1, 2**22//(n*n)))
+        for start in range(0, len(scores), block):
+            s = scores[start:start+block]
+            w = np.asarray(weights[start:start+block], dtype=float)
+            levels = np.unique(s)
+            if len(levels)<=16:
+                # with few distinct values, such as integer scores, the ballots
+                # giving i a value times the ballots giving j less is a matrix
+                # product for each value
+                for level in levels[1:]:
+                    counts += ((s==level)*w[:, None]).T@(s<level).astype(float)
+            else:
+                # otherwise compare every pair of candidates on every ballot, 
+                # where ballots of weight 1 are counted in bytes first, which 
+                # is much faster, and moved to counts before they overflow
+                unit_counts = np.zeros((n, n), dtype=np.uint8)
+                unit_cnt = 0
+                for i in range(0, len(s), pair_block):
+                    t = s[i:i+pair_block]
+                    wins = t[:, :, None]>t[:, None, :]
+                    if (w[i:i+pair_block]==1).all():
+                        if unit_cnt+len(t)>255:
+                            counts += unit_counts
+                            unit_counts[:] = 0
+                            unit_cnt = 0
+                        np.add(unit_counts, wins.sum(axis=0, dtype=np.uint8), 
+                               out=unit_counts)
+                        unit_cnt += len(t)
+                    else:
+                        counts += np.tensordot(w[i:i+pair_block], wins, 
+                                               axes=1)
+                counts += unit_counts
+        return counts
+    
+    def _CountPreferences(self, ballots, weights):
+        """
+        Adds a batch of new ballots to the pairwise preference counts, if 
+        they have been counted already. This is called by the ballot store 
+        before it stores the ballots. 
+        
+        Parameters
+        ballots : numpy.ndarray
+            a 2D array with one stored ballot per row and one column per 
+            candidate specified in constructor
+        weights : numpy.ndarray
+            weight of each ballot
+        """
+        if self.preferences is not None:
+            with self._Phase("preferences"):
+                self.preferences += self._PreferenceCounts(ballots, weights)
+    
+    def _Preferences(self):
+        """
+        Returns
+        numpy.ndarray
+            the pairwise preference counts of all ballots, in the format of 
+            _PreferenceCounts, counted on the first call
+        """
+        if self.preferences is None:
+            n = len(self.candidates)
+            preferences = np.zeros((n, n))
+            with self._Phase("preferences"):
+                if self.pool is not None:
+                    with self._Phase("waiting"):
+                        counts = self.pool.Map("_PreferenceCounts")
+                else:
+                    counts = (self._PreferenceCounts(chunk, weights) for 
+                              chunk, weights in 
+                              self.ballots.Chunks(weighted=True))
+                for count in counts:
+                    preferences += count
+            self._Touch(len(self.ballots))
+            self.preferences = preferences
+        return self.preferences
+    
+    def Tally(self, candidates, **kwargs):
+        """
+        Adds up the votes of all ballots on the given candidates. 
+        
+        Parameters
+        candidates : list
+            an non-empty list of unique strings representing the candidates
+        **kwargs
+            extra arguments passed on to VoteMatrix
+        
+        Returns
+        pandas.Series
+            a Series of numeric values with candidates as the index, the 
+            weighted sum of every ballot's votes on the candidates
+        """
+        columns = self.ballots.Columns(candidates)
+        scores = np.zeros(len(candidates), dtype=int)
+        # one array reduction per chunk instead of one Series addition per 
+        # ballot, added up in the order of the chunks even if they are 
+        # reduced by worker processes
+        if self.pool is not None:
+            with self._Phase("waiting"):
+                votes = self.pool.Map("_TallyChunk", columns, kwargs)
+        else:
+            votes = (self._TallyChunk(chunk, weights, columns, kwargs) for 
+                     chunk, weights in self.ballots.Chunks(weighted=True))
+        for vote in votes:
+            scores = scores+vote
+        self._Touch(len(self.ballots))
+        return pd.Series(scores, index=candidates)
+    
+    def _TallyChunk(self, ballots, weights, columns, kwargs):
+        """
+        Adds up the votes of a chunk of stored ballots. 
+        
+        Parameters
+        ballots : numpy.ndarray
+            a 2D array with one stored ballot per row and one column per 
+            candidate specified in constructor
+        weights : numpy.ndarray
+            weight of each ballot
+        columns : numpy.ndarray
+            column ids of an non-empty list of unique candidates
+        kwargs : dict
+            extra arguments passed on to VoteMatrix
+        
+        Returns
+        numpy.ndarray
+            the weighted sum of the votes of the ballots on every candidate
+        """
+        with self._Phase("vote"):
+            votes = self.VoteMatrix(ballots, columns, **kwargs)
+        if (weights==1).all():
+            return votes.sum(axis=0)
+        return weights@votes
     
-    def RunElection(self, candidates=None):
+    def RunElection(self, candidates=None, workers=None):
         """
         Runs the election with the given candidates and get the results. 
         
@@ -145,6 +926,10 @@ class Voting(ABC):
         candidates : list, default=None
             a list of unique strings representing the candidates
             if None, all candidates specified in constructor will be included
+        workers : int, default=None
+            number of worker processes that go through the ballots in 
+            parallel, which gives exactly the same result
+            if None, the election runs in this process only
         
         Returns
         list
@@ -157,36 +942,152 @@ class Voting(ABC):
         """
         if candidates==None:
             candidates=self.candidates
+        if workers is not None and self.pool is None:
+            return self._RunWithWorkers(self.RunElection, workers, candidates)
         if candidates==[]:
             return []
+        result = self._CachedResult(candidates)
+        if result is not None:
+            return result
         # add up scores from all ballots
-        scores = pd.Series(data=0, index=candidates)
-        for b in self.ballots:
-            scores += b.Vote(candidates)
+        with self._Phase("tally"):
+            scores = self.Tally(candidates)
+        self._Round()
+        # scores that only differ by rounding errors tie
+        tied = pd.Series(_TieScores(scores.to_numpy()), index=scores.index)
         # if everyone ties for the first place, do not recurse anymore
-        if scores.max()==scores.min():
-            return [(c, 1, [(scores[c], "t")]) for c in candidates]
+        if tied.max()==tied.min():
+            return self._CacheResult(candidates, 
+                [(c, 1, [(scores[c], "t")]) for c in candidates])
         # split the candidates into an upper bracket and a lower bracket
-        scores.sort_values(inplace=True, ascending=False)
-        cutoff_rank = self.SplitSize(len(scores))
-        cutoff_score = (scores[cutoff_rank-1]+scores[cutoff_rank])/2
-        upper_bracket = [c for c in candidates if scores[c]>cutoff_score]
-        lower_bracket = [c for c in candidates if scores[c]<cutoff_score]
+        with self._Phase("sort"):
+            tied.sort_values(inplace=True, ascending=False)
+        cutoff_rank = self.SplitSize(len(tied))
+        cutoff_score = (tied.iloc[cutoff_rank-1]+tied.iloc[cutoff_rank])/2
+        upper_bracket = [c for c in candidates if tied[c]>cutoff_score]
+        lower_bracket = [c for c in candidates if tied[c]<cutoff_score]
         # add candidates with score equal to the cutoff to the smaller bracket
         # this ensures neither bracket is empty, thus preventing infinite
         # recursion
         if len(upper_bracket)<=len(lower_bracket):
-            upper_bracket += [c for c in candidates if scores[c]==cutoff_score]
+            upper_bracket += [c for c in candidates if tied[c]==cutoff_score]
         else:
-            lower_bracket += [c for c in candidates if scores[c]==cutoff_score]
+            lower_bracket += [c for c in candidates if tied[c]==cutoff_score]
         # recursively run elections on two groups of candidates, then merge
         result = []
-        upper_result = self.RunElection(upper_bracket)
-        lower_result = self.RunElection(lower_bracket)
+        with self._Depth():
+            upper_result, lower_result = self._RunBrackets(upper_bracket, 
+                                                           lower_bracket)
         for (c, r, l) in upper_result:
             result.append((c, r, [(scores[c], "u")]+l))
         for (c, r, l) in lower_result:
             result.append((c, r+len(upper_bracket), [(scores[c], "l")]+l))
+        return self._CacheResult(candidates, result)
+    
+    def _RunBrackets(self, upper_bracket, lower_bracket):
+        """
+        Runs the elections of the two brackets, at the same time if there is 
+        a bracket_executor and both brackets are big enough. 
+        
+        Parameters
+        upper_bracket : list
+            a list of unique strings representing the candidates
+        lower_bracket : list
+            a list of unique strings representing the candidates
+        
+        Returns
+        tuple
+            the results of RunElection on upper_bracket and lower_bracket
+        """
+        if (self.bracket_executor is None or 
+            min(len(upper_bracket), len(lower_bracket))<self.bracket_min_size):
+            return (self.RunElection(upper_bracket), 
+                    self.RunElection(lower_bracket))
+        # a bracket run in another process would get a pickled copy of the 
+        # whole election, ballots included, which costs more than the 
+        # bracket saves
+        if isinstance(self.bracket_executor, ProcessPoolExecutor):
+            raise ValueError("bracket_executor must run threads, use workers "
+                             "to split the ballots among processes")
+        future = self.bracket_executor.submit(self.RunElection, upper_bracket)
+        lower_result = self.RunElection(lower_bracket)
+        # if no worker of the executor has started on the upper bracket yet, 
+        # run it here rather than wait, so that brackets waiting for their 
+        # sub-brackets can never take up all the workers
+        if future.cancel():
+            return self.RunElection(upper_bracket), lower_result
+        return future.result(), lower_result
+    
+    def _RunWithWorkers(self, function, workers, *args):
+        """
+        Calls a function while a pool of worker processes shares the 
+        ballots, so that every tally done by the function is split among 
+        them. 
+        
+        Parameters
+        function : callable
+            the function to call
+        workers : int
+            number of worker processes
+        *args
+            arguments passed on to function
+        
+        Returns
+        object
+            what function returns
+        """
+        # the workers get this voting system without its ballots, which they 
+        # read from shared memory instead
+        voting = copy.copy(self)
+        voting.ballots = BallotStore(self.candidates)
+        voting.cache = ElectionCache(0)
+        voting.preferences = None
+        self.pool = WorkerPool(voting, self.ballots.Arrays(), 
+                               self.ballots.Weights(), 
+                               self.ballots.chunk_size, workers, 
+                               self.ballots.DenseRows)
+        try:
+            return function(*args)
+        finally:
+            self.pool.Close()
+            self.pool = None
+    
+    def _CachedResult(self, candidates):
+        """
+        Looks up a result of RunElection computed from the current ballots. 
+        A result computed for the same candidates in another order is reused 
+        unless the brackets are not split as the default SplitSize does, in 
+        which case the order of the candidates may affect the result. 
+        
+        Parameters
+        candidates : list
+            a list of unique strings representing the candidates
+        
+        Returns
+        list
+            the cached result in RunElection's return format, or None
+        """
+        version = (id(self.ballots), self.ballots.version)
+        ordered = self.SplitSize(len(candidates))!=len(candidates)-1
+        return self.cache.Get(candidates, version, ordered)
+    
+    def _CacheResult(self, candidates, result):
+        """
+        Caches a result of RunElection computed from the current ballots. 
+        
+        Parameters
+        candidates : list
+            a list of unique strings representing the candidates
+        result : list
+            the result in RunElection's return format
+        
+        Returns
+        list
+            result
+        """
+        version = (id(self.ballots), self.ballots.version)
+        ordered = self.SplitSize(len(candidates))!=len(candidates)-1
+        self.cache.Put(candidates, version, result, ordered)
         return result
     
     def SplitSize(self, num_candidates):
@@ -204,7 +1105,52 @@ class Voting(ABC):
         """
         return num_candidates-1
     
-    def RunMultiWinnerElection(self, candidates=None):
+    def _RankByScores(self, candidates, scores):
+        """
+        Builds the result of RunElection for a voting method whose scores do 
+        not change from round to round, such as when every ballot votes for 
+        a candidate regardless of the other candidates, using a single sort 
+        instead of one tally per round. It assumes the default SplitSize, 
+        with which every round moves the tied candidates with the lowest 
+        score to the lower bracket. 
+        
+        Parameters
+        candidates : list
+            a list of unique strings representing the candidates
+        scores : pandas.Series
+            the score of every candidate, indexed by candidates
+        
+        Returns
+        list
+            the same as RunElection
+        """
+        if candidates==[]:
+            return []
+        values = scores.loc[candidates].to_numpy()
+        tied = _TieScores(values)
+        # candidates with equal scores keep their order, just like the 
+        # brackets of RunElection do
+        with self._Phase("sort"):
+            order = np.argsort(-tied, kind="stable")
+        new_group = np.r_[True, tied[order[1:]]!=tied[order[:-1]]]
+        group = np.cumsum(new_group)-1
+        first = np.flatnonzero(new_group)
+        group_cnt = len(first)
+        # every round but the last eliminates a group of tied candidates
+        self._Round(group_cnt)
+        result = []
+        for i, g in zip(order, group):
+            s = values[i]
+            # the top group is in the upper bracket of every round, any 
+            # other group is in the upper bracket until it is the lowest one
+            if g==0:
+                log = [(s, "u")]*(group_cnt-1)+[(s, "t")]
+            else:
+                log = [(s, "u")]*(group_cnt-1-g)+[(s, "l"), (s, "t")]
+            result.append((candidates[i], int(first[g])+1, log))
+        return result
+    
+    def RunMultiWinnerElection(self, candidates=None, workers=None):
         """
         Runs a multi-winner election with the given candidates and get the 
         results. 
@@ -213,6 +1159,8 @@ class Voting(ABC):
         candidates : list, default=None
             a list of unique strings representing the candidates
             if None, all candidates specified in constructor will be included
+        workers : int, default=None
+            the same as in RunElection
         
         Returns
         list
@@ -225,6 +1173,9 @@ class Voting(ABC):
         """
         if candidates==None:
             candidates=self.candidates
+        if workers is not None and self.pool is None:
+            return self._RunWithWorkers(self.RunMultiWinnerElection, workers, 
+                                        candidates)
         results = []
         while candidates!=[]:
             res = self.RunElection(candidates)
@@ -234,3 +1185,623 @@ class Voting(ABC):
             # exclude candidates that had won
             candidates = [c for (c, r, l) in res if r>1]
         return results
+    
+    def Bootstrap(self, replicates=1000, candidates=None, seed=None, 
+                  workers=None):
+        """
+        Estimates how robust the result of the election is by resampling 
+        the voters. In every bootstrap replicate, each ballot is cast by a 
+        random number of voters drawn from a Poisson distribution whose 
+        mean is its weight, and the election is run again. The replicates 
+        are weight vectors over the stored ballots, so no ballot is copied 
+        or validated again. They are drawn and added up in blocks, and when 
+        the result follows from the running totals alone, such as in 
+        PluralityVoting, a block is ranked all at once from its totals. 
+        
+        Parameters
+        replicates : int, default=1000
+            number of bootstrap replicates
+        candidates : list, default=None
+            a list of unique strings representing the candidates
+            if None, all candidates specified in constructor will be included
+        seed : int, default=None
+            seed of the random numbers, so that the same seed gives the same 
+            estimates whatever the number of workers
+        workers : int, default=None
+            number of worker processes the replicates are split among
+            if None, all replicates run in this process
+        
+        Returns
+        pandas.DataFrame
+            the fraction of replicates in which each candidate finished at 
+            each rank, with candidates as the index and the ranks from 1 as 
+            the columns
+        """
+        if candidates==None:
+            candidates=self.candidates
+        # every block of replicates draws its own random numbers, and blocks 
+        # only depend on the number of ballots, which is what makes the 
+        # estimates independent of how the blocks are split among workers
+        entropy = np.random.SeedSequence(seed).entropy
+        block = max(1, 2**22//max(len(self.ballots), 1))
+        blocks = np.arange(-(-replicates//block))
+        if workers is None:
+            counts = self._BootstrapCounts(blocks, block, replicates, 
+                                           candidates, entropy)
+        else:
+            shards = [shard for shard in np.array_split(blocks, workers) 
+                      if len(shard)>0]
+            with ProcessPoolExecutor(workers) as executor:
+                futures = [executor.submit(self._BootstrapCounts, shard, 
+                                           block, replicates, candidates, 
+                                           entropy) 
+                           for shard in shards]
+                with self._Phase("waiting"):
+                    counts = sum(future.result() for future in futures)
+        return pd.DataFrame(counts/max(replicates, 1), index=candidates, 
+                            columns=range(1, len(candidates)+1))
+    
+    def _BootstrapCounts(self, blocks, block, replicates, candidates, 
+                         entropy):
+        """
+        Runs some blocks of bootstrap replicates of the election. 
+        
+        Parameters
+        blocks : numpy.ndarray
+            the ids of the blocks, which seed their random numbers
+        block : int
+            number of replicates in every block but the last one
+        replicates : int
+            number of replicates in all blocks
+        candidates : list
+            a list of unique strings representing the candidates
+        entropy : int
+            the entropy of the random numbers of all replicates
+        
+        Returns
+        numpy.ndarray
+            a candidates-by-ranks integer array counting the replicates in 
+            which each candidate finished at each rank
+        """
+        position = {c: i for i, c in enumerate(candidates)}
+        counts = np.zeros((len(candidates), len(candidates)), dtype=int)
+        weights = self.ballots.weights[:len(self.ballots)]
+        columns = self.ballots.Columns(candidates)
+        for b in blocks:
+            # about 32MB of weights, one row per replicate
+            rng = np.random.default_rng(np.random.SeedSequence(
+                entropy, spawn_key=(int(b),)))
+            draws = rng.poisson(weights, (min(block, replicates-b*block), 
+                                          len(weights))).astype(float)
+            with self._Phase("tally"):
+                totals = self.ballots.WeightedTotals(draws)
+            if self._RanksByTotals() and len(candidates)>0:
+                # scores that only differ by rounding errors tie, as in 
+                # _RankByScores
+                with self._Phase("sort"):
+                    ranks = _Ranks(-_TieScores(totals[:, columns]))[0]
+                ids = np.arange(len(candidates))*len(candidates)+ranks-1
+                counts += np.bincount(ids.astype(int).ravel(), 
+                                      minlength=counts.size
+                                      ).reshape(counts.shape)
+                continue
+            for draw, total in zip(draws, totals):
+                replicate = copy.copy(self)
+                replicate.ballots = self.ballots.Reweighted(draw, total)
+                replicate.cache = ElectionCache()
+                replicate.preferences = None
+                for (c, r, l) in replicate.RunElection(candidates):
+                    counts[position[c], r-1] += 1
+        return counts
+    
+    def _RanksByTotals(self):
+        """
+        Tells whether RunElection ranks the candidates by the running totals 
+        of the ballot store in a single sort, so that Bootstrap can rank its 
+        replicates straight from their totals without running elections. 
+        
+        Returns
+        bool
+            False unless a voting system says otherwise
+        """
+        return False
+    
+    def SpoilerTest(self, clones=None, copies=1, candidates=None, seed=None, 
+                    workers=None):
+        """
+        Measures the spoiler effect defined in section 2.3 on this election. 
+        For every candidate in clones and every number of copies, the 
+        election is run again with that many duplicates of the candidate, 
+        which every voter prefers exactly as much as the candidate, and a 
+        duplicate is worse off if the candidate used to beat another 
+        candidate that it no longer beats. The ballots of every election 
+        with duplicates are built from the stored ballots a chunk at a time 
+        by CloneBallots, without validating them again. 
+        
+        Parameters
+        clones : list, default=None
+            a list of unique strings representing the candidates to duplicate
+            if None, every candidate in candidates is duplicated in turn
+        copies : int or list, default=1
+            number of duplicates, or a list of numbers of duplicates to try 
+            one after another
+        candidates : list, default=None
+            a list of unique strings representing the candidates
+            if None, all candidates specified in constructor will be included
+        seed : int, default=None
+            seed of the coin tosses between duplicates, so that the same seed 
+            gives the same results whatever the number of workers
+        workers : int, default=None
+            number of worker processes the elections with duplicates are 
+            split among
+            if None, all of them run in this process
+        
+        Returns
+        pandas.DataFrame
+            one row for every candidate and number of copies, indexed by 
+            both, with the columns "rank", the rank of the candidate without 
+            duplicates, "best_rank", the best rank of the candidate and its 
+            duplicates, "worse_off", how many of them are worse off, 
+            "spoiler_proof", whether none of them is worse off, and 
+            "semi_spoiler_proof", whether not all of them are
+        """
+        if candidates==None:
+            candidates=self.candidates
+        if clones is None:
+            clones = candidates
+        if np.ndim(copies)==0:
+            copies = [copies]
+        variants = [(c, int(k)) for c in clones for k in copies]
+        for c, k in variants:
+            if c not in candidates:
+                raise ValueError(f"{c} is not one of the candidates")
+            if k<0:
+                raise ValueError("the number of copies must not be negative")
+            if set(_CloneNames(c, k))&set(self.candidates):
+                raise ValueError(f"the duplicates of {c} would be named "
+                                 "after other candidates")
+        rank = {c: r for (c, r, l) in self.RunElection(candidates)}
+        # every election draws its own random numbers, which is what makes 
+        # the results independent of how the elections are split
+        entropy = np.random.SeedSequence(seed).entropy
+        if workers is None:
+            rows = self._SpoilerRows(np.arange(len(variants)), variants, 
+                                     candidates, rank, entropy)
+        else:
+            shards = [shard for shard in 
+                      np.array_split(np.arange(len(variants)), workers) 
+                      if len(shard)>0]
+            with ProcessPoolExecutor(workers) as executor:
+                futures = [executor.submit(self._SpoilerRows, shard, 
+                                           variants, candidates, rank, 
+                                           entropy) 
+                           for shard in shards]
+                with self._Phase("waiting"):
+                    rows = [row for future in futures 
+                            for row in future.result()]
+        return pd.DataFrame(rows, index=pd.MultiIndex.from_tuples(
+                                variants, names=["candidate", "copies"]), 
+                            columns=["rank", "best_rank", "worse_off", 
+                                     "spoiler_proof", "semi_spoiler_proof"])
+    
+    def _SpoilerRows(self, variant_ids, variants, candidates, rank, entropy):
+        """
+        Runs some elections with duplicates of a candidate. 
+        
+        Parameters
+        variant_ids : numpy.ndarray
+            positions in variants of the elections to run, which seed their 
+            random numbers
+        variants : list
+            (candidate, copies) tuples of all elections with duplicates
+        candidates : list
+            a list of unique strings representing the candidates
+        rank : dict
+            the rank of every candidate without duplicates
+        entropy : int
+            the entropy of the random numbers of all elections
+        
+        Returns
+        list
+            a row of the result of SpoilerTest for every election
+        """
+        rows = []
+        for i in variant_ids:
+            c, k = variants[i]
+            rng = np.random.default_rng(np.random.SeedSequence(
+                entropy, spawn_key=(int(i),)))
+            names = _CloneNames(c, k)
+            variant = copy.copy(self)
+            variant.candidates = list(self.candidates)+names
+            if isinstance(self.ballots, MemmapBallotStore):
+                # the ballots with duplicates are only needed for a single 
+                # election, so they are kept in memory
+                variant.ballots = BallotStore(variant.candidates, 
+                                              variant.BallotView)
+            else:
+                variant.ballots = type(self.ballots)(variant.candidates, 
+                                                     variant.BallotView)
+            variant.cache = ElectionCache()
+            variant.preferences = None
+            column = self.ballots.Columns([c])[0]
+            for ballots, weights in self.ballots.Chunks(weighted=True):
+                variant.ballots.Extend(*self.CloneBallots(ballots, weights, 
+                                                          column, k, rng))
+            new_rank = {d: r for (d, r, l) in 
+                        variant.RunElection(list(candidates)+names)}
+            # a duplicate is worse off if it no longer beats a candidate the 
+            # original candidate used to beat
+            beaten = [d for d in candidates if rank[d]>rank[c]]
+            worse_off = sum(any(new_rank[m]>=new_rank[d] for d in beaten) 
+                            for m in [c]+names)
+            rows.append((rank[c], min(new_rank[m] for m in [c]+names), 
+                         worse_off, worse_off==0, worse_off<=k))
+        return rows
+    
+    def PairwiseMatrix(self, candidates=None):
+        """
+        Counts the head-to-head preferences between every pair of candidates. 
+        The counts are computed from all ballots the first time they are 
+        needed and then kept up to date as ballots are added. 
+        
+        Parameters
+        candidates : list, default=None
+            a list of unique strings representing the candidates
+            if None, all candidates specified in constructor will be included
+        
+        Returns
+        pandas.DataFrame
+            a DataFrame with candidates as both its index and its columns, 
+            where the entry at row a and column b is the weighted number of 
+            ballots preferring candidate a to candidate b
+        """
+        if candidates==None:
+            candidates=self.candidates
+        columns = self.ballots.Columns(candidates)
+        preferences = self._Preferences()[np.ix_(columns, columns)]
+        if self.ballots.integral_weights:
+            preferences = preferences.astype(int)
+        return pd.DataFrame(preferences, index=candidates, columns=candidates)
+    
+    def CondorcetWinner(self, candidates=None):
+        """
+        Finds the candidate preferred to every other candidate by more voters 
+        than the other way around, if there is one. 
+        
+        Parameters
+        candidates : list, default=None
+            a list of unique strings representing the candidates
+            if None, all candidates specified in constructor will be included
+        
+        Returns
+        str
+            the Condorcet winner, or None if there is none
+        """
+        preferences = self.PairwiseMatrix(candidates)
+        counts = preferences.to_numpy()
+        wins = (counts>counts.T).sum(axis=1)
+        winners = np.flatnonzero(wins==len(wins)-1)
+        if len(winners)==0:
+            return None
+        return preferences.index[winners[0]]
+    
+    def CondorcetLoser(self, candidates=None):
+        """
+        Finds the candidate to whom every other candidate is preferred by more 
+        voters than the other way around, if there is one. 
+        
+        Parameters
+        candidates : list, default=None
+            a list of unique strings representing the candidates
+            if None, all candidates specified in constructor will be included
+        
+        Returns
+        str
+            the Condorcet loser, or None if there is none
+        """
+        preferences = self.PairwiseMatrix(candidates)
+        counts = preferences.to_numpy()
+        losses = (counts<counts.T).sum(axis=1)
+        losers = np.flatnonzero(losses==len(losses)-1)
+        if len(losers)==0:
+            return None
+        return preferences.index[losers[0]]
+    
+    @contextlib.contextmanager
+    def Profile(self, profiler=None):
+        """
+        Profiles what the election does inside a with statement, such as 
+        adding ballots or running elections. 
+        
+        Parameters
+        profiler : ElectionProfiler, default=None
+            the profiler to record into, a new one if None
+        
+        Returns
+        context manager
+            gives the ElectionProfiler, whose Report sums up where the time 
+            went once the with statement exits
+        """
+        if profiler is None:
+            profiler = ElectionProfiler()
+        previous, self.profiler = self.profiler, profiler
+        storage, profiler.storage = profiler.storage, self.ballots.Bytes
+        profiler.Storage(self.ballots.Bytes())
+        try:
+            yield profiler
+        finally:
+            profiler.Storage(self.ballots.Bytes())
+            profiler.storage = storage
+            self.profiler = previous
+    
+    def _Phase(self, name):
+        """
+        Times a phase of the election if it is profiled. 
+        
+        Parameters
+        name : str
+            name of the phase, one of ElectionProfiler.PHASES
+        
+        Returns
+        context manager
+            ends the phase on exit, does nothing if the election is not 
+            profiled
+        """
+        if self.profiler is None:
+            return _NOT_PROFILED
+        return self.profiler.Phase(name)
+    
+    def _Depth(self):
+        """
+        Returns
+        context manager
+            counts a level of recursion if the election is profiled
+        """
+        if self.profiler is None:
+            return _NOT_PROFILED
+        return self.profiler.Depth()
+    
+    def _Touch(self, ballots):
+        """
+        Records ballots touched in the current round if the election is 
+        profiled. 
+        
+        Parameters
+        ballots : int
+            number of ballots touched
+        """
+        if self.profiler is not None:
+            self.profiler.Touch(ballots)
+    
+    def _Round(self, count=1):
+        """
+        Ends rounds of the election if it is profiled. 
+        
+        Parameters
+        count : int, default=1
+            number of rounds
+        """
+        if self.profiler is not None:
+            self.profiler.Round(count)
+
+# the context used instead of a phase when the election is not profiled
+_NOT_PROFILED = contextlib.nullcontext()
+
+def _ValidWeights(weights):
+    """
+    Checks whether ballot weights are positive finite numbers. 
+    
+    Parameters
+    weights : float or numpy.ndarray
+        the weights to check
+    
+    Returns
+    bool or numpy.ndarray
+        whether each weight is valid
+    """
+    weights = np.asarray(weights, dtype=float)
+    return np.isfinite(weights) & (weights>0)
+
+def _ValidScores(ballots, try_handle_invalid=True, score_range=(0, 5), 
+                 only_int=True):
+    """
+    Validates a batch of score ballots, repairing them first if specified 
+    to. 
+    
+    Parameters
+    ballots : numpy.ndarray
+        the scores of the ballots, one row per ballot, repaired in place
+    try_handle_invalid : bool, default=True
+        whether to fill missing scores with 0, put out-of-bound scores into 
+        the valid range, and round non-integers if necessary
+    score_range : (float, float), default=(0, 5)
+        the lowest and highest valid score
+    only_int : bool, default=True
+        whether the scores must be integers
+    
+    Returns
+    (numpy.ndarray, numpy.ndarray)
+        the repaired scores, and the reason code for rejecting each ballot, 
+        or an empty string if it is valid
+    """
+    reasons = np.full(len(ballots), "", dtype=object)
+    if try_handle_invalid:
+        # fill missing values with 0
+        ballots[np.isnan(ballots)] = 0
+        # put out-of-bound scores into the valid range
+        np.clip(ballots, score_range[0], score_range[1], out=ballots)
+        # round non-integers, if necessary
+        if only_int:
+            np.round(ballots, out=ballots)
+    # check whether the ballots satisfy the constraints
+    if only_int:
+        reasons[(ballots!=np.round(ballots)).any(axis=1)] = "non_integer"
+    reasons[((ballots<score_range[0]) | 
+             (ballots>score_range[1])).any(axis=1)] = "out_of_range"
+    reasons[np.isnan(ballots).any(axis=1)] = "missing"
+    return ballots, reasons
+
+def _Ranks(scores, dense=False, bottom=None):
+    """
+    Converts scores to ranks for a batch of ballots, sorting each ballot 
+    only once. The smallest score is ranked 1, and tied scores share the 
+    best of their ranks, so that a rank is skipped after every tie. 
+    
+    Parameters
+    scores : numpy.ndarray
+        the scores of the ballots, one row per ballot
+    dense : bool, default=False
+        if set to True, ranks tiers instead: tied scores share a tier and 
+        no tier is skipped
+    bottom : int, default=None
+        if specified, ranks below it are moved up to it
+    
+    Returns
+    (numpy.ndarray, numpy.ndarray)
+        the ranks, and the ranks of each ballot in ascending order
+    """
+    order = np.argsort(scores, axis=1, kind="stable")
+    sorted_scores = np.take_along_axis(scores, order, axis=1)
+    # whether each sorted score differs from the one before it
+    new = np.ones(scores.shape, dtype=bool)
+    new[:, 1:] = sorted_scores[:, 1:]!=sorted_scores[:, :-1]
+    if dense:
+        sorted_rank = np.cumsum(new, axis=1)
+    else:
+        # a tied score takes the position where its tie starts
+        sorted_rank = np.maximum.accumulate(
+            np.where(new, np.arange(1, scores.shape[1]+1), 0), axis=1)
+    if bottom is not None:
+        np.minimum(sorted_rank, bottom, out=sorted_rank)
+    rank = np.empty(scores.shape)
+    np.put_along_axis(rank, order, sorted_rank, axis=1)
+    return rank, sorted_rank.astype(float)
+
+def _ValidRanks(sorted_rank, dense=False):
+    """
+    Checks the ranks of a batch of ballots: only the bottom rank can be 
+    shared, and every rank above it is used exactly once. 
+    
+    Parameters
+    sorted_rank : numpy.ndarray
+        the ranks of each ballot in ascending order, one row per ballot
+    dense : bool, default=False
+        if set to True, checks tiers instead: any tier can be shared, and 
+        every tier down to the bottom one is used
+    
+    Returns
+    numpy.ndarray
+        whether the ranks of each ballot are valid
+    """
+    bottom = sorted_rank[:, -1:]
+    changes = sorted_rank[:, 1:]!=sorted_rank[:, :-1]
+    if dense:
+        valid = 1+changes.sum(axis=1)==bottom[:, 0]
+    else:
+        tied = (~changes & (sorted_rank[:, 1:]<bottom)).any(axis=1)
+        valid = ~tied & ((sorted_rank<bottom).sum(axis=1)==bottom[:, 0]-1)
+    return valid & (sorted_rank[:, 0]>=1)
+
+def _TieScores(scores):
+    """
+    Snaps scores that only differ by rounding errors to the same value, so 
+    that whether candidates tie does not depend on the order in which their 
+    votes were added up. Scores closer than a billionth of the largest one 
+    are tied, and a group of tied scores takes the greatest of them. 
+    
+    Parameters
+    scores : numpy.ndarray
+        the scores of the candidates, or a 2D array with the scores of one 
+        election per row
+    
+    Returns
+    numpy.ndarray
+        the scores to compare, which are the given scores unless they are 
+        floats
+    """
+    scores = np.asarray(scores)
+    if not np.issubdtype(scores.dtype, np.floating) or scores.size==0:
+        return scores
+    order = np.argsort(-scores, axis=-1, kind="stable")
+    sorted_scores = np.take_along_axis(scores, order, axis=-1)
+    tolerance = 1e-9*np.maximum(1, np.abs(scores).max(axis=-1, 
+                                                      keepdims=True))
+    new = np.ones(scores.shape, dtype=bool)
+    new[..., 1:] = sorted_scores[..., :-1]-sorted_scores[..., 1:]>tolerance
+    # the position where the group of every sorted score starts
+    start = np.maximum.accumulate(
+        np.where(new, np.arange(scores.shape[-1]), 0), axis=-1)
+    tied = np.empty_like(scores)
+    np.put_along_axis(tied, order, np.take_along_axis(sorted_scores, start, 
+                                                      axis=-1), axis=-1)
+    return tied
+
+def _CloneNames(candidate, copies):
+    """
+    Names the duplicates of a candidate in SpoilerTest. 
+    
+    Parameters
+    candidate : str
+        the candidate to duplicate
+    copies : int
+        number of duplicates
+    
+    Returns
+    list
+        the names of the duplicates
+    """
+    return [f"{candidate} ({i})" for i in range(1, copies+1)]
+
+def _SplitVoters(weights, sides, rng):
+    """
+    Splits the voters of every ballot among some equally likely choices by 
+    coin toss. 
+    
+    Parameters
+    weights : numpy.ndarray
+        weight of each ballot
+    sides : int
+        number of choices
+    rng : numpy.random.Generator
+        the coin tosses
+    
+    Returns
+    numpy.ndarray
+        a ballots-by-choices array of the weight of every ballot given to 
+        every choice, a random number of voters if the weight is an integer 
+        and an even share of it otherwise
+    """
+    weights = np.asarray(weights, dtype=float)
+    shares = np.repeat(weights[:, np.newaxis]/sides, sides, axis=1)
+    whole = weights==np.round(weights)
+    shares[whole] = rng.multinomial(weights[whole].astype(np.int64), 
+                                    np.full(sides, 1/sides))
+    return shares
+
+def _IsArrow(data):
+    """
+    Checks whether data is a pyarrow Table, RecordBatch or array, without 
+    importing pyarrow. 
+    """
+    return type(data).__module__.startswith("pyarrow")
+
+def _FileFormat(filename):
+    """
+    Determines the format of a ballot file from its extension. 
+    
+    Parameters
+    filename : str
+        name of the ballot file, possibly the full path
+    
+    Returns
+    str
+        "csv", "parquet", "arrow" or "excel"
+    """
+    extension = str(filename).lower().rsplit(".", 1)[-1]
+    if extension=="csv":
+        return "csv"
+    if extension in ("parquet", "pq"):
+        return "parquet"
+    if extension in ("arrow", "feather", "ipc"):
+        return "arrow"
+    return "excel"
\ No newline at end of file
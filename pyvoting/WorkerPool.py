@@ -0,0 +1,159 @@
+"""
+author: Yichen Zhang
+"""
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+
+class WorkerPool:
+    """
+    Worker Pool Class
+    Runs the work an election does on every chunk of ballots in worker
+    processes. The ballots and their weights are placed in shared memory
+    once, so a task only names a method and the chunks to call it on, and
+    the workers read the ballots in place instead of receiving copies. The
+    results come back one per chunk in the order of the chunks, so adding
+    them up in that order gives exactly the same numbers as going through
+    the chunks in a single process. 
+    """
+    
+    def __init__(self, voting, arrays, weights, chunk_size, workers, 
+                 dense_rows):
+        """
+        Starts the worker processes. 
+        
+        Parameters
+        voting : Voting
+            the voting system whose methods are called, without its ballots,
+            as it is copied to every worker
+        arrays : tuple
+            the arrays holding the stored ballots, as returned by 
+            BallotStore.Arrays
+        weights : numpy.ndarray
+            weight of each ballot
+        chunk_size : int
+            number of ballots in each chunk
+        workers : int
+            number of worker processes
+        dense_rows : callable
+            the DenseRows function of the ballot store, which reads chunks 
+            of ballots from the arrays
+        """
+        self.size = len(weights)
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.blocks = []
+        shared_arrays = []
+        for array in arrays+(weights,):
+            if isinstance(array, np.memmap) and array.filename is not None:
+                # ballots kept in a file are mapped by the workers as well 
+                # instead of being copied
+                shared_arrays.append((None, array.filename, array.offset, 
+                                      array.shape, array.dtype.str))
+                continue
+            # shared memory cannot be empty
+            block = SharedMemory(create=True, size=max(1, array.nbytes))
+            shared = np.ndarray(array.shape, array.dtype, buffer=block.buf)
+            shared[...] = array
+            self.blocks.append(block)
+            shared_arrays.append((block.name, None, 0, array.shape, 
+                                  array.dtype.str))
+        self.executor = ProcessPoolExecutor(workers, initializer=_StartWorker,
+                                            initargs=(voting, shared_arrays, 
+                                                      dense_rows))
+    
+    def Map(self, method, *args):
+        """
+        Calls a method of the voting system on every chunk of ballots,
+        splitting the chunks evenly among the workers. 
+        
+        Parameters
+        method : str
+            name of a method taking a chunk of ballots, their weights, and
+            args
+        *args
+            extra arguments passed on to the method
+        
+        Returns
+        list
+            the return values of the method on every chunk, in the order of
+            the chunks
+        """
+        starts = list(range(0, self.size, self.chunk_size))
+        shards = [shard for shard in np.array_split(starts, self.workers)
+                  if len(shard)>0]
+        futures = [self.executor.submit(_RunShard, method, shard.tolist(),
+                                        self.chunk_size, args)
+                   for shard in shards]
+        return [value for future in futures for value in future.result()]
+    
+    def Close(self):
+        """
+        Stops the worker processes and frees the shared memory. 
+        """
+        self.executor.shutdown()
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+# the voting system and the shared ballots of a worker process
+_worker = {}
+
+def _StartWorker(voting, arrays, dense_rows):
+    """
+    Attaches a new worker process to the shared ballots. 
+    
+    Parameters
+    voting : Voting
+        the voting system whose methods are called
+    arrays : list
+        (shared memory name, file name, offset, shape, dtype) of the arrays 
+        holding the ballots and of their weights, where either name is None
+    dense_rows : callable
+        the same as in WorkerPool
+    """
+    _worker["voting"] = voting
+    _worker["dense_rows"] = dense_rows
+    # keep the blocks referenced for as long as the arrays are used
+    _worker["blocks"] = []
+    _worker["arrays"] = []
+    for name, filename, offset, shape, dtype in arrays:
+        if filename is not None:
+            array = np.memmap(filename, np.dtype(dtype), mode="r", 
+                              offset=offset, shape=shape)
+        else:
+            block = SharedMemory(name=name)
+            _worker["blocks"].append(block)
+            array = np.ndarray(shape, np.dtype(dtype), buffer=block.buf)
+            array.flags.writeable = False
+        _worker["arrays"].append(array)
+
+def _RunShard(method, starts, chunk_size, args):
+    """
+    Calls a method of the voting system on some chunks of the shared
+    ballots. 
+    
+    Parameters
+    method : str
+        the same as in WorkerPool.Map
+    starts : list
+        position of the first ballot of every chunk
+    chunk_size : int
+        number of ballots in each chunk
+    args : tuple
+        extra arguments passed on to the method
+    
+    Returns
+    list
+        the return values of the method on every chunk
+    """
+    *arrays, weights = _worker["arrays"]
+    function = getattr(_worker["voting"], method)
+    values = []
+    for start in starts:
+        stop = min(start+chunk_size, len(weights))
+        rows = _worker["dense_rows"](arrays, start, stop, 
+                                     len(_worker["voting"].candidates))
+        values.append(function(rows, weights[start:stop], *args))
+    return values
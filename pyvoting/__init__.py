@@ -1,10 +1,19 @@
-from Voting import Voting
-from PluralityVoting import PluralityVoting
-from ApprovalVoting import ApprovalVoting
-from ScoreVoting import ScoreVoting
-from STARVoting import STARVoting
-from RankedChoiceVoting import RankedChoiceVoting
-from TierListVoting import TierListVoting
-from TieredPopularityVoting import TieredPopularityVoting
-from NormalizedScoreVoting import NormalizedScoreVoting
-from StandardizedScoreVoting import StandardizedScoreVoting
\ No newline at end of file
+import importlib
+
+# the voting classes are imported on first access, so that importing the 
+# package alone does not import pandas and numpy
+__all__ = ["Voting", "PluralityVoting", "ApprovalVoting", "ScoreVoting", 
+           "STARVoting", "RankedChoiceVoting", "TierListVoting", 
+           "TieredPopularityVoting", "NormalizedScoreVoting", 
+           "StandardizedScoreVoting", "RoundRobinVoting", "SchulzeVoting", 
+           "LiveElection", "ElectionProfiler"]
+
+def __getattr__(name):
+    if name in __all__:
+        value = getattr(importlib.import_module(name), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(set(globals())|set(__all__))
@@ -23,6 +23,7 @@ setup(
     long_description=long_description,
     packages=find_packages(),
     install_requires=["pandas", "numpy"],
+    extras_require={"arrow": ["pyarrow"]},
     keywords=["python", "vote", "voting", "election", "approval voting",
               "star voting", "ranked choice voting", "rcv", "tier list", 
               "tier list voting"],
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# the modules of the package import each other by their own names
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "pyvoting"))
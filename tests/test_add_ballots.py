@@ -0,0 +1,60 @@
+import importlib
+import numpy as np
+import pandas as pd
+import pytest
+from ScoreVoting import ScoreVoting
+
+CLASSES = ["PluralityVoting", "ApprovalVoting", "ScoreVoting", "STARVoting", 
+           "RankedChoiceVoting", "TierListVoting", "TieredPopularityVoting", 
+           "NormalizedScoreVoting", "StandardizedScoreVoting", 
+           "RoundRobinVoting", "SchulzeVoting"]
+RANKED = ["RankedChoiceVoting", "TierListVoting", "TieredPopularityVoting", 
+          "RoundRobinVoting", "SchulzeVoting"]
+CANDIDATES = ["a", "b", "c", "d"]
+
+def RandomBallots(name, seed):
+    # valid and invalid ballots alike, some with missing values
+    rng = np.random.default_rng(seed)
+    if name in RANKED:
+        values = rng.integers(1, 6, (60, 4)).astype(float)
+        values[:20] = [rng.permutation(4)+1 for i in range(20)]
+    elif name in ("PluralityVoting", "ApprovalVoting"):
+        values = rng.integers(-1, 3, (60, 4)).astype(float)
+        values[:20] = rng.integers(0, 2, (20, 4))
+    else:
+        values = rng.integers(-1, 7, (60, 4)).astype(float)
+        values[40:] += 0.5
+    values[rng.random(values.shape)<0.1] = np.nan
+    return pd.DataFrame(values, columns=CANDIDATES)
+
+@pytest.mark.parametrize("name", CLASSES)
+@pytest.mark.parametrize("try_handle_invalid", [True, False])
+def test_add_ballots_matches_add_ballot(name, try_handle_invalid):
+    voting = getattr(importlib.import_module(name), name)
+    ballots = RandomBallots(name, CLASSES.index(name))
+    expected = voting(CANDIDATES, try_handle_invalid)
+    accepted = []
+    for i, row in ballots.iterrows():
+        # ranks are integers unless they are missing
+        if name in RANKED and not row.isna().any():
+            row = row.astype(int)
+        accepted.append(expected.AddBallot(row))
+    election = voting(CANDIDATES, try_handle_invalid)
+    valid, reasons = election.AddBallots(ballots)
+    assert valid.tolist() == accepted
+    assert list(reasons.index) == list(ballots.index[~valid])
+    assert (reasons!="").all()
+    assert (election.ballots.Rows() == expected.ballots.Rows()).all()
+    assert election.RunElection() == expected.RunElection()
+
+def test_reason_codes():
+    election = ScoreVoting(["a", "b", "c"], try_handle_invalid=False)
+    ballots = pd.DataFrame({"a": [1, 1, 6, 2.5, 1, 1], 
+                            "b": [2, np.nan, 0, 0, 2, 2], 
+                            "c": [3, 3, 0, 0, 3, "x"]})
+    valid, reasons = election.AddBallots(ballots, [1, 1, 1, 1, -1, 1])
+    assert valid.tolist() == [True, False, False, False, False, False]
+    assert reasons.to_dict() == {1: "missing", 2: "out_of_range", 
+                                 3: "non_integer", 4: "invalid_weight", 
+                                 5: "non_numeric"}
+    assert len(election.ballots) == 1
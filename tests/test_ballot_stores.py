@@ -0,0 +1,42 @@
+import numpy as np
+from BallotStore import BallotStore
+from BitBallotStore import BitBallotStore
+from ChoiceBallotStore import ChoiceBallotStore
+from SparseBallotStore import SparseBallotStore
+
+CANDIDATES = [f"c{i}" for i in range(11)]
+
+def Stores(rows, weights):
+    # the same ballots in a dense store and in every store able to hold 
+    # them, with chunks that do not line up with the bytes of the bits
+    stores = []
+    for store_class in (BallotStore, SparseBallotStore, BitBallotStore, 
+                        ChoiceBallotStore):
+        store = store_class(CANDIDATES, chunk_size=7)
+        store.Extend(rows, weights)
+        stores.append(store)
+    return stores
+
+def test_weighted_totals_match_dense():
+    rng = np.random.default_rng(0)
+    # every ballot votes 1 for one candidate, which any store can hold
+    rows = np.zeros((40, len(CANDIDATES)))
+    rows[np.arange(40), rng.integers(0, len(CANDIDATES), 40)] = 1
+    weights = rng.integers(1, 4, 40)
+    replicates = rng.poisson(1, (5, 40)).astype(float)
+    dense, *encoded = Stores(rows, weights)
+    for store in encoded:
+        assert (store.Rows() == dense.Rows()).all()
+        assert np.allclose(store.totals, dense.totals)
+        for other in (replicates[0], replicates):
+            assert np.allclose(store.WeightedTotals(other), other@rows)
+        reweighted = store.Reweighted(replicates[1])
+        assert np.allclose(reweighted.totals, replicates[1]@rows)
+
+def test_bit_totals_of_approval_ballots():
+    rng = np.random.default_rng(1)
+    rows = rng.integers(0, 2, (30, len(CANDIDATES))).astype(float)
+    replicates = rng.poisson(1, (3, 30)).astype(float)
+    store = BitBallotStore(CANDIDATES, chunk_size=4)
+    store.Extend(rows)
+    assert np.allclose(store.WeightedTotals(replicates), replicates@rows)
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+from PluralityVoting import PluralityVoting
+from ScoreVoting import ScoreVoting
+
+CANDIDATES = ["a", "b", "c", "d"]
+
+class SplitScoreVoting(ScoreVoting):
+    # the same split as ScoreVoting, but through the brackets of 
+    # RunElection, so Bootstrap runs every replicate
+    def SplitSize(self, num_candidates):
+        return num_candidates-1
+
+def test_ranks_from_totals_match_elections():
+    rng = np.random.default_rng(0)
+    ballots = pd.DataFrame(rng.integers(0, 3, (60, 4)), columns=CANDIDATES)
+    weights = rng.integers(1, 4, 60)
+    fast = ScoreVoting(CANDIDATES)
+    fast.AddBallots(ballots, weights)
+    slow = SplitScoreVoting(CANDIDATES)
+    slow.AddBallots(ballots, weights)
+    assert fast._RanksByTotals() and not slow._RanksByTotals()
+    expected = slow.Bootstrap(50, seed=1)
+    assert fast.Bootstrap(50, seed=1).equals(expected)
+    # some replicates tie, which the ranks from totals must agree on
+    assert (expected.to_numpy()>0).sum()>len(CANDIDATES)
+
+def test_same_seed_with_and_without_workers():
+    # enough ballots that the replicates are drawn in several blocks
+    rng = np.random.default_rng(2)
+    ballots = pd.DataFrame(0, index=range(300000), columns=CANDIDATES)
+    ballots.values[np.arange(300000), rng.choice(4, 300000, 
+                                                 p=[0.3, 0.3, 0.2, 0.2])] = 1
+    election = PluralityVoting(CANDIDATES)
+    election.AddBallots(ballots)
+    result = election.Bootstrap(30, seed=3)
+    assert result.equals(election.Bootstrap(30, seed=3, workers=2))
+    assert not result.equals(election.Bootstrap(30, seed=4))
+    assert np.allclose(result.sum(axis=1), 1)
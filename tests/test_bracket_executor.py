@@ -0,0 +1,42 @@
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import pytest
+from NormalizedScoreVoting import NormalizedScoreVoting
+
+CANDIDATES = [f"c{i}" for i in range(24)]
+
+class HalfSplitVoting(NormalizedScoreVoting):
+    # brackets of similar sizes, which the executor can run side by side
+    def SplitSize(self, num_candidates):
+        return num_candidates//2
+
+class CountingExecutor(ThreadPoolExecutor):
+    submitted = 0
+    
+    def submit(self, *args, **kwargs):
+        self.submitted += 1
+        return super().submit(*args, **kwargs)
+
+def Election():
+    rng = np.random.default_rng(0)
+    election = HalfSplitVoting(CANDIDATES)
+    election.AddBallots(pd.DataFrame(rng.integers(0, 6, (500, 24)), 
+                                     columns=CANDIDATES))
+    election.bracket_min_size = 3
+    return election
+
+def test_executor_matches_serial():
+    expected = Election().RunElection()
+    election = Election()
+    with CountingExecutor(2) as executor:
+        election.bracket_executor = executor
+        assert election.RunElection() == expected
+    assert executor.submitted > 0
+
+def test_process_executor_rejected():
+    election = Election()
+    with ProcessPoolExecutor(1) as executor:
+        election.bracket_executor = executor
+        with pytest.raises(ValueError):
+            election.RunElection()
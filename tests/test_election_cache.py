@@ -0,0 +1,58 @@
+import importlib
+import numpy as np
+import pandas as pd
+import pytest
+from ElectionCache import ElectionCache
+
+CLASSES = ["PluralityVoting", "ApprovalVoting", "ScoreVoting", "STARVoting", 
+           "RankedChoiceVoting", "TierListVoting", "TieredPopularityVoting", 
+           "NormalizedScoreVoting", "StandardizedScoreVoting", 
+           "RoundRobinVoting", "SchulzeVoting"]
+RANKED = ["RankedChoiceVoting", "TierListVoting", "TieredPopularityVoting", 
+          "RoundRobinVoting", "SchulzeVoting"]
+CANDIDATES = ["a", "b", "c", "d", "e"]
+
+def Ballots(name, rng, n):
+    if name=="PluralityVoting":
+        values = np.eye(5)[rng.integers(0, 5, n)]
+    elif name=="ApprovalVoting":
+        values = rng.integers(0, 2, (n, 5)).astype(float)
+    elif name in RANKED:
+        values = np.array([rng.permutation(5)+1 for i in range(n)])
+    else:
+        values = rng.integers(0, 6, (n, 5)).astype(float)
+    return pd.DataFrame(values, columns=CANDIDATES)
+
+def Numbers(log):
+    if isinstance(log, (list, tuple)):
+        return [n for item in log for n in Numbers(item)]
+    return [] if isinstance(log, str) else [log]
+
+def AssertSameResult(result, expected):
+    # a result cached for the candidates in another order added up the 
+    # standardized scores in that order
+    assert [r[:2] for r in result] == [r[:2] for r in expected]
+    assert Numbers([r[2] for r in result]) == pytest.approx(
+        Numbers([r[2] for r in expected]))
+
+@pytest.mark.parametrize("name", CLASSES)
+@pytest.mark.parametrize("max_bytes", [64*2**20, 2000])
+def test_cached_results_match_uncached_ones(name, max_bytes):
+    voting = getattr(importlib.import_module(name), name)
+    rng = np.random.default_rng(CLASSES.index(name))
+    election = voting(CANDIDATES)
+    # a small cache evicts results while they are still being used
+    election.cache = ElectionCache(max_bytes)
+    uncached = voting(CANDIDATES)
+    uncached.cache = ElectionCache(0)
+    for i in range(2):
+        # the cache is dropped when ballots are added
+        ballots = Ballots(name, rng, 20)
+        election.AddBallots(ballots)
+        uncached.AddBallots(ballots)
+        for candidates in [CANDIDATES, CANDIDATES[::-1], ["c", "a", "e"]]:
+            AssertSameResult(election.RunElection(candidates), 
+                             uncached.RunElection(candidates))
+        AssertSameResult(election.RunMultiWinnerElection(), 
+                         uncached.RunMultiWinnerElection())
+    assert len(uncached.cache.results) == 0
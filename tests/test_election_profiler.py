@@ -0,0 +1,66 @@
+import importlib
+import time
+import numpy as np
+import pandas as pd
+import pytest
+from ElectionProfiler import ElectionProfiler
+from STARVoting import STARVoting
+
+CLASSES = ["PluralityVoting", "ApprovalVoting", "ScoreVoting", "STARVoting", 
+           "RankedChoiceVoting", "TierListVoting", "TieredPopularityVoting", 
+           "NormalizedScoreVoting", "StandardizedScoreVoting", 
+           "RoundRobinVoting", "SchulzeVoting"]
+RANKED = ["RankedChoiceVoting", "TierListVoting", "TieredPopularityVoting", 
+          "RoundRobinVoting", "SchulzeVoting"]
+CANDIDATES = ["a", "b", "c", "d"]
+
+def Ballots(name, rng, n):
+    if name=="PluralityVoting":
+        values = np.eye(4)[rng.integers(0, 4, n)]
+    elif name=="ApprovalVoting":
+        values = rng.integers(0, 2, (n, 4)).astype(float)
+    elif name in RANKED:
+        values = np.array([rng.permutation(4)+1 for i in range(n)])
+    else:
+        values = rng.integers(0, 6, (n, 4)).astype(float)
+    return pd.DataFrame(values, columns=CANDIDATES)
+
+@pytest.mark.parametrize("name", CLASSES)
+def test_profiled_elections_match_unprofiled_ones(name):
+    voting = getattr(importlib.import_module(name), name)
+    ballots = Ballots(name, np.random.default_rng(CLASSES.index(name)), 40)
+    expected = voting(CANDIDATES)
+    expected.AddBallots(ballots)
+    election = voting(CANDIDATES)
+    measurements = []
+    profiler = ElectionProfiler([lambda *args: measurements.append(args)])
+    start = time.perf_counter()
+    with election.Profile(profiler):
+        election.AddBallots(ballots)
+        result = election.RunElection()
+    elapsed = time.perf_counter()-start
+    assert result == expected.RunElection()
+    assert election.profiler is None
+    report = profiler.Report()
+    assert report["phase.validation.calls"] >= 1
+    assert report["rounds"] >= 1
+    # nested phases are not counted twice
+    seconds = sum(report[f"phase.{phase}.seconds"] 
+                  for phase in ElectionProfiler.PHASES)
+    assert seconds <= elapsed
+    # every measurement is passed on to the hooks as well
+    timers = sum(value for kind, metric, value in measurements 
+                 if kind=="timer")
+    assert timers == pytest.approx(seconds)
+    rounds = sum(value for kind, metric, value in measurements 
+                 if metric=="rounds")
+    assert rounds == report["rounds"]
+
+def test_star_election_has_two_rounds():
+    election = STARVoting(["a", "b", "c"])
+    election.AddBallots(pd.DataFrame({"a": [1, 5], "b": [2, 0], 
+                                      "c": [3, 3]}))
+    with election.Profile() as profiler:
+        election.RunElection()
+    # the scoring round reads the running totals without touching ballots
+    assert profiler.ballots_touched == [0, 2]
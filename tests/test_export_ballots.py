@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+from PluralityVoting import PluralityVoting
+from ScoreVoting import ScoreVoting
+
+CANDIDATES = ["a", "b", "c"]
+BALLOTS = pd.DataFrame({"a": [5, 0, 3, 1, 5], "b": [0, 5, 4, 2, 0], 
+                        "c": [1, 2, 5, 3, 1]})
+WEIGHTS = [2, 1, 3, 1, 1]
+
+def Election():
+    election = ScoreVoting(CANDIDATES)
+    election.AddBallots(BALLOTS, WEIGHTS)
+    return election
+
+@pytest.mark.parametrize("extension", ["csv", "xlsx"])
+@pytest.mark.parametrize("chunk_size", [1, 2, 100])
+def test_chunked_export_matches_whole_export(tmp_path, extension, 
+                                             chunk_size):
+    election = Election()
+    assert election.ExportBallots(tmp_path/f"whole.{extension}") == 8
+    assert election.ExportBallots(tmp_path/f"chunked.{extension}", 
+                                  chunk_size) == 8
+    read = pd.read_csv if extension=="csv" else pd.read_excel
+    whole = read(tmp_path/f"whole.{extension}", index_col=0)
+    chunked = read(tmp_path/f"chunked.{extension}", index_col=0)
+    assert whole.equals(chunked)
+    # every ballot is written as many times as its weight
+    expected = BALLOTS.loc[np.repeat(BALLOTS.index, WEIGHTS)]
+    assert (whole.to_numpy() == expected.to_numpy()).all()
+
+def test_weight_column_round_trip(tmp_path):
+    election = Election()
+    assert election.ExportBallots(tmp_path/"ballots.csv", 2, "w") == 5
+    imported = ScoreVoting(CANDIDATES)
+    imported.ImportBallots(tmp_path/"ballots.csv", weight_column="w")
+    assert (imported.ballots.Rows() == election.ballots.Rows()).all()
+    assert imported.RunElection() == election.RunElection()
+
+@pytest.mark.parametrize("chunk_size", [None, 2])
+def test_simple_plurality_export_matches_ballot_export(tmp_path, chunk_size):
+    election = PluralityVoting(CANDIDATES)
+    election.AddBallots(pd.DataFrame({"a": [1, 0, 0, 1], "b": [0, 0, 1, 0], 
+                                      "c": [0, 1, 0, 0]}), [1, 2, 1, 1])
+    election.ExportBallots(tmp_path/"ballots.csv", True, chunk_size)
+    exported = pd.read_csv(tmp_path/"ballots.csv", index_col=0)
+    expected = [election.BallotView(row).Export(CANDIDATES, simple=True) 
+                for row in election.ballots.Rows()]
+    assert exported["candidate"].tolist() == ["a", "c", "c", "b", "a"]
+    assert exported["candidate"].tolist() == list(
+        np.repeat(expected, [1, 2, 1, 1]))
+    imported = PluralityVoting(CANDIDATES)
+    assert imported.ImportBallots(tmp_path/"ballots.csv") == 5
+    assert imported.RunElection() == election.RunElection()
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+from ScoreVoting import ScoreVoting
+
+CANDIDATES = ["a", "b", "c", "d"]
+
+def Ballots():
+    # integer scores, some out of range or missing
+    rng = np.random.default_rng(3)
+    ballots = pd.DataFrame(rng.integers(-1, 7, (50, 4)).astype(float), 
+                           columns=CANDIDATES)
+    ballots[rng.random((50, 4))<0.1] = np.nan
+    return ballots
+
+def Expected():
+    election = ScoreVoting(CANDIDATES, try_handle_invalid=False)
+    election.AddBallots(Ballots())
+    return election
+
+@pytest.mark.parametrize("extension", ["csv", "xlsx"])
+@pytest.mark.parametrize("chunk_size", [None, 1, 7, 50, 100])
+def test_chunked_import_matches_add_ballots(tmp_path, extension, chunk_size):
+    filename = tmp_path/f"ballots.{extension}"
+    if extension=="csv":
+        Ballots().to_csv(filename)
+    else:
+        Ballots().to_excel(filename)
+    expected = Expected()
+    election = ScoreVoting(CANDIDATES, try_handle_invalid=False)
+    calls = []
+    added = election.ImportBallots(filename, chunk_size, 
+                                   lambda *args: calls.append(args))
+    assert added == len(expected.ballots)
+    assert (election.ballots.Rows() == expected.ballots.Rows()).all()
+    assert election.RunElection() == expected.RunElection()
+    # progress is reported after every chunk with running totals
+    assert len(calls) == -(-50//(chunk_size or 50))
+    assert calls[-1] == (50, added)
+
+@pytest.mark.parametrize("extension", ["parquet", "arrow", "feather"])
+@pytest.mark.parametrize("chunk_size", [None, 7])
+def test_arrow_formats_match_csv(tmp_path, extension, chunk_size):
+    pytest.importorskip("pyarrow")
+    expected = Expected()
+    expected.ExportBallots(tmp_path/"ballots.csv")
+    filename = tmp_path/f"ballots.{extension}"
+    assert expected.ExportBallots(filename) == len(expected.ballots)
+    election = ScoreVoting(CANDIDATES, try_handle_invalid=False)
+    election.ImportBallots(filename, chunk_size)
+    from_csv = ScoreVoting(CANDIDATES, try_handle_invalid=False)
+    from_csv.ImportBallots(tmp_path/"ballots.csv", chunk_size)
+    assert (election.ballots.Rows() == from_csv.ballots.Rows()).all()
+    assert (election.ballots.Rows() == expected.ballots.Rows()).all()
+    assert election.RunElection() == expected.RunElection()
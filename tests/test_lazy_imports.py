@@ -0,0 +1,24 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def Run(code):
+    # a fresh interpreter, where nothing has been imported yet
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(
+        [ROOT, os.path.join(ROOT, "pyvoting")]))
+    return subprocess.run([sys.executable, "-c", code], env=env, 
+                          capture_output=True, text=True, 
+                          check=True).stdout.split()
+
+def test_package_imports_classes_on_first_access():
+    assert Run("import sys, pyvoting; print('pandas' in sys.modules); "
+               "print(pyvoting.STARVoting.__name__); "
+               "print('pandas' in sys.modules)") == [
+                   "False", "STARVoting", "True"]
+
+def test_classes_are_the_modules_classes():
+    assert Run("import pyvoting, STARVoting; "
+               "print(pyvoting.STARVoting is STARVoting.STARVoting); "
+               "print('SchulzeVoting' in dir(pyvoting))") == ["True", "True"]
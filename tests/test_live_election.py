@@ -0,0 +1,77 @@
+import asyncio
+import pandas as pd
+from RankedChoiceVoting import RankedChoiceVoting
+from STARVoting import STARVoting
+from LiveElection import LiveElection
+
+CANDIDATES = ["a", "b", "c", "d"]
+# ballots leaving out different candidates
+BALLOTS = [pd.Series({"a": 1}), pd.Series({"a": 1, "b": 2})]
+
+def test_partial_ballots_match_add_ballot():
+    expected = RankedChoiceVoting(CANDIDATES)
+    for ballot in BALLOTS:
+        assert expected.AddBallot(ballot)
+    
+    async def run():
+        live = LiveElection(RankedChoiceVoting(CANDIDATES))
+        for ballot in BALLOTS:
+            await live.AddBallot(ballot)
+        return live, await live.Publish()
+    
+    live, result = asyncio.run(run())
+    assert (live.accepted, live.rejected) == (len(BALLOTS), 0)
+    assert result == expected.RunElection()
+    assert (sorted(map(tuple, live.election.ballots.Rows())) == 
+            sorted(map(tuple, expected.ballots.Rows())))
+
+def test_ballots_stored_in_arrival_order():
+    # ballots batched together come in between ballots added one by one
+    ballots = [pd.Series({"a": 1, "b": 2, "c": 3, "d": 4}), BALLOTS[0], 
+               pd.Series({"d": 1, "c": 2, "b": 3, "a": 4}), BALLOTS[1], 
+               pd.Series({"b": 1, "a": 2, "d": 3, "c": 4})]
+    expected = RankedChoiceVoting(CANDIDATES)
+    for ballot in ballots:
+        assert expected.AddBallot(ballot)
+    
+    async def run():
+        live = LiveElection(RankedChoiceVoting(CANDIDATES))
+        for ballot in ballots:
+            await live.AddBallot(ballot)
+        await live.Publish()
+        return live
+    
+    live = asyncio.run(run())
+    assert (live.election.ballots.Rows() == expected.ballots.Rows()).all()
+
+class CountedSTARVoting(STARVoting):
+    runs = 0
+    
+    def RunElection(self, candidates=None, workers=None):
+        self.runs += 1
+        return super().RunElection(candidates, workers)
+
+def test_publish_reuses_totals_and_skips_unchanged_ballots():
+    election = CountedSTARVoting(CANDIDATES)
+    live = LiveElection(election)
+    
+    async def run():
+        await live.AddBallot(pd.Series({"a": 5, "b": 3, "c": 0, "d": 1}))
+        first = await live.Publish()
+        await live.AddBallot(pd.Series({"a": 0, "b": 5, "c": 4, "d": 1}))
+        with election.Profile() as profiler:
+            second = await live.Publish()
+        # nothing changed since the last publish
+        third = await live.Publish()
+        # a ballot added to the election directly is picked up
+        election.AddBallot(pd.Series({"a": 0, "b": 0, "c": 5, "d": 5}))
+        fourth = await live.Publish()
+        return first, second, third, fourth, profiler
+    
+    first, second, third, fourth, profiler = asyncio.run(run())
+    assert election.runs == 3
+    assert third is second
+    assert fourth == election.RunElection()
+    # both rounds are read off the running totals and pairwise counts 
+    # without going through the ballots
+    assert sum(profiler.ballots_touched) == 0
@@ -0,0 +1,59 @@
+import pandas as pd
+import pytest
+from STARVoting import STARVoting
+
+CANDIDATES = ["a", "b", "c"]
+BALLOTS = pd.DataFrame({"a": [5, 0, 3], "b": [0, 5, 4], "c": [1, 2, 5]})
+FAILED = pd.DataFrame({"a": [0, 0], "b": [0, 1], "c": [5, 5]})
+LATER = pd.DataFrame({"a": [5, 4], "b": [1, 0], "c": [0, 0]})
+
+def test_failed_batch_is_rolled_back(tmp_path):
+    election = STARVoting(CANDIDATES)
+    election.OpenBallotStore(tmp_path/"ballots")
+    election.AddBallots(BALLOTS)
+    # count the pairwise preferences, so that they are updated incrementally
+    election.PairwiseMatrix()
+    with pytest.raises(RuntimeError):
+        with election.ballots.Batch():
+            election.AddBallots(FAILED)
+            election.RunElection()
+            raise RuntimeError
+    election.AddBallots(LATER)
+    
+    expected = STARVoting(CANDIDATES)
+    expected.AddBallots(pd.concat([BALLOTS, LATER], ignore_index=True))
+    assert len(election.ballots) == len(expected.ballots)
+    assert election.PairwiseMatrix().equals(expected.PairwiseMatrix())
+    assert election.RunElection() == expected.RunElection()
+
+class CrashingSTARVoting(STARVoting):
+    
+    # fails while adding the chunk number crash_at of an import
+    crash_at = None
+    batches = 0
+    
+    def AddBallots(self, new_ballots, weights=None):
+        self.batches += 1
+        if self.batches==self.crash_at:
+            raise RuntimeError
+        return super().AddBallots(new_ballots, weights)
+
+def test_resumed_import_matches_whole_import(tmp_path):
+    ballots = pd.concat([BALLOTS, FAILED, LATER]*3, ignore_index=True)
+    ballots.to_csv(tmp_path/"ballots.csv")
+    election = CrashingSTARVoting(CANDIDATES)
+    election.crash_at = 3
+    election.OpenBallotStore(tmp_path/"ballots")
+    with pytest.raises(RuntimeError):
+        election.ImportBallots(tmp_path/"ballots.csv", chunk_size=4)
+    resumed = CrashingSTARVoting(CANDIDATES)
+    resumed.OpenBallotStore(tmp_path/"ballots")
+    # the two chunks added before the crash are kept
+    assert len(resumed.ballots) == 8
+    assert resumed.ImportBallots(tmp_path/"ballots.csv", chunk_size=4, 
+                                 resume=True) == 13
+    
+    expected = STARVoting(CANDIDATES)
+    expected.AddBallots(ballots)
+    assert (resumed.ballots.Rows() == expected.ballots.Rows()).all()
+    assert resumed.RunElection() == expected.RunElection()
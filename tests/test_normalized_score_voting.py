@@ -0,0 +1,27 @@
+import pandas as pd
+from NormalizedScoreVoting import NormalizedScoreVoting
+from StandardizedScoreVoting import StandardizedScoreVoting
+
+CANDIDATES = ["c0", "c1", "c2", "c3"]
+# c0 and c2 tie in the final round, where their normalized scores add up 
+# to 0 in a different order on each ballot
+BALLOTS = [[1, 1, 1, 3], [2, 0, 4, 1], [3, 0, 3, 2], [5, 1, 2, 0], 
+           [0, 4, 4, 3], [0, 3, 1, 5], [3, 3, 1, 1], [5, 3, 3, 4]]
+
+def Ranks(election):
+    return {c: r for c, r, l in election.RunElection()}
+
+def test_tied_profile_matches_baseline():
+    election = NormalizedScoreVoting(CANDIDATES)
+    for ballot in BALLOTS:
+        assert election.AddBallot(pd.Series(ballot, index=CANDIDATES))
+    assert Ranks(election) == {"c0": 1, "c2": 1, "c3": 3, "c1": 4}
+
+def test_add_ballots_matches_add_ballot():
+    for cls in (NormalizedScoreVoting, StandardizedScoreVoting):
+        expected = cls(CANDIDATES)
+        for ballot in BALLOTS:
+            expected.AddBallot(pd.Series(ballot, index=CANDIDATES))
+        election = cls(CANDIDATES)
+        election.AddBallots(pd.DataFrame(BALLOTS, columns=CANDIDATES))
+        assert Ranks(election) == Ranks(expected)
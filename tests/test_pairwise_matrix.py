@@ -0,0 +1,57 @@
+import importlib
+import numpy as np
+import pandas as pd
+import pytest
+
+CLASSES = ["PluralityVoting", "ApprovalVoting", "ScoreVoting", "STARVoting", 
+           "RankedChoiceVoting", "TierListVoting", "TieredPopularityVoting", 
+           "NormalizedScoreVoting", "StandardizedScoreVoting", 
+           "RoundRobinVoting", "SchulzeVoting"]
+RANKED = ["RankedChoiceVoting", "TierListVoting", "TieredPopularityVoting", 
+          "RoundRobinVoting", "SchulzeVoting"]
+CANDIDATES = ["a", "b", "c", "d", "e"]
+
+def Ballots(name, rng, n):
+    if name=="PluralityVoting":
+        values = np.eye(5)[rng.integers(0, 5, n)]
+    elif name=="ApprovalVoting":
+        values = rng.integers(0, 2, (n, 5)).astype(float)
+    elif name in RANKED:
+        # partial rankings, possibly with ties
+        values = rng.integers(1, 6, (n, 5)).astype(float)
+        values[rng.random((n, 5))<0.3] = np.nan
+        values[np.isnan(values).all(axis=1), 0] = 1
+    else:
+        values = rng.integers(0, 6, (n, 5)).astype(float)
+    return pd.DataFrame(values, columns=CANDIDATES)
+
+def Pairwise(election):
+    # compare every pair on every ballot by itself
+    counts = np.zeros((5, 5))
+    for row, weight in zip(election.ballots.Rows(), 
+                           election.ballots.weights):
+        scores = election.PreferenceScores(row[np.newaxis])[0]
+        counts += weight*(scores[:, np.newaxis]>scores[np.newaxis])
+    return counts
+
+@pytest.mark.parametrize("name", CLASSES)
+def test_pairwise_matrix_matches_ballot_comparisons(name):
+    voting = getattr(importlib.import_module(name), name)
+    rng = np.random.default_rng(CLASSES.index(name))
+    election = voting(CANDIDATES)
+    for i in range(3):
+        # the counts are kept up to date as ballots are added
+        election.AddBallots(Ballots(name, rng, 15), rng.integers(1, 4, 15))
+        counts = Pairwise(election)
+        assert (election.PairwiseMatrix().to_numpy() == counts).all()
+        subset = ["e", "b", "c"]
+        columns = [CANDIDATES.index(c) for c in subset]
+        assert (election.PairwiseMatrix(subset).to_numpy() == 
+                counts[np.ix_(columns, columns)]).all()
+        for c in CANDIDATES:
+            j = CANDIDATES.index(c)
+            others = [k for k in range(5) if k!=j]
+            wins = (counts[j, others]>counts[others, j]).all()
+            losses = (counts[j, others]<counts[others, j]).all()
+            assert (election.CondorcetWinner()==c) == wins
+            assert (election.CondorcetLoser()==c) == losses
@@ -0,0 +1,63 @@
+import collections
+import numpy as np
+import pandas as pd
+import pytest
+from RankedChoiceVoting import RankedChoiceVoting
+from TierListVoting import TierListVoting
+from TieredPopularityVoting import TieredPopularityVoting
+from Voting import _Ranks, _ValidRanks
+
+def ValidRanks(ranks, dense):
+    # the rules spelled out one ballot at a time
+    counts = collections.Counter(ranks)
+    bottom = max(ranks)
+    if min(ranks)<1:
+        return False
+    if dense:
+        return set(ranks)==set(range(1, int(bottom)+1))
+    return all(counts[r]==1 for r in range(1, int(bottom)))
+
+@pytest.mark.parametrize("dense", [False, True])
+@pytest.mark.parametrize("bottom", [None, 1, 3])
+def test_ranks_match_pandas_ranks(dense, bottom):
+    scores = np.random.default_rng(0).integers(-2, 5, (300, 6)).astype(float)
+    rank, sorted_rank = _Ranks(scores, dense, bottom)
+    expected = pd.DataFrame(scores).rank(axis=1, 
+                                         method="dense" if dense else "min")
+    if bottom is not None:
+        expected = expected.clip(upper=bottom)
+    assert (rank == expected.to_numpy()).all()
+    assert (sorted_rank == np.sort(rank, axis=1)).all()
+
+@pytest.mark.parametrize("dense", [False, True])
+def test_valid_ranks_match_the_rules(dense):
+    ranks = np.random.default_rng(1).integers(0, 5, (2000, 4)).astype(float)
+    sorted_rank = np.sort(ranks, axis=1)
+    valid = _ValidRanks(sorted_rank, dense)
+    assert valid.tolist() == [ValidRanks(list(r), dense) for r in ranks]
+    assert 0 < valid.sum() < len(valid)
+
+@pytest.mark.parametrize("voting, options", [
+    (RankedChoiceVoting, {"allowed_rank": 2}), 
+    (RankedChoiceVoting, {"reverse": True}), 
+    (TierListVoting, {"allowed_tier": 2}), 
+    (TieredPopularityVoting, {"allowed_tier": 3})])
+@pytest.mark.parametrize("try_handle_invalid", [True, False])
+def test_batches_match_single_ballots(voting, options, try_handle_invalid):
+    candidates = ["a", "b", "c", "d"]
+    rng = np.random.default_rng(2)
+    ballots = pd.DataFrame(rng.integers(0, 6, (200, 4)).astype(float), 
+                           columns=candidates)
+    ballots[rng.random((200, 4))<0.2] = np.nan
+    expected = voting(candidates, try_handle_invalid, **options)
+    accepted = []
+    for i, row in ballots.iterrows():
+        # ranks are integers unless they are missing
+        if not row.isna().any():
+            row = row.astype(int)
+        accepted.append(expected.AddBallot(row))
+    election = voting(candidates, try_handle_invalid, **options)
+    valid, reasons = election.AddBallots(ballots)
+    assert valid.tolist() == accepted
+    assert any(accepted)
+    assert (election.ballots.Rows() == expected.ballots.Rows()).all()
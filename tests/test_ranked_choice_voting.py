@@ -0,0 +1,28 @@
+import random
+import pytest
+from RankedChoiceVoting import RankedChoiceVoting
+
+class RecursiveRankedChoiceVoting(RankedChoiceVoting):
+    
+    # eliminating the last place one round at a time through the generic 
+    # recursive RunElection bypasses the bucketed engine
+    def SplitSize(self, num_candidates):
+        return num_candidates-1
+
+@pytest.mark.parametrize("seed", range(20))
+def test_bucket_engine_matches_recursive_elections(seed):
+    rng = random.Random(seed)
+    candidates = [f"c{i}" for i in range(rng.randint(1, 9))]
+    allowed_rank = rng.choice([0, rng.randint(1, len(candidates))])
+    election = RankedChoiceVoting(candidates, allowed_rank=allowed_rank)
+    expected = RecursiveRankedChoiceVoting(candidates, 
+                                           allowed_rank=allowed_rank)
+    for i in range(rng.choice([5, 40, 120])):
+        # partial rankings, many of which tie or exhaust early
+        ballot = rng.sample(candidates, rng.randint(1, len(candidates)))
+        weight = rng.choice([1, 1, 2, 0.5])
+        assert election.AddBallot(ballot, weight) == expected.AddBallot(
+            ballot, weight)
+    subset = rng.sample(candidates, rng.randint(0, len(candidates)))
+    for sub in [candidates, candidates[::-1], subset]:
+        assert election.RunElection(sub) == expected.RunElection(sub)
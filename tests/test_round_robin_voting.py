@@ -0,0 +1,34 @@
+import pandas as pd
+from RoundRobinVoting import RoundRobinVoting
+
+CANDIDATES = ["a", "b", "c", "d"]
+# a beats b, b beats c and c beats a 2 to 1, and all of them beat d
+BALLOTS = [pd.Series({"a": 1, "b": 2, "c": 3, "d": 4}), 
+           pd.Series({"b": 1, "c": 2, "a": 3, "d": 4}), 
+           pd.Series({"c": 1, "a": 2, "b": 3, "d": 4})]
+
+def Election(ballots):
+    election = RoundRobinVoting(CANDIDATES)
+    for ballot in ballots:
+        assert election.AddBallot(ballot)
+    return election
+
+def test_condorcet_cycle():
+    election = Election(BALLOTS)
+    assert election.CondorcetWinner() is None
+    assert election.CondorcetLoser() == "d"
+    # a, b and c win 2 matches each, then 1 each once d is eliminated
+    assert [(c, r, l) for c, r, l in election.RunElection()] == [
+        ("a", 1, [(2, "u"), (1, "t")]), ("b", 1, [(2, "u"), (1, "t")]), 
+        ("c", 1, [(2, "u"), (1, "t")]), ("d", 4, [(0, "l"), (0, "t")])]
+
+def test_cycle_broken_by_another_voter():
+    # a fourth voter ties a with b and makes b beat c 3 to 1, so b gets 2.5 
+    # points, c gets 2 and a gets 1.5
+    election = Election(BALLOTS+[pd.Series({"b": 1, "a": 2, "c": 2, 
+                                            "d": 3})])
+    assert [(c, r, l) for c, r, l in election.RunElection()] == [
+        ("b", 1, [(2.5, "u"), (1.5, "u"), (1, "u"), (0, "t")]), 
+        ("c", 2, [(2, "u"), (1, "u"), (0, "l"), (0, "t")]), 
+        ("a", 3, [(1.5, "u"), (0.5, "l"), (0, "t")]), 
+        ("d", 4, [(0, "l"), (0, "t")])]
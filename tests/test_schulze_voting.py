@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+from SchulzeVoting import SchulzeVoting
+
+CANDIDATES = ["a", "b", "c", "d", "e"]
+# the example of Schulze's paper, with 45 voters and 5 candidates
+PREFERENCES = [("acbed", 5), ("adecb", 5), ("bedac", 8), ("cabed", 3), 
+               ("caebd", 7), ("cbade", 2), ("dceba", 7), ("ebadc", 8)]
+# strength of the strongest path from each candidate to each other one, as 
+# worked out in the paper
+STRONGEST_PATHS = [[0, 28, 28, 30, 24], 
+                   [25, 0, 28, 33, 24], 
+                   [25, 29, 0, 29, 24], 
+                   [25, 28, 28, 0, 24], 
+                   [25, 28, 28, 31, 0]]
+
+def Election():
+    election = SchulzeVoting(CANDIDATES)
+    for order, weight in PREFERENCES:
+        ballot = pd.Series({c: i+1 for i, c in enumerate(order)})
+        assert election.AddBallot(ballot, weight)
+    return election
+
+def test_strongest_paths():
+    strength = Election()._StrongestPaths(CANDIDATES)
+    off_diagonal = ~np.eye(len(CANDIDATES), dtype=bool)
+    assert (strength[off_diagonal] == 
+            np.array(STRONGEST_PATHS)[off_diagonal]).all()
+
+def test_ranking():
+    election = Election()
+    # there is no Condorcet winner, but the Schulze winner is e
+    assert election.CondorcetWinner() is None
+    assert ([(c, r) for c, r, l in election.RunElection()] == 
+            [("e", 1), ("a", 2), ("c", 3), ("b", 4), ("d", 5)])
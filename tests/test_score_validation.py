@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+from NormalizedScoreVoting import NormalizedScoreVoting
+from ScoreVoting import ScoreVoting
+from STARVoting import STARVoting
+from StandardizedScoreVoting import StandardizedScoreVoting
+from Voting import _ValidScores
+
+def Reason(scores, score_range, only_int):
+    # the checks in the order they take precedence
+    if any(np.isnan(s) for s in scores):
+        return "missing"
+    if any(s<score_range[0] or s>score_range[1] for s in scores):
+        return "out_of_range"
+    if only_int and any(s!=round(s) for s in scores):
+        return "non_integer"
+    return ""
+
+def Scores(seed):
+    rng = np.random.default_rng(seed)
+    scores = rng.integers(-3, 13, (500, 4))/2
+    scores[rng.random((500, 4))<0.05] = np.nan
+    return scores
+
+@pytest.mark.parametrize("score_range", [(0, 5), (-2, 3)])
+@pytest.mark.parametrize("only_int", [True, False])
+def test_reasons_match_the_rules(score_range, only_int):
+    scores = Scores(0)
+    repaired, reasons = _ValidScores(scores.copy(), False, score_range, 
+                                     only_int)
+    assert np.array_equal(repaired, scores, equal_nan=True)
+    assert reasons.tolist() == [Reason(s, score_range, only_int) 
+                                for s in scores]
+
+@pytest.mark.parametrize("score_range", [(0, 5), (-2, 3)])
+@pytest.mark.parametrize("only_int", [True, False])
+def test_repaired_scores_match_the_rules(score_range, only_int):
+    scores = Scores(1)
+    repaired, reasons = _ValidScores(scores.copy(), True, score_range, 
+                                     only_int)
+    expected = np.clip(np.nan_to_num(scores), *score_range)
+    if only_int:
+        expected = np.round(expected)
+    assert (repaired == expected).all()
+    assert (reasons == "").all()
+
+@pytest.mark.parametrize("voting", [ScoreVoting, STARVoting, 
+                                    NormalizedScoreVoting, 
+                                    StandardizedScoreVoting])
+@pytest.mark.parametrize("try_handle_invalid", [True, False])
+@pytest.mark.parametrize("only_int", [True, False])
+def test_batches_match_single_ballots(voting, try_handle_invalid, only_int):
+    candidates = ["a", "b", "c", "d"]
+    ballots = pd.DataFrame(Scores(2)[:100], columns=candidates)
+    expected = voting(candidates, try_handle_invalid, (-1, 4), only_int)
+    accepted = [expected.AddBallot(row) for i, row in ballots.iterrows()]
+    election = voting(candidates, try_handle_invalid, (-1, 4), only_int)
+    valid, reasons = election.AddBallots(ballots)
+    assert valid.tolist() == accepted
+    assert (election.ballots.Rows() == expected.ballots.Rows()).all()
@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+from ScoreVoting import ScoreVoting
+
+CANDIDATES = ["a", "b", "c"]
+BALLOTS = [pd.Series({"a": 5, "b": 3, "c": 0}), 
+           pd.Series({"a": 1, "b": 3, "c": 4})]
+
+def test_integer_totals():
+    election = ScoreVoting(CANDIDATES)
+    for ballot in BALLOTS:
+        assert election.AddBallot(ballot)
+    result = election.RunElection()
+    assert [(c, r) for c, r, l in result] == [("a", 1), ("b", 1), ("c", 3)]
+    assert all(isinstance(s, np.integer) for c, r, l in result for s, o in l)
+    scores = election.Tally(CANDIDATES)
+    assert scores.dtype == int
+    assert scores.to_dict() == {"a": 6, "b": 6, "c": 4}
+
+def test_fractional_weights_keep_float_totals():
+    election = ScoreVoting(CANDIDATES)
+    election.AddBallots(pd.DataFrame(BALLOTS), [0.5, 1])
+    assert election.Tally(CANDIDATES).to_dict() == {"a": 3.5, "b": 4.5, 
+                                                    "c": 4}
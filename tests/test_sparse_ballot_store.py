@@ -0,0 +1,44 @@
+from collections import Counter
+import numpy as np
+import pandas as pd
+from SparseBallotStore import SparseBallotStore, _Defaults
+from RankedChoiceVoting import RankedChoiceVoting
+from ScoreVoting import ScoreVoting
+
+def Mode(row):
+    counts = Counter(row.tolist())
+    most = max(counts.values())
+    return max(v for v in counts if counts[v]==most)
+
+def test_defaults_match_mode():
+    rng = np.random.default_rng(0)
+    batches = [rng.integers(0, 4, (30, 8)), rng.integers(-3, 40, (30, 8)), 
+               rng.choice([0, 0.5, -1.25, 3.3], (30, 8)), 
+               np.where(rng.random((30, 8))<0.8, 0, 
+                        rng.integers(1, 9, (30, 8)))]
+    for rows in batches:
+        rows = rows.astype(float)
+        assert (_Defaults(rows) == [Mode(row) for row in rows]).all()
+        store = SparseBallotStore([f"c{i}" for i in range(8)])
+        store.Extend(rows, np.ones(len(rows)))
+        assert (store.Rows() == rows).all()
+
+def test_sparse_ballots_match_dense():
+    rng = np.random.default_rng(1)
+    candidates = [f"c{i}" for i in range(20)]
+    # every ballot ranks its first few candidates of a random order
+    order = rng.permuted(np.tile(np.arange(1, 21), (200, 1)), axis=1)
+    length = rng.integers(1, 5, (200, 1))
+    rankings = pd.DataFrame(np.where(order<=length, order, np.nan), 
+                            columns=candidates)
+    scores = rankings.fillna(0)
+    for voting, ballots in ((RankedChoiceVoting, rankings), 
+                            (ScoreVoting, scores)):
+        dense = voting(candidates)
+        dense.AddBallots(ballots)
+        sparse = voting(candidates)
+        sparse.AddBallots(ballots)
+        assert len(dense.ballots) == len(ballots)
+        sparse.SparseBallots()
+        assert sparse.RunElection() == dense.RunElection()
+        assert (sparse.ballots.Rows() == dense.ballots.Rows()).all()
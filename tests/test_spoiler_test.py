@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+from PluralityVoting import PluralityVoting
+from ScoreVoting import ScoreVoting
+from STARVoting import STARVoting
+
+CANDIDATES = ["a", "b", "c", "d"]
+
+def Ballots():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(rng.integers(0, 6, (30, 4)), columns=CANDIDATES)
+
+@pytest.mark.parametrize("voting", [ScoreVoting, STARVoting])
+@pytest.mark.parametrize("copies", [0, 1, 2])
+def test_spoiler_test_matches_elections_with_duplicates(voting, copies):
+    election = voting(CANDIDATES)
+    election.AddBallots(Ballots())
+    result = election.SpoilerTest(copies=copies)
+    rank = {c: r for (c, r, l) in election.RunElection()}
+    for c in CANDIDATES:
+        # every voter scores the duplicates just like the candidate
+        names = [f"{c} ({i})" for i in range(1, copies+1)]
+        ballots = Ballots()
+        for name in names:
+            ballots[name] = ballots[c]
+        expected = voting(CANDIDATES+names)
+        expected.AddBallots(ballots)
+        new_rank = {d: r for (d, r, l) in expected.RunElection()}
+        beaten = [d for d in CANDIDATES if rank[d]>rank[c]]
+        worse_off = sum(any(new_rank[m]>=new_rank[d] for d in beaten) 
+                        for m in [c]+names)
+        row = result.loc[(c, copies)]
+        assert row["rank"] == rank[c]
+        assert row["best_rank"] == min(new_rank[m] for m in [c]+names)
+        assert row["worse_off"] == worse_off
+
+def test_vote_splitting_spoils_plurality():
+    election = PluralityVoting(["A", "B", "C"])
+    election.AddBallots(pd.DataFrame({"A": [1, 0, 0], "B": [0, 1, 0], 
+                                      "C": [0, 0, 1]}), [40, 35, 25])
+    result = election.SpoilerTest(["A", "C"], [1, 2], seed=1)
+    # the voters of A are split among its duplicates, so that B wins
+    assert result.loc[("A", 1), "worse_off"] == 2
+    assert result.loc[("A", 2), "worse_off"] == 3
+    assert not result.loc[("A", 1), "semi_spoiler_proof"]
+    # C beats nobody, so it cannot be worse off
+    assert result.loc[("C", 2), "spoiler_proof"]
+    assert result.equals(election.SpoilerTest(["A", "C"], [1, 2], seed=1, 
+                                              workers=2))
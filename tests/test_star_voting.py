@@ -0,0 +1,34 @@
+import itertools
+import numpy as np
+import pandas as pd
+import pytest
+from STARVoting import STARVoting
+
+CANDIDATES = ["a", "b", "c", "d"]
+
+def Ballots(rng, n):
+    return pd.DataFrame(rng.integers(0, 6, (n, 4)), columns=CANDIDATES)
+
+def Runoff(election, candidates):
+    # every ballot votes on its own, the way runoffs used to be tallied
+    votes = pd.Series(0, index=candidates)
+    for row, weight in zip(election.ballots.Rows(), 
+                           election.ballots.weights):
+        votes += weight*election.BallotView(row).Vote(candidates, runoff=True)
+    return votes
+
+@pytest.mark.parametrize("seed", range(3))
+def test_runoffs_match_ballot_votes_as_ballots_arrive(seed):
+    rng = np.random.default_rng(seed)
+    election = STARVoting(CANDIDATES)
+    for i in range(3):
+        # the pairwise counts are updated as ballots are added between runs
+        election.AddBallots(Ballots(rng, 10), rng.integers(1, 4, 10))
+        for pair in itertools.combinations(CANDIDATES, 2):
+            pair = list(pair)
+            assert election.Tally(pair, runoff=True).tolist() == Runoff(
+                election, pair).tolist()
+        expected = STARVoting(CANDIDATES)
+        weights = election.ballots.weights[:len(election.ballots)]
+        expected.ballots.Extend(election.ballots.Rows(), weights)
+        assert election.RunElection() == expected.RunElection()
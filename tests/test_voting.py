@@ -0,0 +1,24 @@
+import pandas as pd
+from PluralityVoting import PluralityVoting
+
+CANDIDATES = ["a", "b", "c"]
+# a gets 0.1+0.2 voters, which is not exactly 0.3 in floating point
+BALLOTS = [pd.Series({"a": 1}), pd.Series({"a": 1}), pd.Series({"b": 1}), 
+           pd.Series({"c": 1})]
+WEIGHTS = [0.1, 0.2, 0.3, 0.1]
+
+def test_ties_ignore_rounding_errors():
+    election = PluralityVoting(CANDIDATES)
+    for ballot, weight in zip(BALLOTS, WEIGHTS):
+        assert election.AddBallot(ballot, weight)
+    ranks = {c: r for c, r, l in election.RunElection()}
+    assert ranks == {"a": 1, "b": 1, "c": 3}
+
+def test_add_ballots_matches_add_ballot():
+    expected = PluralityVoting(CANDIDATES)
+    for ballot, weight in zip(BALLOTS, WEIGHTS):
+        assert expected.AddBallot(ballot, weight)
+    election = PluralityVoting(CANDIDATES)
+    election.AddBallots(pd.DataFrame(BALLOTS), WEIGHTS)
+    assert ([(c, r) for c, r, l in election.RunElection()] == 
+            [(c, r) for c, r, l in expected.RunElection()])
@@ -0,0 +1,57 @@
+import importlib
+import numpy as np
+import pandas as pd
+import pytest
+
+CLASSES = ["PluralityVoting", "ApprovalVoting", "ScoreVoting", "STARVoting", 
+           "RankedChoiceVoting", "TierListVoting", "TieredPopularityVoting", 
+           "NormalizedScoreVoting", "StandardizedScoreVoting", 
+           "RoundRobinVoting", "SchulzeVoting"]
+CANDIDATES = ["a", "b", "c", "d"]
+
+def Ballots(name, rng):
+    # a few distinct ballots cast by many voters
+    if name=="PluralityVoting":
+        values = np.eye(4, dtype=int)[rng.integers(0, 4, 6)]
+    elif name=="ApprovalVoting":
+        values = rng.integers(0, 2, (6, 4))
+    elif name in ("RankedChoiceVoting", "TierListVoting", 
+                  "TieredPopularityVoting", "RoundRobinVoting", 
+                  "SchulzeVoting"):
+        values = np.array([rng.permutation(4)+1 for i in range(6)])
+    else:
+        values = rng.integers(0, 6, (6, 4))
+    return pd.DataFrame(values[rng.integers(0, 6, 80)], columns=CANDIDATES)
+
+def Numbers(log):
+    if isinstance(log, (list, tuple)):
+        return [n for item in log for n in Numbers(item)]
+    return [] if isinstance(log, str) else [log]
+
+def AssertSameResult(result, expected):
+    # normalized and standardized scores are summed in a different order
+    assert [r[:2] for r in result] == [r[:2] for r in expected]
+    assert Numbers([r[2] for r in result]) == pytest.approx(
+        Numbers([r[2] for r in expected]))
+
+@pytest.mark.parametrize("name", CLASSES)
+def test_weights_and_compacting_match_repeated_ballots(name):
+    voting = getattr(importlib.import_module(name), name)
+    rng = np.random.default_rng(CLASSES.index(name))
+    ballots = Ballots(name, rng)
+    weights = rng.integers(1, 4, len(ballots))
+    expected = voting(CANDIDATES)
+    expected.AddBallots(ballots.loc[np.repeat(ballots.index, weights)])
+    weighted = voting(CANDIDATES)
+    weighted.AddBallots(ballots, weights)
+    compacted = voting(CANDIDATES)
+    compacted.AddBallots(ballots.iloc[:40], weights[:40])
+    assert compacted.CompactBallots() <= 6
+    # ballots added after compacting are collapsed as well
+    compacted.AddBallots(ballots.iloc[40:], weights[40:])
+    assert len(compacted.ballots) <= 6
+    result = expected.RunElection()
+    AssertSameResult(weighted.RunElection(), result)
+    AssertSameResult(compacted.RunElection(), result)
+    AssertSameResult(compacted.RunElection(CANDIDATES[:3]), 
+                     expected.RunElection(CANDIDATES[:3]))
@@ -0,0 +1,47 @@
+import importlib
+import numpy as np
+import pandas as pd
+import pytest
+
+CLASSES = ["PluralityVoting", "ApprovalVoting", "ScoreVoting", "STARVoting", 
+           "RankedChoiceVoting", "TierListVoting", "TieredPopularityVoting", 
+           "NormalizedScoreVoting", "StandardizedScoreVoting", 
+           "RoundRobinVoting", "SchulzeVoting"]
+RANKED = ["RankedChoiceVoting", "TierListVoting", "TieredPopularityVoting", 
+          "RoundRobinVoting", "SchulzeVoting"]
+CANDIDATES = ["a", "b", "c", "d"]
+
+def Ballots(name, rng, n):
+    if name=="PluralityVoting":
+        values = np.eye(4)[rng.integers(0, 4, n)]
+    elif name=="ApprovalVoting":
+        values = rng.integers(0, 2, (n, 4)).astype(float)
+    elif name in RANKED:
+        values = rng.integers(1, 5, (n, 4)).astype(float)
+        values[rng.random((n, 4))<0.3] = np.nan
+        values[np.isnan(values).all(axis=1), 0] = 1
+    else:
+        values = rng.integers(0, 6, (n, 4)).astype(float)
+    return pd.DataFrame(values, columns=CANDIDATES)
+
+def Elections(name):
+    voting = getattr(importlib.import_module(name), name)
+    rng = np.random.default_rng(CLASSES.index(name))
+    ballots = Ballots(name, rng, 50)
+    weights = rng.choice([1, 2, 0.5], 50)
+    elections = [voting(CANDIDATES), voting(CANDIDATES)]
+    for election in elections:
+        # small chunks, so that every worker gets some of them
+        election.ballots.chunk_size = 5
+        election.AddBallots(ballots, weights)
+    return elections
+
+@pytest.mark.parametrize("name", CLASSES)
+def test_workers_match_serial_elections(name):
+    serial, parallel = Elections(name)
+    assert parallel.RunElection(workers=2) == serial.RunElection()
+    assert parallel.RunElection(CANDIDATES[1:], workers=2) == (
+        serial.RunElection(CANDIDATES[1:]))
+    serial, parallel = Elections(name)
+    assert parallel.RunMultiWinnerElection(workers=2) == (
+        serial.RunMultiWinnerElection())